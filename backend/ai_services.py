@@ -5,11 +5,23 @@ Handles Groq Whisper (speech-to-text) and OpenRouter LLM (field extraction, chat
 
 import os
 import json
+import time
 import logging
-import requests
-from typing import Optional, Dict, Any
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 
+from http_client import http_client
+from circuit_breaker import CircuitBreaker
+from transcription_cache import transcription_cache, hash_file
+from audio_preprocessing import audio_preprocessor, stitch_transcripts
+from utils.ttl_cache import TTLCache
+from utils.text_normalize import normalize_text
+from rule_extraction import pre_extract, complete_fields
+from department_classifier import classify_department
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -19,6 +31,28 @@ GROQ_API_KEY = os.getenv("groq_api_key", "")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
+# Per-attempt timeouts (seconds); callers can also set an overall http_client.deadline()
+WHISPER_TIMEOUT = float(os.getenv("WHISPER_TIMEOUT", "60"))
+
+# Long recordings are split into chunks (see audio_preprocessing) and this many
+# chunk uploads run at once, shared across all requests
+WHISPER_CHUNK_WORKERS = int(os.getenv("WHISPER_CHUNK_WORKERS", "4"))
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "30"))
+
+# OpenRouter circuit breaker: while open, extraction goes straight to the keyword fallback
+OPENROUTER_CB_WINDOW = float(os.getenv("OPENROUTER_CB_WINDOW", "60"))
+OPENROUTER_CB_MIN_CALLS = int(os.getenv("OPENROUTER_CB_MIN_CALLS", "5"))
+OPENROUTER_CB_ERROR_RATE = float(os.getenv("OPENROUTER_CB_ERROR_RATE", "0.5"))
+OPENROUTER_CB_SLOW_SECONDS = float(os.getenv("OPENROUTER_CB_SLOW_SECONDS", "10"))
+OPENROUTER_CB_SLOW_RATE = float(os.getenv("OPENROUTER_CB_SLOW_RATE", "0.8"))
+OPENROUTER_CB_OPEN_SECONDS = float(os.getenv("OPENROUTER_CB_OPEN_SECONDS", "30"))
+
+# LLM response caches keyed on normalized input (TTL 0 disables a cache)
+LLM_CACHE_EXTRACTION_TTL = float(os.getenv("LLM_CACHE_EXTRACTION_TTL", "3600"))
+LLM_CACHE_EXTRACTION_SIZE = int(os.getenv("LLM_CACHE_EXTRACTION_SIZE", "2000"))
+LLM_CACHE_CHAT_TTL = float(os.getenv("LLM_CACHE_CHAT_TTL", "86400"))
+LLM_CACHE_CHAT_SIZE = int(os.getenv("LLM_CACHE_CHAT_SIZE", "500"))
+
 
 class WhisperService:
     """Groq Whisper Service for English speech-to-text"""
@@ -26,19 +60,46 @@ class WhisperService:
     def __init__(self):
         self.api_key = GROQ_API_KEY
         self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
+        self.model = "whisper-large-v3"
+        self.cache = transcription_cache
+        self.preprocessor = audio_preprocessor
+        self._chunk_pool = ThreadPoolExecutor(max_workers=WHISPER_CHUNK_WORKERS,
+                                              thread_name_prefix="whisper-chunk")
     
-    def transcribe_audio(self, audio_file_path: str, language: str = "en") -> Dict[str, Any]:
+    def transcribe_audio(self, audio_file_path: str, language: str = "en",
+                         audio_hash: Optional[str] = None, preprocess: bool = True,
+                         use_cache: bool = True) -> Dict[str, Any]:
         """
         Transcribe audio file to text using Groq Whisper (FREE)
+
+        Transcripts are cached by audio content, so resubmitting the same
+        recording skips Whisper entirely. On a miss the recording is
+        downmixed, resampled and silence-trimmed before upload; long
+        recordings are split at pauses and the chunks transcribed in parallel.
         
         Args:
             audio_file_path: Path to audio file
             language: Language code (default: 'en' for English)
+            audio_hash: SHA-256 of the audio, if already computed during upload
+            preprocess: False if the file is already trimmed 16 kHz mono (upload as is)
+            use_cache: False to skip the transcription cache (one-off audio)
             
         Returns:
-            Dict with 'success', 'transcript', and optional 'error'
+            Dict with 'success', 'transcript', 'cached', and optional 'error'
         """
         try:
+            if use_cache:
+                audio_hash = audio_hash or hash_file(audio_file_path)
+                cached = self.cache.get(audio_hash, language, self.model)
+                if cached is not None:
+                    logger.info(f"Transcription cache hit: {audio_hash[:12]}")
+                    return {
+                        "success": True,
+                        "transcript": cached,
+                        "language": language,
+                        "cached": True
+                    }
+
             if not self.api_key:
                 logger.error("Groq API key not configured")
                 return {
@@ -47,39 +108,25 @@ class WhisperService:
                     "transcript": ""
                 }
             
-            with open(audio_file_path, 'rb') as audio_file:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}"
-                }
-                files = {
-                    "file": (os.path.basename(audio_file_path), audio_file),
-                    "model": (None, "whisper-large-v3"),
-                    "language": (None, language),
-                    "response_format": (None, "json")
-                }
-                
-                response = requests.post(
-                    self.api_url,
-                    headers=headers,
-                    files=files,
-                    timeout=60
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        "success": True,
-                        "transcript": result.get("text", ""),
-                        "language": language
-                    }
-                else:
-                    logger.error(f"Groq Whisper API error: {response.status_code} - {response.text}")
-                    return {
-                        "success": False,
-                        "error": f"API error: {response.status_code}",
-                        "transcript": ""
-                    }
-                    
+            if not preprocess:
+                result = self._upload(audio_file_path, language)
+            else:
+                # Upload trimmed 16 kHz mono audio instead of the raw recording
+                prepared = self.preprocessor.preprocess(audio_file_path, split=True)
+                try:
+                    if len(prepared["paths"]) == 1:
+                        result = self._upload(prepared["paths"][0], language)
+                    else:
+                        result = self._transcribe_chunks(prepared["paths"], language)
+                finally:
+                    if prepared["temporary"]:
+                        for path in prepared["paths"]:
+                            os.remove(path)
+
+            if use_cache and result["success"] and result["transcript"].strip():
+                self.cache.put(audio_hash, language, self.model, result["transcript"])
+            return result
+
         except Exception as e:
             logger.exception(f"Error transcribing audio: {e}")
             return {
@@ -88,6 +135,69 @@ class WhisperService:
                 "transcript": ""
             }
 
+    def _transcribe_chunks(self, paths: List[str], language: str) -> Dict[str, Any]:
+        """
+        Transcribe chunks concurrently and stitch them back together in order
+
+        Latency is roughly that of the slowest chunk rather than the sum. If
+        any chunk fails the whole transcription fails: a transcript with a
+        gap in the middle would be extracted as if it were complete.
+        """
+        started = time.perf_counter()
+        # Each task gets its own copy of the context so the caller's deadline applies
+        futures = [self._chunk_pool.submit(contextvars.copy_context().run, self._upload, path, language)
+                   for path in paths]
+        results = [future.result() for future in futures]
+        failed = next((r for r in results if not r["success"]), None)
+        if failed:
+            return failed
+
+        logger.info(f"Transcribed {len(paths)} chunks in {time.perf_counter() - started:.1f}s")
+        return {
+            "success": True,
+            "transcript": stitch_transcripts([r["transcript"] for r in results]),
+            "language": language,
+            "cached": False,
+            "chunks": len(paths)
+        }
+
+    def _upload(self, audio_file_path: str, language: str) -> Dict[str, Any]:
+        """Send one file to Groq Whisper"""
+        with open(audio_file_path, 'rb') as audio_file:
+            headers = {
+                "Authorization": f"Bearer {self.api_key}"
+            }
+            files = {
+                "file": (os.path.basename(audio_file_path), audio_file),
+                "model": (None, self.model),
+                "language": (None, language),
+                "response_format": (None, "json")
+            }
+            
+            response = http_client.post(
+                self.api_url,
+                headers=headers,
+                files=files,
+                timeout=WHISPER_TIMEOUT
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                transcript = result.get("text", "")
+                return {
+                    "success": True,
+                    "transcript": transcript,
+                    "language": language,
+                    "cached": False
+                }
+            else:
+                logger.error(f"Groq Whisper API error: {response.status_code} - {response.text}")
+                return {
+                    "success": False,
+                    "error": f"API error: {response.status_code}",
+                    "transcript": ""
+                }
+
 
 class OpenRouterService:
     """OpenRouter LLM Service for field extraction and chatbot"""
@@ -96,9 +206,46 @@ class OpenRouterService:
         self.api_key = OPENROUTER_API_KEY
         self.base_url = OPENROUTER_BASE_URL
         self.model = "meta-llama/llama-3.1-8b-instruct"  # Updated based on user feedback
+        self.breaker = CircuitBreaker(
+            "openrouter",
+            window_seconds=OPENROUTER_CB_WINDOW,
+            min_calls=OPENROUTER_CB_MIN_CALLS,
+            error_rate_threshold=OPENROUTER_CB_ERROR_RATE,
+            slow_call_seconds=OPENROUTER_CB_SLOW_SECONDS,
+            slow_call_rate_threshold=OPENROUTER_CB_SLOW_RATE,
+            open_seconds=OPENROUTER_CB_OPEN_SECONDS
+        )
+        self._rule_stats_lock = threading.Lock()
+        self._rule_stats = {"llm_skipped": 0, "llm_reduced": 0, "llm_full": 0}
+        self.caches = {
+            "extraction": TTLCache(ttl=LLM_CACHE_EXTRACTION_TTL, maxsize=LLM_CACHE_EXTRACTION_SIZE),
+            "chat": TTLCache(ttl=LLM_CACHE_CHAT_TTL, maxsize=LLM_CACHE_CHAT_SIZE)
+        }
+
+    def _cached(self, call_type: str, text: str, compute):
+        """
+        Serve a call from the per-type cache, coalescing identical concurrent calls
+
+        Only successful LLM answers are stored; fallbacks and errors are not.
+        """
+        cache = self.caches[call_type]
+        if cache.ttl <= 0:
+            return compute()
+        key = (self.model, normalize_text(text))
+        return cache.get_or_set(key, compute,
+                                should_cache=lambda r: r.get("success") and not r.get("fallback"))
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Per-call-type cache metrics"""
+        return {call_type: cache.stats() for call_type, cache in self.caches.items()}
     
     def _make_request(self, messages: list, max_tokens: int = 1024) -> Dict[str, Any]:
-        """Make request to OpenRouter API"""
+        """Make request to OpenRouter API (short-circuited while the breaker is open)"""
+        if not self.breaker.allow_request():
+            return {"success": False, "error": "OpenRouter circuit open", "circuit_open": True}
+
+        started = time.monotonic()
+        ok = False
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -114,16 +261,17 @@ class OpenRouterService:
                 "temperature": 0.3
             }
             
-            response = requests.post(
+            response = http_client.post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=payload,
-                timeout=30
+                timeout=OPENROUTER_TIMEOUT
             )
             
             if response.status_code == 200:
                 result = response.json()
                 content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                ok = True
                 return {"success": True, "content": content}
             else:
                 logger.error(f"OpenRouter API error: {response.status_code} - {response.text}")
@@ -132,35 +280,77 @@ class OpenRouterService:
         except Exception as e:
             logger.exception(f"OpenRouter request error: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            self.breaker.record(ok, time.monotonic() - started)
     
-    def extract_complaint_fields(self, transcript: str) -> Dict[str, Any]:
+    def extract_complaint_fields(self, transcript: str,
+                                 known_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Extract structured fields from complaint text (English)
+
+        Rule-based pre-extraction runs first. If it resolves every required
+        field the LLM is skipped; otherwise only the unresolved fields are
+        requested from the LLM and the rule-based values win on merge.
         
         Args:
             transcript: English text of the complaint
+            known_fields: Values already supplied by the caller (e.g. form name/phone)
             
         Returns:
             Dict with extracted fields: name, phone, location, department, description, urgency
         """
-        system_prompt = """You are an AI assistant that extracts structured information from complaints.
-Extract the following fields from the complaint and respond ONLY with valid JSON:
+        pre = pre_extract(transcript, known_fields)
 
-{
-    "name": "complainant name (or 'Unknown' if not mentioned)",
-    "phone": "phone number if mentioned (or null)",
-    "location": "location/address",
-    "department": "relevant government department (e.g., 'Road Department', 'Water Department', 'Electricity Department', 'Sanitation Department', 'Health Department', 'General Administration')",
-    "description": "brief description of the complaint",
-    "urgency": "High/Medium/Low based on severity"
-}
+        if not pre["unresolved"]:
+            self._count_rule_outcome("llm_skipped")
+            return {
+                "success": True,
+                "fields": complete_fields({**pre["hints"], **pre["fields"]}, transcript),
+                "rule_based": True
+            }
+
+        # Ask only for what the rules could not settle (description is always worth a summary)
+        requested = [f for f in self.EXTRACTION_FIELDS if f not in pre["resolved"] or f == "description"]
+        self._count_rule_outcome("llm_full" if len(requested) == len(self.EXTRACTION_FIELDS) else "llm_reduced")
+
+        cache_text = f"{','.join(requested)}|{transcript}"
+        result = self._cached("extraction", cache_text,
+                              lambda: self._extract_complaint_fields(transcript, requested, pre["hints"]))
+        # Hints only fill what the LLM left out; resolved rule fields always win
+        fields = {**pre["hints"], **result.get("fields", {})}
+        fields.update(pre["fields"])
+        return dict(result, fields=complete_fields(fields, transcript))
 
+    # Field -> instruction used to build the (possibly partial) extraction prompt
+    EXTRACTION_FIELDS = {
+        "name": "complainant name (or 'Unknown' if not mentioned)",
+        "phone": "phone number if mentioned (or null)",
+        "location": "location/address",
+        "department": "relevant government department (e.g., 'Road Department', 'Water Department', 'Electricity Department', 'Sanitation Department', 'Health Department', 'General Administration')",
+        "description": "brief description of the complaint",
+        "urgency": "High/Medium/Low based on severity"
+    }
+
+    def _extract_complaint_fields(self, transcript: str, requested: list,
+                                  hints: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        schema = ",\n".join(f'    "{f}": "{self.EXTRACTION_FIELDS[f]}"' for f in requested)
+        system_prompt = f"""You are an AI assistant that extracts structured information from complaints.
+Extract the following fields from the complaint and respond ONLY with valid JSON:
+
+{{
+{schema}
+}}
+"""
+        if "urgency" in requested:
+            system_prompt += """
 Urgency Guidelines:
 - High: Health/safety risks, no water/electricity for days, flooding, dangerous roads
 - Medium: Inconvenient but not dangerous, like potholes, garbage accumulation
 - Low: Minor issues, suggestions, general complaints
-
-Respond ONLY with the JSON object, no additional text."""
+"""
+            if hints and hints.get("urgency"):
+                system_prompt += f"Keyword hint: urgency may be {hints['urgency']}; judge it from the complaint itself.\n"
+        system_prompt += "\nRespond ONLY with the JSON object, no additional text."
 
         user_prompt = f"Extract fields from this complaint:\n\n{transcript}"
         
@@ -168,8 +358,9 @@ Respond ONLY with the JSON object, no additional text."""
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        result = self._make_request(messages)
+
+        # Roughly 60 tokens per field (descriptions are the longest) plus JSON overhead
+        result = self._make_request(messages, max_tokens=min(1024, 64 + 80 * len(requested)))
         
         if result["success"]:
             try:
@@ -185,37 +376,31 @@ Respond ONLY with the JSON object, no additional text."""
                 fields = json.loads(content)
                 return {
                     "success": True,
-                    "fields": {
-                        "name": fields.get("name", "Unknown"),
-                        "phone": fields.get("phone"),
-                        "location": fields.get("location", "Unknown"),
-                        "department": fields.get("department", "General Administration"),
-                        "description": fields.get("description", transcript),
-                        "urgency": fields.get("urgency", "Medium")
-                    }
+                    "fields": {f: fields[f] for f in requested if fields.get(f) is not None}
                 }
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse LLM response as JSON: {e}")
                 return self._fallback_extraction(transcript)
         else:
             return self._fallback_extraction(transcript)
+
+    def _count_rule_outcome(self, outcome: str):
+        with self._rule_stats_lock:
+            self._rule_stats[outcome] += 1
+
+    def rule_extraction_stats(self) -> Dict[str, Any]:
+        """How often rule-based pre-extraction avoided or shrank the LLM call"""
+        with self._rule_stats_lock:
+            stats = dict(self._rule_stats)
+        total = sum(stats.values())
+        stats["total"] = total
+        stats["llm_calls_avoided_fraction"] = round(stats["llm_skipped"] / total, 3) if total else 0.0
+        return stats
     
     def _fallback_extraction(self, transcript: str) -> Dict[str, Any]:
         """Fallback extraction using simple keyword matching"""
-        text_lower = transcript.lower()
-        
         # Determine department based on keywords
-        department = "General Administration"
-        if any(word in text_lower for word in ["road", "pothole", "street"]):
-            department = "Road Department"
-        elif any(word in text_lower for word in ["water", "tap", "pipe", "leak"]):
-            department = "Water Department"
-        elif any(word in text_lower for word in ["light", "electricity", "power", "pole"]):
-            department = "Electricity Department"
-        elif any(word in text_lower for word in ["garbage", "trash", "waste", "clean"]):
-            department = "Sanitation Department"
-        elif any(word in text_lower for word in ["hospital", "doctor", "health", "medicine"]):
-            department = "Health Department"
+        department = classify_department(transcript)["department"]
         
         return {
             "success": True,
@@ -240,6 +425,9 @@ Respond ONLY with the JSON object, no additional text."""
         Returns:
             Dict with 'success' and 'reply'
         """
+        return self._cached("chat", user_query, lambda: self._chat_about_schemes(user_query))
+
+    def _chat_about_schemes(self, user_query: str) -> Dict[str, Any]:
         system_prompt = """You are a helpful assistant that explains Indian Government Schemes in simple English.
 
 When a user asks about a scheme, provide the following details:
@@ -277,14 +465,16 @@ whisper_service = WhisperService()
 openrouter_service = OpenRouterService()
 
 
-def transcribe_hindi_audio(audio_file_path: str) -> Dict[str, Any]:
+def transcribe_hindi_audio(audio_file_path: str, audio_hash: Optional[str] = None,
+                           preprocess: bool = True, use_cache: bool = True) -> Dict[str, Any]:
     """Convenience function for transcribing Hindi audio"""
-    return whisper_service.transcribe_audio(audio_file_path, language="hi")
+    return whisper_service.transcribe_audio(audio_file_path, language="hi", audio_hash=audio_hash,
+                                            preprocess=preprocess, use_cache=use_cache)
 
 
-def extract_fields_from_complaint(hindi_text: str) -> Dict[str, Any]:
+def extract_fields_from_complaint(hindi_text: str, known_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Convenience function for extracting fields from Hindi complaint"""
-    return openrouter_service.extract_complaint_fields(hindi_text)
+    return openrouter_service.extract_complaint_fields(hindi_text, known_fields)
 
 
 def get_scheme_info(query: str) -> Dict[str, Any]:
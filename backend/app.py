@@ -52,6 +52,19 @@ app.register_blueprint(admin_routes)
 app.register_blueprint(voice_routes)
 app.register_blueprint(pickup_routes)                     
 
+# ---------------- Fallback Sync Worker ----------------
+# Reconnects to MongoDB after an outage and drains fallback complaints back into it
+if os.environ.get("FALLBACK_SYNC_ENABLED", "true").lower() == "true":
+    from sync_worker import start_sync_worker
+    start_sync_worker()
+
+# ---------------- Voice Job Workers ----------------
+# Bounded pool that processes async voice complaints (POST /api/complaint/voice?async=true)
+from voice_jobs import VOICE_JOBS_ENABLED
+if VOICE_JOBS_ENABLED:
+    from routes.voice_routes import start_voice_job_workers
+    start_voice_job_workers()
+
 # ---------------- HuggingFace Model (Optional Fallback) ----------------
 HF_MODEL_NAME = os.environ.get("HF_MODEL_NAME", "bigscience/bloom-560m")
 
@@ -60,6 +73,9 @@ GEN_TEMPERATURE = float(os.environ.get("GEN_TEMPERATURE", "0.8"))
 GEN_TOP_P = float(os.environ.get("GEN_TOP_P", "0.95"))
 GEN_DO_SAMPLE = os.environ.get("GEN_DO_SAMPLE", "true").lower() == "true"
 
+# Overall time budget (including retries) for the OpenRouter scheme chat call
+CHAT_DEADLINE_SECONDS = float(os.environ.get("CHAT_DEADLINE_SECONDS", "45"))
+
 chatbot = None
 if HF_AVAILABLE:
     try:
@@ -132,7 +148,9 @@ def chat():
         # Step 2: OpenRouter LLM fallback
         try:
             from ai_services import get_scheme_info
-            result = get_scheme_info(prompt)
+            from http_client import deadline
+            with deadline(CHAT_DEADLINE_SECONDS):
+                result = get_scheme_info(prompt)
             if result.get("success"):
                 return jsonify({"reply": result.get("reply", "No information found.")}), 200
             else:
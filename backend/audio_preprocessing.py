@@ -0,0 +1,366 @@
+"""
+Audio Preprocessing for JantaVoice
+Decode, downmix to mono, resample to 16 kHz, trim silence and split long
+recordings before sending them to Whisper
+"""
+
+import os
+import time
+import wave
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
+
+from http_client import remaining_time
+from utils.text_normalize import normalize_text
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+AUDIO_PREPROCESS_ENABLED = os.getenv("AUDIO_PREPROCESS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Whisper resamples to 16 kHz mono internally, so anything more is wasted upload
+AUDIO_TARGET_SAMPLE_RATE = int(os.getenv("AUDIO_TARGET_SAMPLE_RATE", "16000"))
+# Energy VAD: a frame is speech if louder than both the absolute floor (dBFS)
+# and the recording's own noise floor plus the margin
+AUDIO_VAD_FRAME_MS = int(os.getenv("AUDIO_VAD_FRAME_MS", "30"))
+AUDIO_VAD_THRESHOLD_DB = float(os.getenv("AUDIO_VAD_THRESHOLD_DB", "-45"))
+AUDIO_VAD_MARGIN_DB = float(os.getenv("AUDIO_VAD_MARGIN_DB", "12"))
+# Silence kept around speech, and the longest pause kept inside it
+AUDIO_VAD_PADDING_MS = int(os.getenv("AUDIO_VAD_PADDING_MS", "200"))
+AUDIO_MAX_SILENCE_MS = int(os.getenv("AUDIO_MAX_SILENCE_MS", "700"))
+# ogg (Opus) or flac need ffmpeg; wav is always available
+AUDIO_OUTPUT_FORMAT = os.getenv("AUDIO_OUTPUT_FORMAT", "ogg").lower()
+AUDIO_OPUS_BITRATE = os.getenv("AUDIO_OPUS_BITRATE", "24k")
+# Long-audio mode: speech longer than the threshold is split at pauses into
+# chunks of about AUDIO_CHUNK_SECONDS that overlap by AUDIO_CHUNK_OVERLAP_SECONDS
+AUDIO_CHUNK_THRESHOLD_SECONDS = float(os.getenv("AUDIO_CHUNK_THRESHOLD_SECONDS", "45"))
+AUDIO_CHUNK_SECONDS = float(os.getenv("AUDIO_CHUNK_SECONDS", "20"))
+AUDIO_CHUNK_OVERLAP_SECONDS = float(os.getenv("AUDIO_CHUNK_OVERLAP_SECONDS", "1.0"))
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFMPEG_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT", "30"))
+
+_ENCODERS = {
+    "ogg": ["-c:a", "libopus", "-b:a", AUDIO_OPUS_BITRATE, "-f", "ogg"],
+    "flac": ["-c:a", "flac", "-f", "flac"]
+}
+
+
+class AudioDecodeError(Exception):
+    """The recording could not be decoded"""
+    pass
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def _ffmpeg(args, data: Optional[bytes] = None) -> bytes:
+    """Run ffmpeg within the current deadline and return its stdout"""
+    timeout = FFMPEG_TIMEOUT
+    left = remaining_time()
+    if left is not None:
+        timeout = max(1.0, min(timeout, left))
+    result = subprocess.run([FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error", *args],
+                            input=data, capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        raise AudioDecodeError(result.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return result.stdout
+
+
+def downmix(samples: "np.ndarray") -> "np.ndarray":
+    """(frames, channels) -> mono"""
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(samples: "np.ndarray", source_rate: int, target_rate: int) -> "np.ndarray":
+    """
+    Resample mono audio
+
+    Integer ratios (48k/16k) average each block of samples, which doubles as
+    a crude low-pass filter; other ratios use linear interpolation.
+    """
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    if source_rate % target_rate == 0:
+        factor = source_rate // target_rate
+        usable = len(samples) - len(samples) % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1)
+    duration = len(samples) / source_rate
+    positions = np.arange(int(duration * target_rate)) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples)
+
+
+def _read_wav(path: str) -> Tuple["np.ndarray", int]:
+    """PCM WAV -> (float32 samples in [-1, 1], shape (frames, channels), sample rate)"""
+    with wave.open(path, "rb") as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        ints = (data[:, 0].astype(np.int32) | (data[:, 1].astype(np.int32) << 8)
+                | (data[:, 2].astype(np.int8).astype(np.int32) << 16))
+        samples = ints.astype(np.float32) / 8388608
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width}")
+    return samples.reshape(-1, channels), rate
+
+
+def decode_audio(path: str, rate: int = AUDIO_TARGET_SAMPLE_RATE) -> "np.ndarray":
+    """
+    Decode any recording to mono float32 samples at `rate`
+
+    PCM WAV is decoded in-process; everything else (webm/ogg/mp3/m4a, which
+    is what browsers actually record) goes through ffmpeg.
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        try:
+            samples, source_rate = _read_wav(path)
+            return resample(downmix(samples), source_rate, rate).astype(np.float32)
+        except wave.Error:
+            pass  # Non-PCM WAV (e.g. IEEE float): let ffmpeg handle it
+    if not ffmpeg_available():
+        raise AudioDecodeError(f"ffmpeg not found ({FFMPEG_BINARY}), cannot decode {os.path.basename(path)}")
+    raw = _ffmpeg(["-i", path, "-f", "s16le", "-ac", "1", "-ar", str(rate), "-"])
+    return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+
+
+def speech_frames(samples: "np.ndarray", rate: int) -> "np.ndarray":
+    """Boolean speech mask with one entry per AUDIO_VAD_FRAME_MS frame"""
+    frame = max(1, rate * AUDIO_VAD_FRAME_MS // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    frames = samples[:count * frame].reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    noise_floor = np.percentile(energy_db, 10)
+    voiced = energy_db > max(AUDIO_VAD_THRESHOLD_DB, noise_floor + AUDIO_VAD_MARGIN_DB)
+    # Pad speech on both sides so word onsets and tails are not clipped
+    padding = AUDIO_VAD_PADDING_MS // AUDIO_VAD_FRAME_MS
+    if padding and voiced.any():
+        voiced = np.convolve(voiced, np.ones(2 * padding + 1), mode="same") > 0
+    return voiced
+
+
+def trim_silence(samples: "np.ndarray", rate: int) -> Optional["np.ndarray"]:
+    """
+    Drop leading/trailing silence and shorten long pauses
+
+    Returns:
+        Trimmed samples, or None if no speech was detected
+    """
+    voiced = speech_frames(samples, rate)
+    if not voiced.any():
+        return None
+    frame = max(1, rate * AUDIO_VAD_FRAME_MS // 1000)
+    index = np.arange(len(voiced))
+    # Frames since the last speech frame: keep only the start of each pause
+    last_voiced = np.maximum.accumulate(np.where(voiced, index, -1))
+    keep = voiced | (index - last_voiced <= AUDIO_MAX_SILENCE_MS // AUDIO_VAD_FRAME_MS)
+    speech = np.flatnonzero(voiced)
+    keep[:speech[0]] = False
+    keep[speech[-1] + 1:] = False
+    return samples[:len(voiced) * frame].reshape(-1, frame)[keep].ravel()
+
+
+def split_at_silence(samples: "np.ndarray", rate: int, chunk_seconds: float = AUDIO_CHUNK_SECONDS,
+                     overlap_seconds: float = AUDIO_CHUNK_OVERLAP_SECONDS) -> List[Tuple[int, int]]:
+    """
+    (start, end) sample ranges of at most ~chunk_seconds each
+
+    Each cut is placed at the quietest frame in the last third of its window,
+    so chunks end in a pause rather than mid-word. Every chunk after the first
+    also starts overlap_seconds before its cut, in case the pause was too short.
+    """
+    total = len(samples)
+    target = int(chunk_seconds * rate)
+    frame = max(1, rate * AUDIO_VAD_FRAME_MS // 1000)
+    if total <= target or target < 3 * frame:
+        return [(0, total)]
+    count = total // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    energy = np.mean(frames * frames, axis=1)
+
+    cuts = [0]
+    while total - cuts[-1] > target:
+        low = (cuts[-1] + target * 2 // 3) // frame
+        high = min(count, (cuts[-1] + target) // frame)
+        cuts.append((low + int(np.argmin(energy[low:high]))) * frame + frame // 2)
+    cuts.append(total)
+    overlap = int(overlap_seconds * rate)
+    return [(max(0, start - overlap) if i else start, end) for i, (start, end) in enumerate(zip(cuts, cuts[1:]))]
+
+
+def stitch_transcripts(parts: List[str], max_overlap_words: int = 8, min_overlap_words: int = 2,
+                       min_overlap_chars: int = 6) -> str:
+    """
+    Join chunk transcripts in order, dropping words repeated across a boundary
+
+    The overlapping audio is usually transcribed twice, so the longest run of
+    words that ends one chunk and starts the next is kept only once. Runs
+    shorter than min_overlap_words words or min_overlap_chars letters are
+    kept: a single matching word ("... पानी | पानी नहीं आ रहा") is as likely
+    to be said twice as to be a duplicate.
+    """
+    words: List[str] = []
+    for part in parts:
+        new = part.split()
+        if words and new:
+            tail = [normalize_text(w) for w in words[-max_overlap_words:]]
+            head = [normalize_text(w) for w in new[:max_overlap_words]]
+            for n in range(min(len(tail), len(head)), max(min_overlap_words, 1) - 1, -1):
+                if tail[-n:] == head[:n] and len("".join(head[:n])) >= min_overlap_chars:
+                    new = new[n:]
+                    break
+        words.extend(new)
+    return " ".join(words)
+
+
+def encode_audio(samples: "np.ndarray", rate: int, fmt: str = AUDIO_OUTPUT_FORMAT) -> Tuple[str, str]:
+    """
+    Write mono samples to a temporary file
+
+    Returns:
+        (path, format actually used); falls back to 16-bit WAV without ffmpeg
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    if fmt not in _ENCODERS or not ffmpeg_available():
+        fmt = "wav"
+    fd, path = tempfile.mkstemp(prefix="jv_audio_", suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        if fmt == "wav":
+            with wave.open(path, "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(rate)
+                wav.writeframes(pcm.tobytes())
+        else:
+            encoded = _ffmpeg(["-f", "s16le", "-ar", str(rate), "-ac", "1", "-i", "-",
+                               *_ENCODERS[fmt], "-"], data=pcm.tobytes())
+            with open(path, "wb") as f:
+                f.write(encoded)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, fmt
+
+
+class AudioPreprocessor:
+    """
+    Shrinks recordings before transcription
+
+    Browsers record stereo 48 kHz with long silences at both ends; Whisper
+    only needs 16 kHz mono speech. The recording is decoded, downmixed,
+    resampled and trimmed with an energy VAD, then re-encoded compactly.
+    Any failure falls back to uploading the original file.
+    """
+
+    def __init__(self, enabled: bool = AUDIO_PREPROCESS_ENABLED, rate: int = AUDIO_TARGET_SAMPLE_RATE,
+                 output_format: str = AUDIO_OUTPUT_FORMAT):
+        self.enabled = enabled and np is not None
+        self.rate = rate
+        self.output_format = output_format
+        self._lock = threading.Lock()
+        self._stats = {"processed": 0, "chunked": 0, "skipped": 0, "failed": 0,
+                       "bytes_in": 0, "bytes_out": 0, "seconds_in": 0.0, "seconds_out": 0.0}
+        if enabled and np is None:
+            logger.warning("numpy not installed, audio preprocessing disabled")
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def preprocess(self, path: str, split: bool = False) -> Dict[str, Any]:
+        """
+        Prepare a recording for upload
+
+        Args:
+            split: Split speech longer than AUDIO_CHUNK_THRESHOLD_SECONDS into
+                overlapping chunks (see split_at_silence)
+
+        Returns:
+            Dict with 'paths' (files to upload, in order), 'temporary' (caller
+            deletes them when True), byte/second counts before and after, and
+            'reason' when the original is used
+        """
+        original_bytes = os.path.getsize(path)
+        result = {"paths": [path], "temporary": False, "original_bytes": original_bytes,
+                  "processed_bytes": original_bytes}
+        if not self.enabled:
+            return dict(result, reason="disabled")
+
+        started = time.perf_counter()
+        out_paths = []
+        try:
+            samples = decode_audio(path, self.rate)
+            trimmed = trim_silence(samples, self.rate)
+            if trimmed is None:
+                self._count(skipped=1)
+                return dict(result, reason="no speech detected")
+            ranges = [(0, len(trimmed))]
+            if split and len(trimmed) > AUDIO_CHUNK_THRESHOLD_SECONDS * self.rate:
+                ranges = split_at_silence(trimmed, self.rate)
+            for start, end in ranges:
+                out_path, fmt = encode_audio(trimmed[start:end], self.rate, self.output_format)
+                out_paths.append(out_path)
+        except (AudioDecodeError, OSError, ValueError, EOFError, wave.Error, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Audio preprocessing failed for {os.path.basename(path)}, using original: {e}")
+            for out_path in out_paths:
+                os.remove(out_path)
+            self._count(failed=1)
+            return dict(result, reason=str(e))
+
+        processed_bytes = sum(os.path.getsize(p) for p in out_paths)
+        seconds_in = len(samples) / self.rate
+        seconds_out = len(trimmed) / self.rate
+        if len(out_paths) == 1 and processed_bytes >= original_bytes and seconds_out >= seconds_in:
+            os.remove(out_paths[0])
+            self._count(skipped=1)
+            return dict(result, reason="no reduction")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._count(processed=1, chunked=int(len(out_paths) > 1), bytes_in=original_bytes,
+                    bytes_out=processed_bytes, seconds_in=seconds_in, seconds_out=seconds_out)
+        logger.info(f"Audio preprocessed {os.path.basename(path)}: "
+                    f"{original_bytes} -> {processed_bytes} bytes ({original_bytes - processed_bytes} saved), "
+                    f"{seconds_in:.1f} -> {seconds_out:.1f} s ({seconds_in - seconds_out:.1f} saved), "
+                    f"{fmt}, {len(out_paths)} chunk(s), {elapsed_ms:.0f} ms")
+        return dict(result, paths=out_paths, temporary=True, format=fmt, processed_bytes=processed_bytes,
+                    original_seconds=round(seconds_in, 2), processed_seconds=round(seconds_out, 2),
+                    elapsed_ms=round(elapsed_ms, 1))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+        stats["seconds_saved"] = round(stats["seconds_in"] - stats["seconds_out"], 1)
+        stats["seconds_in"] = round(stats["seconds_in"], 1)
+        stats["seconds_out"] = round(stats["seconds_out"], 1)
+        stats["enabled"] = self.enabled
+        stats["ffmpeg"] = ffmpeg_available()
+        return stats
+
+
+# Singleton instance
+audio_preprocessor = AudioPreprocessor()
+
+
+def preprocess_audio(path: str, split: bool = False) -> Dict[str, Any]:
+    """Convenience function for preparing a recording for Whisper"""
+    return audio_preprocessor.preprocess(path, split)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Offline check of the audio preprocessing stage
+
+Runs every recording in the given directories (default: uploads/ and
+audios/) through decode -> downmix -> 16 kHz resample -> VAD trim ->
+re-encode, without calling Whisper, and reports bytes and seconds saved.
+
+    python benchmarks/bench_audio_preprocessing.py
+    python benchmarks/bench_audio_preprocessing.py --format wav --keep /tmp/prepared
+
+Browser recordings (webm/ogg, even when named .wav) need ffmpeg on PATH
+or FFMPEG_BINARY; PCM WAV files are decoded with numpy alone.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_preprocessing import AudioPreprocessor, ffmpeg_available, np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".webm", ".ogg", ".m4a", ".flac"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dirs", nargs="*", default=[os.path.join(BACKEND_DIR, "uploads"),
+                                                     os.path.join(BACKEND_DIR, "..", "audios")])
+    parser.add_argument("--format", default="ogg", choices=["ogg", "flac", "wav"])
+    parser.add_argument("--keep", help="copy the prepared files into this directory")
+    parser.add_argument("--split", action="store_true", help="split long recordings as long-audio mode does")
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit("numpy is required")
+    print(f"ffmpeg: {'available' if ffmpeg_available() else 'not found (PCM WAV only)'}")
+
+    preprocessor = AudioPreprocessor(enabled=True, output_format=args.format)
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+
+    for directory in args.dirs:
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if os.path.splitext(name)[1].lower() not in AUDIO_EXTENSIONS:
+                continue
+            result = preprocessor.preprocess(os.path.join(directory, name), split=args.split)
+            if not result["temporary"]:
+                print(f"  {name:<40} unchanged: {result['reason']}")
+                continue
+            print(f"  {name:<40} {result['original_bytes']:>9} -> {result['processed_bytes']:>9} bytes   "
+                  f"{result['original_seconds']:6.1f} -> {result['processed_seconds']:6.1f} s   "
+                  f"{result['elapsed_ms']:7.1f} ms   {len(result['paths'])} chunk(s)")
+            for i, path in enumerate(result["paths"]):
+                if args.keep:
+                    base = os.path.splitext(name)[0] + (f".{i}" if len(result["paths"]) > 1 else "")
+                    shutil.move(path, os.path.join(args.keep, f"{base}.{result['format']}"))
+                else:
+                    os.remove(path)
+
+    stats = preprocessor.stats()
+    print(f"Processed {stats['processed']} (skipped {stats['skipped']}, failed {stats['failed']}): "
+          f"{stats['bytes_saved']} bytes and {stats['seconds_saved']} s saved")
+
+
+if __name__ == "__main__":
+    main()
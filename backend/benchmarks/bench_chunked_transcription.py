@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for long-audio (chunked) transcription
+
+Synthesizes a long recording (speech-like bursts separated by pauses),
+then transcribes it through WhisperService against a local stub of the
+Groq transcription API whose response time grows with the audio length:
+- as one upload (long-audio mode off)
+- split at pauses into overlapping chunks transcribed in parallel
+
+    python benchmarks/bench_chunked_transcription.py --minutes 3 --rtf 0.1 --workers 8
+
+--rtf is the stub's processing time per second of audio, --base its fixed
+per-request overhead.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_services
+import audio_preprocessing
+from audio_preprocessing import AudioPreprocessor
+from transcription_cache import TranscriptionCache
+
+RATE = 16000
+
+
+class StubWhisper(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    rtf = 0.1
+    base = 0.3
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        # WAV uploads: 16 kHz * 2 bytes per second of audio
+        seconds = len(body) / (RATE * 2)
+        time.sleep(self.base + self.rtf * seconds)
+        # Roughly two words per second of audio
+        text = " ".join(f"w{i}" for i in range(int(seconds * 2)))
+        payload = json.dumps({"text": text}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def synthesize(path, minutes):
+    """Alternate 2-6 s tone bursts with 0.3-1.2 s pauses"""
+    rng = np.random.default_rng(7)
+    parts = []
+    total = 0.0
+    while total < minutes * 60:
+        speech = rng.uniform(2, 6)
+        pause = rng.uniform(0.3, 1.2)
+        t = np.arange(int(speech * RATE)) / RATE
+        parts.append(0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) * (1 + np.sin(2 * np.pi * 4 * t)) / 2)
+        parts.append(0.002 * rng.standard_normal(int(pause * RATE)))
+        total += speech + pause
+    samples = np.concatenate(parts)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return len(samples) / RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=3)
+    parser.add_argument("--rtf", type=float, default=0.1)
+    parser.add_argument("--base", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, default=ai_services.WHISPER_CHUNK_WORKERS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    StubWhisper.rtf, StubWhisper.base = args.rtf, args.base
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubWhisper)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        audio_path = os.path.join(scratch, "long.wav")
+        duration = synthesize(audio_path, args.minutes)
+        print(f"Recording: {duration:.0f} s, stub: {args.base}s + {args.rtf}s per audio second, "
+              f"{args.workers} chunk workers")
+
+        ai_services.WHISPER_CHUNK_WORKERS = args.workers
+        service = ai_services.WhisperService()
+        service.api_key = "bench"
+        service.api_url = f"http://127.0.0.1:{server.server_port}/"
+        service.preprocessor = AudioPreprocessor(enabled=True, output_format="wav")
+
+        for label, threshold in (("single", float("inf")), ("chunked", audio_preprocessing.AUDIO_CHUNK_THRESHOLD_SECONDS)):
+            audio_preprocessing.AUDIO_CHUNK_THRESHOLD_SECONDS = threshold
+            # Fresh cache each run so nothing is served from cache
+            service.cache = TranscriptionCache(os.path.join(scratch, f"{label}.db"))
+            started = time.perf_counter()
+            result = service.transcribe_audio(audio_path, language="hi")
+            elapsed = time.perf_counter() - started
+            words = len(result.get("transcript", "").split())
+            print(f"    {label:<8} {elapsed:6.2f} s   chunks {result.get('chunks', 1):>2}   words {words}"
+                  + ("" if result["success"] else f"   error: {result.get('error')}"))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Corpus benchmark for the classifier rule engine (zero-LLM fast path)
+
+Runs a corpus of page visits through ClassifierService against a stub
+Groq endpoint, with the rule engine off and on (verdict cache disabled in
+both, to isolate the rules), and reports the fraction of requests
+resolved locally, which rules fired, and the latency saved.
+
+The default corpus is a weighted mix of the sites in the classifier
+prompt; pass --corpus with one URL per line (optionally followed by a
+tab and the page type) to replay real browsing history instead.
+
+    python benchmarks/bench_classifier_rules.py --visits 1000 --latency 0.05
+    python benchmarks/bench_classifier_rules.py --corpus history.tsv
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ws_classifier import StubGroq
+
+# (url template, page_type, weight)
+DEFAULT_CORPUS = [
+    ("https://www.google.com/search?q={q}", "search", 14),
+    ("https://www.bing.com/search?q={q}", "search", 1),
+    ("https://duckduckgo.com/?q={q}", "search", 2),
+    ("https://github.com/org{n}/repo{n}/pull/{n}", "other", 8),
+    ("https://stackoverflow.com/questions/{n}/{q}", "article", 8),
+    ("https://developer.mozilla.org/en-US/docs/Web/{q}", "article", 3),
+    ("https://docs.python.org/3/library/{q}.html", "article", 4),
+    ("https://mail.google.com/mail/u/0/#inbox/{n}", "other", 5),
+    ("https://calendar.google.com/calendar/r/week", "other", 2),
+    ("https://docs.google.com/document/d/{n}/edit", "other", 4),
+    ("https://www.notion.so/workspace/{q}-{n}", "other", 3),
+    ("https://www.coursera.org/learn/{q}", "video", 1),
+    ("https://www.youtube.com/watch?v={n}&list=RD{n}", "video", 4),
+    ("https://www.youtube.com/watch?v={n}", "video", 12),
+    ("https://www.youtube.com/", "feed", 6),
+    ("https://x.com/home", "feed", 4),
+    ("https://www.reddit.com/r/{q}/comments/{n}", "social", 5),
+    ("https://www.instagram.com/p/{n}/", "social", 2),
+    ("https://news.google.com/topics/{n}", "feed", 1),
+    ("https://www.netflix.com/watch/{n}", "video", 2),
+    ("https://en.wikipedia.org/wiki/{q}", "article", 4),
+    ("https://medium.com/@author/{q}-{n}", "article", 3),
+    ("https://www.amazon.in/dp/{n}", "other", 2),
+]
+WORDS = ["asyncio", "flexbox", "pandas", "recursion", "calculus", "funny", "gaming", "json", "regex", "music"]
+
+
+def load_corpus(path):
+    visits = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            url, _, page_type = line.strip().partition("\t")
+            if url:
+                visits.append((url, page_type or "unknown"))
+    return visits
+
+
+def generate_corpus(visits, seed=5):
+    rng = random.Random(seed)
+    weights = [weight for _, _, weight in DEFAULT_CORPUS]
+    corpus = []
+    for _ in range(visits):
+        template, page_type, _ = rng.choices(DEFAULT_CORPUS, weights)[0]
+        corpus.append((template.format(q=rng.choice(WORDS), n=rng.randrange(10 ** 6)), page_type))
+    return corpus
+
+
+async def replay(classifier, corpus):
+    from models import ExtensionState
+    latencies = []
+    for i, (url, page_type) in enumerate(corpus):
+        state = ExtensionState(request_id=str(i), url=url, page_type=page_type, user_task="Study Python")
+        started = time.perf_counter()
+        await classifier.aprocess_state(state, "bench")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="file with one URL (and optional tab + page type) per line")
+    parser.add_argument("--visits", type=int, default=1000, help="size of the generated corpus")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub LLM response time in seconds")
+    args = parser.parse_args()
+
+    StubGroq.latency = args.latency
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), StubGroq)
+    stub.daemon_threads = True
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["GROQ_API_KEY"] = "bench"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+
+    import services
+    from classifier_rules import ClassifierRules
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(args.visits)
+    print(f"{len(corpus)} visits, stub LLM {args.latency * 1000:.0f} ms")
+
+    # Rule evaluation alone
+    rules = ClassifierRules()
+    started = time.perf_counter()
+    for url, _ in corpus:
+        rules.evaluate(url)
+    per_url = (time.perf_counter() - started) / len(corpus)
+    stats = rules.stats()
+    print(f"    rules resolve {stats['matched']}/{len(corpus)} ({stats['match_rate']:.1%}) locally "
+          f"in {per_url * 1e6:.1f} us each")
+    for rule, count in sorted(stats["by_rule"].items(), key=lambda item: -item[1]):
+        print(f"        {rule:<15} {count:>6}")
+
+    totals = {}
+    for label, enabled in (("rules off", False), ("rules on", True)):
+        classifier = services.ClassifierService()
+        classifier.verdicts.ttl = 0
+        classifier.rules = ClassifierRules() if enabled else None
+        latencies = asyncio.run(replay(classifier, corpus))
+        totals[label] = sum(latencies)
+        metrics = classifier.metrics()["classifier"]
+        print(f"    {label:<9} LLM calls {metrics['llm_calls']:>6}   mean {statistics.mean(latencies) * 1000:7.2f} ms   "
+              f"p50 {statistics.median(latencies) * 1000:7.2f} ms   total {totals[label]:6.2f} s")
+    saved = totals["rules off"] - totals["rules on"]
+    print(f"    latency saved: {saved:.2f} s over the corpus ({saved / len(corpus) * 1000:.1f} ms per visit)")
+
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for department classification
+
+Loads the complaints recorded by the voice bot (complaints.json files, one
+JSON object per line), replicates them to N texts and times the previous
+per-module keyword scans against the single-pass Aho-Corasick classifier.
+"first-hit" is the old if/elif chain; "scan-all" checks every department,
+which is what scored multi-label output would need with substring scans.
+Also reports how often the old chain and the classifier agree.
+
+    python benchmarks/bench_department_classifier.py --sizes 1000 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from department_classifier import department_classifier, DEFAULT_DEPARTMENT
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_FILES = [os.path.join(BACKEND_DIR, "complaints.json"),
+                os.path.join(BACKEND_DIR, "voice_bot", "complaints.json")]
+
+# The keyword lists the four modules used to scan, one department at a time
+LEGACY_RULES = [
+    ("Road Department", ["सड़क", "गड्ढा", "रोड", "पुल", "फुटपाथ", "ट्रैफिक", "road", "street", "pothole"]),
+    ("Water Department", ["पानी", "नल", "पाइप", "टंकी", "बोरवेल", "water", "tap", "pipe", "leak"]),
+    ("Electricity Department", ["बिजली", "लाइट", "करंट", "ट्रांसफार्मर", "वोल्टेज",
+                                "electricity", "power", "light", "pole"]),
+    ("Sanitation Department", ["कचरा", "कूड़ा", "गंदगी", "सफाई", "नाली", "garbage", "waste", "clean", "drain"]),
+    ("Health Department", ["अस्पताल", "डॉक्टर", "दवा", "इलाज", "स्वास्थ्य", "बीमारी",
+                           "doctor", "health", "medical"]),
+    ("Police", ["चोरी", "लूट", "मारपीट", "धोखाधड़ी", "अपराध", "गुंडागर्दी", "हत्या", "रैगिंग"]),
+    ("Education Department", ["स्कूल", "शिक्षक", "पढ़ाई", "कॉलेज", "यूनिवर्सिटी", "परीक्षा"]),
+    ("Ration Department", ["राशन", "अनाज", "चावल", "गेहूं", "चीनी", "केरोसिन"]),
+    ("Railway", ["ट्रेन", "रेल", "स्टेशन", "प्लेटफॉर्म", "टिकट", "ट्रैक"]),
+    ("Bank", ["बैंक", "एटीम", "पैसा", "खाता", "लेनदेन", "ब्याज"]),
+]
+
+
+def legacy_classify(text):
+    """First department whose any() scan hits, as the old if/elif chains did"""
+    text = text.lower()
+    for department, keywords in LEGACY_RULES:
+        if any(keyword in text for keyword in keywords):
+            return department
+    return DEFAULT_DEPARTMENT
+
+
+def legacy_scan_all(text):
+    """Every department the keyword lists hit (what scored output needs)"""
+    text = text.lower()
+    return [department for department, keywords in LEGACY_RULES
+            if any(keyword in text for keyword in keywords)] or [DEFAULT_DEPARTMENT]
+
+
+def load_corpus():
+    texts = []
+    for path in CORPUS_FILES:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                text = " ".join(str(record.get(k) or "") for k in ("शिकायत", "विवरण")).strip()
+                if text:
+                    texts.append(text)
+    return texts
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if not corpus:
+        sys.exit("No complaints found in " + ", ".join(CORPUS_FILES))
+    print(f"Corpus: {len(corpus)} recorded complaints")
+
+    for size in args.sizes:
+        texts = (corpus * (size // len(corpus) + 1))[:size]
+        legacy, legacy_time = timed(lambda: [legacy_classify(t) for t in texts])
+        _, scan_time = timed(lambda: [legacy_scan_all(t) for t in texts])
+        results, new_time = timed(lambda: department_classifier.classify_batch(texts))
+        agree = sum(1 for old, new in zip(legacy, results) if old == new["department"])
+        multi = sum(1 for r in results if len(r["labels"]) > 1)
+
+        print(f"[{size} texts]")
+        print(f"    first-hit  {size / legacy_time:12.0f} texts/s")
+        print(f"    scan-all   {size / scan_time:12.0f} texts/s")
+        print(f"    automaton  {size / new_time:12.0f} texts/s")
+        print(f"    agreement  {agree / size:12.1%}   multi-label {multi / size:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Stress benchmark for multi-process fallback storage
+
+Spawns N worker processes that each save M complaints into the same fallback
+files, then reloads the storage and checks that no write was lost.
+
+    python benchmarks/bench_fallback_multiprocess.py --processes 8 --writes 500 --mode journal
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallback_storage import FallbackStorage, JournalFallbackStorage, SQLiteFallbackStorage
+
+
+def make_storage(mode, workdir):
+    snapshot = os.path.join(workdir, "fallback_complaints.json")
+    if mode == "journal":
+        # Small compaction threshold so compaction races are exercised too
+        return JournalFallbackStorage(snapshot, os.path.join(workdir, "fallback_complaints.journal"),
+                                      compact_every=250)
+    if mode == "sqlite":
+        return SQLiteFallbackStorage(os.path.join(workdir, "fallback_complaints.db"), import_from=None)
+    return FallbackStorage(snapshot)
+
+
+def writer(mode, workdir, worker_id, writes, start_event):
+    storage = make_storage(mode, workdir)
+    start_event.wait()
+    for i in range(writes):
+        ok = storage.save_complaint({
+            "id": f"{worker_id}-{i}",
+            "description": "Stress test complaint",
+            "status": "Pending",
+        })
+        if not ok:
+            raise RuntimeError(f"save_complaint failed for {worker_id}-{i}")
+        # Mix in updates so journal update records interleave with inserts
+        if i % 10 == 0:
+            storage.update_complaint_status(f"{worker_id}-{i}", "Processing")
+
+
+def run(mode, processes, writes):
+    with tempfile.TemporaryDirectory() as workdir:
+        make_storage(mode, workdir)
+        start_event = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=writer, args=(mode, workdir, w, writes, start_event))
+                   for w in range(processes)]
+        for p in workers:
+            p.start()
+
+        started = time.perf_counter()
+        start_event.set()
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+        failed_workers = [p.exitcode for p in workers if p.exitcode != 0]
+        storage = make_storage(mode, workdir)
+        complaints = storage.get_all_complaints()
+        ids = {c["id"] for c in complaints}
+        expected = {f"{w}-{i}" for w in range(processes) for i in range(writes)}
+        missing = expected - ids
+        updated = sum(1 for c in complaints if c.get("status") == "Processing")
+
+        total = processes * writes
+        print(f"[{mode}] {processes} processes x {writes} writes = {total} complaints "
+              f"in {elapsed:.2f}s ({total / elapsed:.0f} writes/s)")
+        print(f"    stored: {len(complaints)}  missing: {len(missing)}  "
+              f"duplicates: {len(complaints) - len(ids)}  status updates kept: {updated}/"
+              f"{processes * len(range(0, writes, 10))}  failed workers: {len(failed_workers)}")
+        return not missing and len(complaints) == total and not failed_workers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--mode", choices=["json", "journal", "sqlite", "all"], default="all")
+    args = parser.parse_args()
+
+    modes = ["json", "journal", "sqlite"] if args.mode == "all" else [args.mode]
+    results = [run(mode, args.processes, args.writes) for mode in modes]
+    print("✅ No writes lost" if all(results) else "❌ Lost writes detected")
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the shared HTTP client
+
+Starts a local stub API server and sends the same JSON POSTs with:
+- bare requests.post: a new connection per call and no retries (the old code path)
+- http_client.HTTPClient: pooled keep-alive connections, retries with backoff
+
+The stub can fail a fraction of calls with 429/503 to show the effect of retries:
+
+    python benchmarks/bench_http_client.py --requests 500 --concurrency 8 --error-rate 0.05
+
+This runs over plain HTTP on localhost, so it understates the saving: against
+the real APIs every new connection also pays DNS, the TLS handshake and a WAN
+round trip.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import HTTPClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    error_rate = 0.0
+    latency = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            status = random.choice([429, 503])
+            body = b'{"error": "try again"}'
+            self.send_response(status)
+            self.send_header("Retry-After", "0")
+        else:
+            body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, send, total, concurrency):
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            ok = send().status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            failures += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {label:<14} p50 {statistics.median(latencies):7.2f} ms   p99 {p99:7.2f} ms   "
+          f"{total / wall:7.0f} req/s   failed {failures}/{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of 429/503 responses")
+    parser.add_argument("--latency", type=float, default=0.0, help="server-side delay per call (seconds)")
+    args = parser.parse_args()
+
+    StubHandler.error_rate = args.error_rate
+    StubHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "hello"}]}
+
+    # Retry warnings would drown the results
+    logging.getLogger("http_client").setLevel(logging.ERROR)
+    client = HTTPClient(pool_maxsize=args.concurrency, backoff_base=0.01)
+    print(f"{args.requests} POSTs, concurrency {args.concurrency}, error rate {args.error_rate:.0%}")
+    try:
+        run("requests.post", lambda: requests.post(url, json=payload, timeout=30),
+            args.requests, args.concurrency)
+        run("HTTPClient", lambda: client.post(url, json=payload, timeout=30),
+            args.requests, args.concurrency)
+        print(f"  client stats: {client.stats()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for /api/pickup/stats
+
+Seeds a scratch MongoDB database with N synthetic pickup requests and times
+the old eight-round-trip implementation against the single $facet aggregation
+and the cached path the route now uses.
+
+    python benchmarks/bench_pickup_stats.py --sizes 10000 1000000 --repeats 20
+
+Needs a running MongoDB (MONGO_URI, default mongodb://localhost:27017). The
+scratch database is dropped at the end unless --keep is given.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+
+from pymongo import MongoClient
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.pickup_routes import compute_pickup_statistics
+from utils.ttl_cache import TTLCache
+
+STATUSES = ["Pending", "Confirmed", "In Progress", "Completed", "Cancelled"]
+MATERIALS = ["Plastic", "Paper", "Glass", "Metal", "E-Waste", "Cardboard", "Textiles"]
+
+
+def seed(collection, size, batch=10000):
+    """Insert `size` pickups spread over the last 60 days"""
+    now = datetime.datetime.utcnow()
+    inserted = 0
+    while inserted < size:
+        docs = []
+        for i in range(inserted, min(inserted + batch, size)):
+            created = now - datetime.timedelta(seconds=random.randint(0, 60 * 24 * 3600))
+            docs.append({
+                "id": f"PICKUP{i:07d}",
+                "name": f"Citizen {i}",
+                "phone": f"98{random.randint(10000000, 99999999)}",
+                "address": f"{i} Bench Street",
+                "materials": random.sample(MATERIALS, random.randint(1, 3)),
+                "status": random.choice(STATUSES),
+                "preferredDate": created.strftime("%Y-%m-%d"),
+                "createdAt": created,
+                "updatedAt": created,
+            })
+        collection.insert_many(docs, ordered=False)
+        inserted += len(docs)
+
+
+def legacy_statistics(collection):
+    """The previous implementation: eight separate round trips"""
+    counts = [collection.count_documents({"status": status}) for status in STATUSES]
+    total = collection.count_documents({})
+    today = datetime.datetime.utcnow().date()
+    today_count = collection.count_documents({"createdAt": {
+        "$gte": datetime.datetime.combine(today, datetime.time.min),
+        "$lt": datetime.datetime.combine(today, datetime.time.max)}})
+    start_of_week = today - datetime.timedelta(days=today.weekday())
+    end_of_week = start_of_week + datetime.timedelta(days=6)
+    week_count = collection.count_documents({"createdAt": {
+        "$gte": datetime.datetime.combine(start_of_week, datetime.time.min),
+        "$lt": datetime.datetime.combine(end_of_week, datetime.time.max)}})
+    materials = list(collection.aggregate([
+        {"$unwind": "$materials"},
+        {"$group": {"_id": "$materials", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}}]))
+    return counts, total, today_count, week_count, materials
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"    {label:<10} median {statistics.median(samples):9.2f} ms   p95 {p95:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="jantavoice_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 1000000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    client.admin.command("ping")
+    db = client[args.db]
+    collection = db["pickup_requests"]
+
+    try:
+        for size in args.sizes:
+            collection.drop()
+            print(f"Seeding {size} pickups...")
+            seed(collection, size)
+            collection.create_index("status")
+            collection.create_index("createdAt")
+
+            # Warm up the working set so both variants read from memory
+            legacy_statistics(collection)
+            compute_pickup_statistics(collection)
+
+            cache = TTLCache(ttl=60)
+            print(f"[{size} pickups] {args.repeats} runs each")
+            report("legacy", timed(lambda: legacy_statistics(collection), args.repeats))
+            report("$facet", timed(lambda: compute_pickup_statistics(collection), args.repeats))
+            report("cached", timed(lambda: cache.get_or_set(
+                "stats", lambda: compute_pickup_statistics(collection)), args.repeats))
+    finally:
+        if not args.keep:
+            client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Memory footprint of classifier sessions
+
+Fills N sessions (default 10k) with a full history each and reports the
+traced Python heap per session for:
+- legacy:  the old per-service layout (dict per page + separate decision deque)
+- manager: SessionManager / ClassifierSession as used by ClassifierService
+plus lookup latency, and optionally the cost of the SQLite write-through store.
+
+    python benchmarks/bench_session_memory.py --sessions 10000 --store /tmp/sessions.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_manager import SessionManager, SQLiteSessionStore, SESSION_HISTORY_SIZE
+
+TITLES = [
+    "Python Tutorial for Beginners - Full Course in 12 Hours",
+    "MrBeast - I Spent 50 Hours Buried Alive",
+    "How to center a div - Stack Overflow",
+    "lofi hip hop radio - beats to relax/study to",
+    "Home / X",
+    "Pull requests · torvalds/linux · GitHub",
+    "Funny Post : r/funny",
+]
+DECISIONS = ["allow", "warn", "filter", "redirect"]
+
+
+def page(rng, i):
+    return (f"https://www.youtube.com/watch?v={i:011d}&list=RD{rng.randrange(10 ** 8)}",
+            f"{rng.choice(TITLES)} #{i}", rng.choice(["video", "feed", "search", "article"]))
+
+
+def build_legacy(n, rng):
+    sessions = {}
+    for s in range(n):
+        history, decisions = deque(maxlen=SESSION_HISTORY_SIZE), deque(maxlen=SESSION_HISTORY_SIZE)
+        for i in range(SESSION_HISTORY_SIZE):
+            url, title, page_type = page(rng, s * 10 + i)
+            history.append({"url": url, "title": title, "page_type": page_type,
+                            "time": datetime.now().strftime("%H:%M:%S")})
+            decisions.append(rng.choice(DECISIONS))
+        sessions[f"conn-{s:032x}"] = (history, decisions)
+    return sessions
+
+
+def build_manager(n, rng, store=None):
+    manager = SessionManager(store=store, max_sessions=n)
+    for s in range(n):
+        session = manager.get(f"conn-{s:032x}")
+        for i in range(SESSION_HISTORY_SIZE):
+            _, title, _ = page(rng, s * 10 + i)
+            session.record(title, rng.choice(DECISIONS))
+        manager.save(session)
+    return manager
+
+
+def measure(label, build, n):
+    rng = random.Random(1)
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(n, rng)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"    {label:<16} {current / 2 ** 20:7.2f} MiB   {current / n:6.0f} B/session   built in {elapsed:5.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--store", help="also measure write-through to this SQLite file")
+    args = parser.parse_args()
+    n = args.sessions
+
+    print(f"{n} sessions x {SESSION_HISTORY_SIZE} pages")
+    measure("legacy", build_legacy, n)
+    manager = measure("manager", build_manager, n)
+
+    ids = [f"conn-{random.randrange(n):032x}" for _ in range(100000)]
+    started = time.perf_counter()
+    for session_id in ids:
+        manager.get(session_id)
+    print(f"    get() on a warm session: {(time.perf_counter() - started) / len(ids) * 1e6:.2f} us")
+
+    if args.store:
+        scratch = None
+    else:
+        scratch = tempfile.TemporaryDirectory()
+        args.store = os.path.join(scratch.name, "sessions.db")
+    store = SQLiteSessionStore(args.store)
+    stored = measure("manager+sqlite", lambda count, rng: build_manager(count, rng, store), n)
+    # A fresh manager (another worker, or after a restart) restores from the store
+    restored = SessionManager(store=store, max_sessions=n)
+    started = time.perf_counter()
+    for s in range(0, n, 10):
+        restored.get(f"conn-{s:032x}")
+    per_restore = (time.perf_counter() - started) / len(range(0, n, 10))
+    assert list(restored.get("conn-" + "0" * 32).history) == list(stored.get("conn-" + "0" * 32).history)
+    print(f"    restore from store: {per_restore * 1e6:.0f} us/session, "
+          f"store file {os.path.getsize(args.store) / 2 ** 20:.2f} MiB")
+    if scratch:
+        scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
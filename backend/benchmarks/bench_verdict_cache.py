@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for the productivity classifier's verdict cache
+
+Generates a browsing trace in which users keep coming back to a small set
+of popular pages (Zipf-distributed), with the URL noise real revisits have:
+tracking parameters, fragments, www./m. hosts, shuffled query order and
+per-feed query strings. The trace goes through ClassifierService against a
+stub Groq endpoint, once with the cache disabled and once enabled, and the
+LLM calls, hit rate and per-request latency of hits and misses are reported.
+
+    python benchmarks/bench_verdict_cache.py --requests 5000 --pages 500 --users 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ws_classifier import StubGroq
+
+SITES = [
+    ("https://www.youtube.com/watch?v={id}", "video"),
+    ("https://www.youtube.com/watch?v={id}&list=RD{id}", "video"),
+    ("https://github.com/org{n}/repo{id}", "other"),
+    ("https://stackoverflow.com/questions/{n}/how-to-{id}", "article"),
+    ("https://www.google.com/search?q=python+{id}", "search"),
+    ("https://www.reddit.com/r/sub{n}/comments/{id}", "social"),
+    ("https://news.example.com/story/{id}", "article"),
+]
+FEEDS = ["https://www.youtube.com/?bp={id}", "https://x.com/home?s={id}"]
+TASKS = ["Study Python", "Write thesis", "General Work"]
+
+
+def noisy(url, rng):
+    """The same page as a browser might report it on another visit"""
+    if rng.random() < 0.3:
+        url += ("&" if "?" in url else "?") + f"utm_source=s{rng.randrange(5)}&utm_medium=social"
+    if rng.random() < 0.2:
+        url += "#comments"
+    if rng.random() < 0.2:
+        url = url.replace("://www.", "://m.")
+    return url
+
+
+def trace(requests, pages, users, seed=3):
+    rng = random.Random(seed)
+    catalogue = []
+    for i in range(pages):
+        if i % 10 == 0:
+            catalogue.append((rng.choice(FEEDS), "feed"))
+        else:
+            template, page_type = rng.choice(SITES)
+            catalogue.append((template.format(id=f"p{i:05d}", n=i % 97), page_type))
+    user_tasks = [(rng.choice(TASKS), rng.choice(["medium", "strict"])) for _ in range(users)]
+    weights = [1 / (rank + 1) for rank in range(pages)]
+    for _ in range(requests):
+        user = rng.randrange(users)
+        template, page_type = rng.choices(catalogue, weights)[0]
+        task, strictness = user_tasks[user]
+        yield user, {
+            "url": noisy(template.format(id=rng.randrange(1000)), rng),
+            "title": template[:40],
+            "page_type": page_type,
+            "user_task": task,
+            "strictness": strictness,
+            "warning_count": rng.choice([0, 0, 0, 1, 2, 3])
+        }
+
+
+async def replay(classifier, events):
+    from models import ExtensionState
+    hit_times, miss_times = [], []
+    for i, (user, state) in enumerate(events):
+        state = ExtensionState(request_id=str(i), **state)
+        cached_before = classifier.metrics()["classifier"]["cached"]
+        started = time.perf_counter()
+        await classifier.aprocess_state(state, f"user-{user}")
+        elapsed = time.perf_counter() - started
+        (hit_times if classifier.metrics()["classifier"]["cached"] > cached_before else miss_times).append(elapsed)
+    return hit_times, miss_times
+
+
+def percentile(values, q):
+    return sorted(values)[int(len(values) * q) - 1] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=300, help="distinct pages in the trace")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub LLM response time in seconds")
+    args = parser.parse_args()
+
+    StubGroq.latency = args.latency
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), StubGroq)
+    stub.daemon_threads = True
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["GROQ_API_KEY"] = "bench"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+
+    import services
+
+    print(f"{args.requests} page views over {args.pages} pages by {args.users} users, "
+          f"stub LLM {args.latency * 1000:.0f} ms")
+    for label, ttl in (("no cache", 0), ("cache", services.VERDICT_CACHE_TTL)):
+        classifier = services.ClassifierService()
+        classifier.verdicts.ttl = ttl
+        started = time.perf_counter()
+        hits, misses = asyncio.run(replay(classifier, trace(args.requests, args.pages, args.users)))
+        elapsed = time.perf_counter() - started
+        stats = classifier.metrics()
+        print(f"    {label:<9} {elapsed:6.2f} s   LLM calls {stats['classifier']['llm_calls']:>5}   "
+              f"hit rate {stats['verdict_cache']['hit_rate']:.1%}")
+        if misses:
+            print(f"              miss p50 {statistics.median(misses) * 1000:7.2f} ms")
+        if hits:
+            print(f"              hit  p50 {statistics.median(hits) * 1e6:7.1f} us   "
+                  f"p99 {percentile(hits, 0.99) * 1e6:7.1f} us")
+
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
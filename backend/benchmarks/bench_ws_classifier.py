@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the productivity classifier WebSocket (/ws)
+
+Starts main.app with uvicorn against a local stub of the Groq chat
+completions API that answers after a fixed delay, then connects N
+simulated extensions. Each one sends --messages page states, --interval
+seconds apart, without waiting for answers, and matches the replies by
+request_id. Runs twice:
+- blocking: the old handler (sync Groq call inside the async endpoint)
+- async:    /ws as shipped (AsyncGroq, concurrent in-flight messages)
+
+Each message comes from its own tab unless --same-tab is given, in which
+case every extension navigates one tab and /ws supersedes older states
+(those replies come back marked superseded).
+
+    python benchmarks/bench_ws_classifier.py --clients 50 --messages 4 --latency 0.5 --modes async
+    python benchmarks/bench_ws_classifier.py --modes async --same-tab --interval 0.05
+
+Needs fastapi, uvicorn, groq and websockets.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import websockets
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STUB_ANSWER = json.dumps({
+    "decision": "warn",
+    "confidence": 0.9,
+    "actions": [{"type": "show_warning", "warning": {"message": "Hey! This isn't work.", "severity": "medium"}}]
+})
+
+
+class StubGroq(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.5
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": STUB_ANSWER}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def add_blocking_route(app, classifier):
+    """The handler as it was: one message at a time, LLM call on the event loop"""
+    from fastapi import WebSocket, WebSocketDisconnect
+    from models import ExtensionState
+
+    @app.websocket("/ws-blocking")
+    async def blocking_endpoint(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            while True:
+                state = ExtensionState(**json.loads(await websocket.receive_text()))
+                await websocket.send_text(classifier.process_state(state).model_dump_json())
+        except WebSocketDisconnect:
+            pass
+
+
+async def extension(uri, client_id, messages, interval, same_tab, latencies, superseded):
+    sent = {}
+    async with websockets.connect(uri, max_queue=None) as ws:
+        async def sender():
+            for i in range(messages):
+                request_id = f"{client_id}-{i}"
+                sent[request_id] = time.perf_counter()
+                await ws.send(json.dumps({
+                    "request_id": request_id,
+                    "tab_id": "tab" if same_tab else f"tab-{i}",
+                    "url": f"https://www.youtube.com/watch?v={client_id}x{i}",
+                    "title": f"Video {i}",
+                    "page_type": "video",
+                    "user_task": "Study Python"
+                }))
+                await asyncio.sleep(interval)
+
+        send_task = asyncio.create_task(sender())
+        for _ in range(messages):
+            reply = json.loads(await ws.recv())
+            elapsed = time.perf_counter() - sent.pop(reply["request_id"])
+            (superseded if reply.get("superseded") else latencies).append(elapsed)
+        await send_task
+    return len(sent)
+
+
+async def run_load(uri, clients, messages, interval, same_tab):
+    latencies, superseded = [], []
+    started = time.perf_counter()
+    unmatched = await asyncio.gather(*(extension(uri, c, messages, interval, same_tab, latencies, superseded)
+                                       for c in range(clients)))
+    return time.perf_counter() - started, latencies, len(superseded), sum(unmatched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=3, help="page states per extension")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between an extension's messages")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub LLM response time in seconds")
+    parser.add_argument("--concurrency", type=int, default=16, help="CLASSIFIER_MAX_CONCURRENCY")
+    parser.add_argument("--modes", nargs="+", default=["blocking", "async"], choices=["blocking", "async"])
+    parser.add_argument("--same-tab", action="store_true", help="send every message of an extension from one tab")
+    args = parser.parse_args()
+
+    StubGroq.latency = args.latency
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), StubGroq)
+    stub.daemon_threads = True
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["GROQ_API_KEY"] = "bench"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    os.environ["CLASSIFIER_MAX_CONCURRENCY"] = str(args.concurrency)
+
+    import uvicorn
+    import main as socket_api
+    add_blocking_route(socket_api.app, socket_api.classifier)
+    # Both runs send the same pages; measure LLM traffic, not verdict cache hits
+    socket_api.classifier.verdicts.ttl = 0
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(socket_api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    total = args.clients * args.messages
+    print(f"{args.clients} extensions x {args.messages} messages, stub LLM {args.latency}s, "
+          f"max {args.concurrency} LLM calls in flight")
+    for mode in args.modes:
+        path = "/ws-blocking" if mode == "blocking" else "/ws"
+        calls_before = socket_api.classifier.metrics()["classifier"]["llm_calls"]
+        elapsed, latencies, superseded, unmatched = asyncio.run(
+            run_load(f"ws://127.0.0.1:{port}{path}", args.clients, args.messages, args.interval, args.same_tab))
+        llm_calls = socket_api.classifier.metrics()["classifier"]["llm_calls"] - calls_before
+        latencies.sort()
+        print(f"    {mode:<9} {elapsed:7.2f} s   {total / elapsed:6.1f} msg/s   "
+              f"p50 {statistics.median(latencies):6.2f} s   p95 {latencies[int(len(latencies) * 0.95) - 1]:6.2f} s   "
+              f"max {latencies[-1]:6.2f} s   LLM calls {llm_calls}   superseded {superseded}   unmatched {unmatched}")
+
+    server.should_exit = True
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
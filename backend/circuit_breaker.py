@@ -0,0 +1,146 @@
+"""
+Circuit Breaker for JantaVoice
+Stops calling an unhealthy upstream API so callers can fall back immediately
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker
+
+    Closed: calls go through while outcomes are recorded over the last
+    `window_seconds`. Once at least `min_calls` are in the window and either
+    the error rate or the share of slow calls (slower than `slow_call_seconds`)
+    crosses its threshold, the breaker opens.
+
+    Open: calls are rejected without touching the network for `open_seconds`.
+
+    Half-open: up to `half_open_max_calls` probe calls are let through; if they
+    all succeed the breaker closes, and any failure opens it again.
+    """
+
+    def __init__(self, name: str, window_seconds: float = 60, min_calls: int = 5,
+                 error_rate_threshold: float = 0.5, slow_call_seconds: float = 10,
+                 slow_call_rate_threshold: float = 0.8, open_seconds: float = 30,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._calls = deque()  # (finished_at, ok, duration)
+        self._state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _rates(self):
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        slow = sum(1 for _, _, duration in self._calls if duration >= self.slow_call_seconds)
+        return failures / total, slow / total
+
+    def _open(self, now: float, reason: str):
+        self._state = OPEN
+        self._opened_at = now
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._times_opened += 1
+        logger.warning(f"Circuit '{self.name}' opened: {reason}")
+
+    def allow_request(self) -> bool:
+        """True if a call may go to the upstream now"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open, probing")
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record(self, ok: bool, duration: float):
+        """Record the outcome of a call that allow_request() let through"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if not ok:
+                    self._open(now, "probe call failed")
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._state = CLOSED
+                    self._calls.clear()
+                    logger.info(f"Circuit '{self.name}' closed")
+                return
+            if self._state == OPEN:
+                # A call that started before the breaker opened
+                return
+
+            self._calls.append((now, ok, duration))
+            self._trim(now)
+            if len(self._calls) < self.min_calls:
+                return
+            error_rate, slow_rate = self._rates()
+            if error_rate >= self.error_rate_threshold:
+                self._open(now, f"error rate {error_rate:.0%} over {len(self._calls)} calls")
+            elif slow_rate >= self.slow_call_rate_threshold:
+                self._open(now, f"{slow_rate:.0%} of {len(self._calls)} calls slower than {self.slow_call_seconds}s")
+
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and rolling-window counters for status endpoints"""
+        now = time.monotonic()
+        state = self.state()
+        with self._lock:
+            self._trim(now)
+            error_rate, slow_rate = self._rates()
+            durations = sorted(duration for _, _, duration in self._calls)
+            return {
+                "state": state,
+                "window_calls": len(self._calls),
+                "error_rate": round(error_rate, 3),
+                "slow_call_rate": round(slow_rate, 3),
+                "p50_latency_seconds": round(durations[len(durations) // 2], 3) if durations else None,
+                "rejected_calls": self._rejected,
+                "times_opened": self._times_opened,
+                "retry_in_seconds": (round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+                                     if state == OPEN else None),
+            }
@@ -0,0 +1,152 @@
+"""
+Rule Engine for the productivity classifier
+The deterministic parts of the classifier prompt ("ALWAYS ALLOW" sites and
+the list=RD music mix special case) compiled into a domain suffix trie and
+one URL regex, so those pages never cost an LLM call
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, NamedTuple
+
+from utils.url_normalize import normalize_url, url_domain
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_RULES_ENABLED = os.getenv("CLASSIFIER_RULES_ENABLED", "true").lower() == "true"
+# Comma-separated extra always-allowed domains, e.g. "intranet.example.com,=jira.example.com"
+CLASSIFIER_EXTRA_ALLOW_DOMAINS = [
+    d.strip() for d in os.getenv("CLASSIFIER_EXTRA_ALLOW_DOMAINS", "").split(",") if d.strip()
+]
+
+ALLOW = "allow"
+WARN = "warn"
+
+# "example.com" covers the host and all its subdomains; "=example.com" only
+# the host itself (www./m. are stripped first). The most specific entry wins.
+DOMAIN_RULES = {
+    "search_engine": ["=google.com", "bing.com", "duckduckgo.com", "search.brave.com", "ecosia.org",
+                      "startpage.com"],
+    "documentation": ["github.com", "gitlab.com", "bitbucket.org", "stackoverflow.com", "stackexchange.com",
+                      "superuser.com", "serverfault.com", "askubuntu.com", "developer.mozilla.org",
+                      "readthedocs.io", "readthedocs.org", "devdocs.io", "pypi.org", "npmjs.com",
+                      "w3schools.com", "geeksforgeeks.org"],
+    "education": ["khanacademy.org", "coursera.org", "edx.org", "udemy.com", "brilliant.org",
+                  "leetcode.com", "codecademy.com", "freecodecamp.org"],
+    "work_tool": ["mail.google.com", "calendar.google.com", "docs.google.com", "drive.google.com",
+                  "meet.google.com", "sheets.google.com", "notion.so", "notion.site", "outlook.office.com",
+                  "outlook.live.com", "teams.microsoft.com", "slack.com", "trello.com", "atlassian.net",
+                  "figma.com", "zoom.us", "linear.app"],
+}
+# Sites whose first host label is one of these are documentation (docs.python.org, docs.rs)
+DOC_HOST_LABELS = {"docs"}
+
+# (name, regex on the normalized URL, verdict, reason); checked before the domain rules
+URL_PATTERNS = [
+    ("music_mix", r"(?:music\.)?youtube\.com/watch\?(?:\S*&)?list=RD", WARN, "YouTube mix (list=RD) is music"),
+]
+
+REASONS = {
+    "search_engine": "Search engines are always allowed",
+    "documentation": "Documentation and developer sites are always allowed",
+    "education": "Educational platforms are always allowed",
+    "work_tool": "Work tools are always allowed",
+}
+
+
+class RuleMatch(NamedTuple):
+    verdict: str
+    rule: str
+    reason: str
+
+
+class ClassifierRules:
+    """
+    Domain suffix trie plus URL pattern set
+
+    Domains are stored label by label from the TLD down (com -> github ->
+    gist), so a lookup is one dict step per host label whatever the number
+    of rules. All URL patterns are compiled into a single alternation with
+    one named group each, so they cost one regex match per page.
+    """
+
+    _TERMINAL = "$"
+
+    def __init__(self, domain_rules: Dict[str, list] = DOMAIN_RULES, url_patterns: list = URL_PATTERNS,
+                 doc_host_labels=DOC_HOST_LABELS, extra_allow_domains=()):
+        self._trie: Dict[str, Any] = {}
+        self._domains = 0
+        for rule, domains in domain_rules.items():
+            for domain in domains:
+                self._add_domain(domain, RuleMatch(ALLOW, rule, REASONS.get(rule, rule)))
+        for domain in extra_allow_domains:
+            self._add_domain(domain, RuleMatch(ALLOW, "custom", "Allowed by configuration"))
+        self.doc_host_labels = set(doc_host_labels)
+
+        self._patterns = {}
+        alternatives = []
+        for i, (name, pattern, verdict, reason) in enumerate(url_patterns):
+            self._patterns[f"p{i}"] = RuleMatch(verdict, name, reason)
+            alternatives.append(f"(?P<p{i}>{pattern})")
+        self._pattern_re = re.compile("^(?:" + "|".join(alternatives) + ")") if alternatives else None
+
+        self._lock = threading.Lock()
+        self._matches = Counter()
+        self._checked = 0
+
+    def _add_domain(self, domain: str, match: RuleMatch):
+        exact = domain.startswith("=")
+        node = self._trie
+        for label in reversed(domain.lstrip("=").lower().split(".")):
+            node = node.setdefault(label, {})
+        node[self._TERMINAL] = (exact, match)
+        self._domains += 1
+
+    def _match_domain(self, host: str) -> Optional[RuleMatch]:
+        labels = host.split(".")
+        node = self._trie
+        best = None
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.get(label)
+            if node is None:
+                break
+            terminal = node.get(self._TERMINAL)
+            if terminal is not None and (not terminal[0] or depth == len(labels)):
+                best = terminal[1]
+        if best is None and len(labels) > 1 and labels[0] in self.doc_host_labels:
+            best = RuleMatch(ALLOW, "documentation", REASONS["documentation"])
+        return best
+
+    def evaluate(self, url: str) -> Optional[RuleMatch]:
+        """The rule that decides this page, or None to ask the LLM"""
+        match = None
+        if self._pattern_re is not None:
+            found = self._pattern_re.match(normalize_url(url))
+            if found is not None:
+                match = self._patterns[found.lastgroup]
+        if match is None:
+            match = self._match_domain(url_domain(url))
+        with self._lock:
+            self._checked += 1
+            if match is not None:
+                self._matches[match.rule] += 1
+        return match
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            matched = sum(self._matches.values())
+            return {
+                "domains": self._domains,
+                "patterns": len(self._patterns),
+                "checked": self._checked,
+                "matched": matched,
+                "match_rate": round(matched / self._checked, 3) if self._checked else 0.0,
+                "by_rule": dict(self._matches)
+            }
+
+
+# Singleton instance
+classifier_rules = ClassifierRules(extra_allow_domains=CLASSIFIER_EXTRA_ALLOW_DOMAINS)
@@ -1,32 +1,131 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
 import logging
+import os
+
+from pickup_search import backfill_search_fields_once
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-try:
-    # Connect to MongoDB
-    client = MongoClient("mongodb://localhost:27017", serverSelectionTimeoutMS=5000)
-    
-    # Test the connection
-    client.admin.command('ping')
-    logger.info("✅ MongoDB connection successful")
-    
-    db = client["ecosaathi"]
-    complaints_collection = db["complaints"]
-    pickup_collection = db["pickup_requests"]
-    
-    # Test if we can access the collections
-    complaints_collection.find_one()
-    pickup_collection.find_one()
-    logger.info("✅ Database and collections access successful")
-    
-except Exception as e:
-    logger.error(f"❌ MongoDB connection failed: {e}")
-    logger.error("Please make sure MongoDB is running on localhost:27017")
-    
-    # Create fallback collections for testing
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "ecosaathi")
+
+# Live handles. Routes read these through the module (config.complaints_collection)
+# so a reconnect made by the sync worker is picked up by every blueprint.
+client = None
+db = None
+complaints_collection = None
+pickup_collection = None
+
+
+def ensure_indexes():
+    """Create the indexes the routes and the sync worker rely on"""
+    # Fallback sync upserts and status lookups are keyed on the complaint id
+    complaints_collection.create_index([("id", ASCENDING)])
+
+    # Admin complaint listing: keyset pagination on (timestamp, _id), optionally filtered
+    complaints_collection.create_index([("timestamp", DESCENDING), ("_id", DESCENDING)])
+    for field in ("status", "department", "urgency", "type", "category"):
+        complaints_collection.create_index([(field, ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+
+    pickup_collection.create_index([("id", ASCENDING)])
+
+    # Pickup listing: keyset pagination on (createdAt, _id), optionally filtered
+    pickup_collection.create_index([("createdAt", DESCENDING), ("_id", DESCENDING)])
+    pickup_collection.create_index([("status", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)])
+    pickup_collection.create_index([("preferredDate", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)])
+
+    # Pickup search: anchored prefixes on normalized phone/id, n-gram autocomplete
+    # and a text index for whole-word name/address search
+    pickup_collection.create_index([("phoneNormalized", ASCENDING)])
+    pickup_collection.create_index([("idNormalized", ASCENDING)])
+    pickup_collection.create_index([("searchPrefixes", ASCENDING)])
+    pickup_collection.create_index([("name", TEXT), ("address", TEXT)], name="pickup_text_search",
+                                   default_language="none")
+
+
+_backfill_done = False
+
+
+def _run_backfill_once():
+    """One-off data migrations; skipped on reconnects once this process has seen them done"""
+    global _backfill_done
+    if _backfill_done:
+        return
+    try:
+        backfill_search_fields_once(pickup_collection, db["migrations"])
+        _backfill_done = True
+    except Exception as e:
+        logger.warning(f"⚠️  Could not backfill pickup search fields: {e}")
+
+
+def connect_mongodb(timeout_ms: int = 5000) -> bool:
+    """
+    Connect to MongoDB and swap in live collection handles
+
+    Returns:
+        True if the database is reachable, False otherwise
+    """
+    global client, db, complaints_collection, pickup_collection
+    try:
+        new_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=timeout_ms)
+
+        # Test the connection
+        new_client.admin.command('ping')
+        logger.info("✅ MongoDB connection successful")
+
+        new_db = new_client[MONGO_DB_NAME]
+        new_complaints = new_db["complaints"]
+        new_pickups = new_db["pickup_requests"]
+
+        # Test if we can access the collections
+        new_complaints.find_one()
+        new_pickups.find_one()
+        logger.info("✅ Database and collections access successful")
+
+        client, db = new_client, new_db
+        complaints_collection, pickup_collection = new_complaints, new_pickups
+
+        try:
+            ensure_indexes()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not ensure MongoDB indexes: {e}")
+        _run_backfill_once()
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ MongoDB connection failed: {e}")
+        logger.error(f"Please make sure MongoDB is running on {MONGO_URI}")
+        disconnect_mongodb()
+        return False
+
+
+def disconnect_mongodb():
+    """Drop the live handles so routes switch to fallback mode"""
+    global client, db, complaints_collection, pickup_collection
     complaints_collection = None
     pickup_collection = None
+    db = None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+    client = None
+
+
+def is_mongodb_reachable() -> bool:
+    """Ping the current client without touching the live handles"""
+    if client is None:
+        return False
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+
+
+if not connect_mongodb():
+    # Create fallback collections for testing
     logger.warning("⚠️  Using fallback mode - complaints and pickup requests will not be saved to database")
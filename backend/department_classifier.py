@@ -0,0 +1,244 @@
+"""
+Department Classifier for JantaVoice
+Single weighted Hindi + English keyword lexicon compiled into an
+Aho-Corasick automaton: one pass over the text scores every department
+"""
+
+import logging
+import unicodedata
+from collections import deque
+from typing import Dict, Any, List, Iterable, Optional
+
+from utils.text_normalize import normalize_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEPARTMENT = "General Administration"
+
+# Weights: 1.0 = keyword names the department outright, 0.5 = suggestive but
+# shared with other topics (e.g. "power", "clean", "pipe")
+DEPARTMENT_LEXICON = {
+    "Road Department": {
+        "सड़क": 1.0, "सडक": 1.0, "गड्ढा": 1.0, "गड्ढे": 1.0, "रोड": 1.0, "फुटपाथ": 1.0, "पुल": 0.5,
+        "रास्ते": 0.5, "रास्ता": 0.5, "ट्रैफिक": 0.5,
+        "road": 1.0, "pothole": 1.0, "street": 0.5, "footpath": 1.0, "bridge": 0.5, "traffic": 0.5
+    },
+    "Water Department": {
+        "पानी": 1.0, "नल": 1.0, "पाइप": 0.5, "टंकी": 1.0, "बोरवेल": 1.0, "पेयजल": 1.0,
+        "water": 1.0, "tap": 1.0, "pipe": 0.5, "leak": 0.5, "borewell": 1.0
+    },
+    "Electricity Department": {
+        "बिजली": 1.0, "लाइट": 0.5, "करंट": 1.0, "ट्रांसफार्मर": 1.0, "वोल्टेज": 1.0, "खंभा": 0.5,
+        "electricity": 1.0, "power": 0.5, "light": 0.5, "pole": 0.5, "transformer": 1.0, "voltage": 1.0
+    },
+    "Sanitation Department": {
+        "कचरा": 1.0, "कूड़ा": 1.0, "कूडा": 1.0, "गंदगी": 1.0, "सफाई": 0.5, "नाली": 1.0, "सीवर": 1.0,
+        "garbage": 1.0, "trash": 1.0, "waste": 1.0, "clean": 0.5, "drain": 1.0, "sewage": 1.0
+    },
+    "Health Department": {
+        "अस्पताल": 1.0, "डॉक्टर": 1.0, "दवा": 1.0, "इलाज": 1.0, "स्वास्थ्य": 1.0, "बीमारी": 1.0,
+        "hospital": 1.0, "doctor": 1.0, "health": 1.0, "medicine": 1.0, "medical": 1.0
+    },
+    "Education Department": {
+        "स्कूल": 1.0, "शिक्षक": 1.0, "पढ़ाई": 1.0, "कॉलेज": 1.0, "यूनिवर्सिटी": 1.0, "परीक्षा": 1.0,
+        "school": 1.0, "teacher": 1.0, "education": 1.0, "college": 1.0, "exam": 1.0
+    },
+    "Police": {
+        "पुलिस": 1.0, "चोरी": 1.0, "लूट": 1.0, "मारपीट": 1.0, "धोखाधड़ी": 1.0, "अपराध": 1.0,
+        "गुंडागर्दी": 1.0, "हत्या": 1.0, "रैगिंग": 1.0, "रिश्वत": 0.5,
+        "police": 1.0, "theft": 1.0, "robbery": 1.0, "fraud": 1.0, "crime": 1.0
+    },
+    "Ration Department": {
+        "राशन": 1.0, "अनाज": 1.0, "चावल": 0.5, "गेहूं": 0.5, "चीनी": 0.5, "केरोसिन": 1.0,
+        "ration": 1.0, "kerosene": 1.0
+    },
+    "Railway": {
+        "ट्रेन": 1.0, "रेल": 1.0, "स्टेशन": 0.5, "प्लेटफॉर्म": 1.0, "ट्रैक": 0.5, "टिकट": 0.5,
+        "train": 1.0, "railway": 1.0, "platform": 0.5
+    },
+    "Bank": {
+        "बैंक": 1.0, "एटीएम": 1.0, "एटीम": 1.0, "खाता": 0.5, "लेनदेन": 0.5, "ब्याज": 0.5, "पैसा": 0.5,
+        "bank": 1.0, "atm": 1.0
+    }
+}
+
+# Keywords only match whole tokens, so inflected forms are listed here:
+# form -> lexicon keyword it counts as (a text with both scores once)
+KEYWORD_FORMS = {
+    "सड़क": ["सड़कें", "सड़कों"], "सडक": ["सडकें", "सडकों"], "गड्ढा": ["गड्ढों"], "रास्ता": ["रास्तों"],
+    "road": ["roads"], "pothole": ["potholes"], "street": ["streets"], "bridge": ["bridges"],
+    "नल": ["नलों"], "टंकी": ["टंकियां", "टंकियों"], "पाइप": ["पाइपों"],
+    "tap": ["taps"], "pipe": ["pipes", "pipeline"], "leak": ["leaks", "leaking", "leakage"],
+    "खंभा": ["खंभे", "खंभों"], "light": ["lights"], "pole": ["poles"],
+    "नाली": ["नालियां", "नालियों"], "drain": ["drains", "drainage"], "clean": ["cleaning"],
+    "अस्पताल": ["अस्पतालों"], "डॉक्टर": ["डॉक्टरों"], "hospital": ["hospitals"], "doctor": ["doctors"],
+    "स्कूल": ["स्कूलों"], "शिक्षक": ["शिक्षकों"], "school": ["schools"], "teacher": ["teachers"],
+    "exam": ["exams"], "ट्रेन": ["ट्रेनों"], "train": ["trains"], "खाता": ["खाते"], "bank": ["banks"]
+}
+
+# Hindi names used by the voice bot
+HINDI_LABELS = {
+    "Road Department": "सड़क विभाग",
+    "Water Department": "जल विभाग",
+    "Electricity Department": "विद्युत विभाग",
+    "Sanitation Department": "स्वच्छता विभाग",
+    "Health Department": "स्वास्थ्य विभाग",
+    "Education Department": "शिक्षा विभाग",
+    "Police": "पुलिस",
+    "Ration Department": "राशन विभाग",
+    "Railway": "रेलवे",
+    "Bank": "बैंक",
+    "General Administration": "सामान्य प्रशासन"
+}
+
+
+class DepartmentClassifier:
+    """
+    Aho-Corasick keyword classifier
+
+    All keywords of all departments live in one automaton, so classifying a
+    text is a single left-to-right pass regardless of lexicon size. Each
+    department's score is the sum of the weights of the distinct keywords
+    found; confidence is its share of the total score.
+
+    Keywords only match whole tokens, so "नल" (tap) does not match inside
+    "ऑनलाइन" nor "रेल" inside "बरेली"; inflected forms come from `forms`.
+    """
+
+    def __init__(self, lexicon: Dict[str, Dict[str, float]] = DEPARTMENT_LEXICON,
+                 forms: Dict[str, List[str]] = KEYWORD_FORMS):
+        self.lexicon = lexicon
+        # Node i: transitions, failure link, and (keyword, department, weight) outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        forms = {normalize_text(keyword): variants for keyword, variants in forms.items()}
+        for department, keywords in lexicon.items():
+            for keyword, weight in keywords.items():
+                keyword = normalize_text(keyword)
+                self._add(keyword, keyword, department, weight)
+                for form in forms.get(keyword, ()):
+                    self._add(normalize_text(form), keyword, department, weight)
+        self._build_failure_links()
+
+    def _add(self, form: str, keyword: str, department: str, weight: float):
+        node = 0
+        for char in form:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(form), keyword, department, weight))
+
+    def _build_failure_links(self):
+        # Also folds the failure links into a full transition table, so the
+        # scan does one dict lookup per character instead of walking fail links
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._delta[child] = dict(self._delta[0], **self._goto[child])
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                self._fail[child] = self._delta[self._fail[node]].get(char, 0) if node else 0
+                # Inherit outputs of the failure target (keywords that are suffixes)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                self._delta[child] = dict(self._delta[self._fail[child]], **self._goto[child])
+
+    @staticmethod
+    def _is_boundary(text: str, index: int) -> bool:
+        # Vowel signs and viramas are marks, not letters, but still part of the word
+        if index < 0 or index >= len(text):
+            return True
+        char = text[index]
+        return not (char.isalnum() or unicodedata.category(char).startswith("M"))
+
+    def find_keywords(self, text: str) -> Dict[tuple, float]:
+        """
+        Distinct (keyword, department) pairs found in already-normalized text -> weight
+
+        A keyword that lies inside a longer (multi-word) match is dropped.
+        """
+        delta, out, is_boundary = self._delta, self._out, self._is_boundary
+        spans = []
+        node = 0
+        for index, char in enumerate(text):
+            node = delta[node].get(char, 0)
+            if not out[node]:
+                continue
+            for length, keyword, department, weight in out[node]:
+                start = index - length + 1
+                if not (is_boundary(text, start - 1) and is_boundary(text, index + 1)):
+                    continue
+                spans.append((start, index + 1, keyword, department, weight))
+        if not spans:
+            return {}
+
+        found = {}
+        # Longest span first at each start; anything inside a kept span is shadowed
+        spans.sort(key=lambda span: (span[0], -span[1]))
+        covered_until = -1
+        covering = None
+        for start, end, keyword, department, weight in spans:
+            if end <= covered_until and (start, end) != covering:
+                continue
+            if end > covered_until:
+                covered_until, covering = end, (start, end)
+            found.setdefault((keyword, department), weight)
+        return found
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """
+        Score every department for a complaint text
+
+        Returns:
+            Dict with 'department' (best label, or General Administration),
+            'confidence' (0-1), 'labels' (all scored departments, best first)
+            and 'matches' (keywords found)
+        """
+        found = self.find_keywords(normalize_text(text))
+        scores: Dict[str, float] = {}
+        for (_, department), weight in found.items():
+            scores[department] = scores.get(department, 0.0) + weight
+
+        total = sum(scores.values())
+        labels = [{"department": d, "score": round(s, 3), "confidence": round(s / total, 3)}
+                  for d, s in sorted(scores.items(), key=lambda item: item[1], reverse=True)]
+        return {
+            "department": labels[0]["department"] if labels else DEFAULT_DEPARTMENT,
+            "confidence": labels[0]["confidence"] if labels else 0.0,
+            "labels": labels,
+            "matches": sorted({keyword for keyword, _ in found})
+        }
+
+    def classify_batch(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """Classify many texts (e.g. to reclassify a backlog of complaints)"""
+        return [self.classify(text) for text in texts]
+
+
+# Singleton instance
+department_classifier = DepartmentClassifier()
+
+
+def classify_department(text: str) -> Dict[str, Any]:
+    """Convenience function for scoring a single complaint text"""
+    return department_classifier.classify(text)
+
+
+def department_label(text: str, labels: Optional[Dict[str, str]] = None, default: Optional[str] = None) -> str:
+    """
+    Best department for text, optionally translated through a label map
+
+    Args:
+        labels: Department -> display name (e.g. HINDI_LABELS)
+        default: Returned when no keyword matches
+    """
+    department = classify_department(text)["department"]
+    if department == DEFAULT_DEPARTMENT and default is not None:
+        return default
+    return labels.get(department, department) if labels else department
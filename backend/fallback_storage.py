@@ -6,9 +6,18 @@ Handles JSON-based storage when MongoDB is unavailable
 import os
 import json
 import logging
+import sqlite3
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from threading import Lock
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from contextlib import contextmanager
+from itertools import islice
+from threading import Lock, local
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 load_dotenv = None
 try:
@@ -22,56 +31,267 @@ logger = logging.getLogger(__name__)
 FALLBACK_JSON_PATH = os.getenv("FALLBACK_JSON_PATH", "./fallback_complaints.json")
 SYNC_PENDING_PATH = os.getenv("SYNC_PENDING_PATH", "./sync_pending.json")
 
+# Storage mode: "json" rewrites the whole file per write, "journal" appends to an NDJSON log,
+# "sqlite" keeps complaints in a WAL-mode SQLite database
+FALLBACK_STORAGE_MODE = os.getenv("FALLBACK_STORAGE_MODE", "json").lower()
+FALLBACK_JOURNAL_PATH = os.getenv("FALLBACK_JOURNAL_PATH", "./fallback_complaints.journal")
+# Number of journal records after which the log is folded into the snapshot
+FALLBACK_JOURNAL_COMPACT_EVERY = int(os.getenv("FALLBACK_JOURNAL_COMPACT_EVERY", "5000"))
+FALLBACK_JOURNAL_FSYNC = os.getenv("FALLBACK_JOURNAL_FSYNC", "false").lower() == "true"
+FALLBACK_SQLITE_PATH = os.getenv("FALLBACK_SQLITE_PATH", "./fallback_complaints.db")
+# Complaints pushed to MongoDB per bulk_write during sync
+FALLBACK_SYNC_BATCH_SIZE = int(os.getenv("FALLBACK_SYNC_BATCH_SIZE", "500"))
+
 # Thread lock for file operations
 _file_lock = Lock()
 
 
+def _lock_fd(fd: int):
+    """Block until an exclusive OS lock on fd is held"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ~10s of retries; keep waiting
+            continue
+
+
+def _unlock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class _ProcessLock:
+    """
+    Thread lock plus an OS advisory lock on a sidecar `.lock` file
+
+    Serialises storage access across threads and across worker processes
+    (gunicorn/uwsgi) sharing the same files. The lock file descriptor is
+    reopened after a fork so children never share the parent's lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_fd(self) -> int:
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def __enter__(self):
+        _file_lock.acquire()
+        try:
+            _lock_fd(self._ensure_fd())
+        except Exception:
+            _file_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            _unlock_fd(self._fd)
+        finally:
+            _file_lock.release()
+
+
+def sort_timestamp(value) -> str:
+    """Timestamp as a sortable string (datetimes and ISO strings order the same way)"""
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    value = str(value)
+    # str(datetime) uses a space separator; normalise to the ISO 'T'
+    if len(value) > 10 and value[10] == " ":
+        value = f"{value[:10]}T{value[11:]}"
+    return value
+
+
+def _file_signature(path: str):
+    """Identity of a file's current contents (changes on every replace/append)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
 class FallbackStorage:
-    """JSON-based fallback storage for complaints"""
-    
+    """
+    JSON-based fallback storage for complaints
+
+    The file is loaded once into memory. Lookups go through an index keyed by
+    complaint `id` and a secondary index on `_sync_status`; writes update the
+    indexes and then persist the whole list back to disk.
+
+    All access holds an inter-process file lock, and the view is reloaded
+    whenever another process has replaced the file since we last saw it, so
+    several worker processes can share one fallback file without losing writes.
+    """
+
     def __init__(self, filepath: str = FALLBACK_JSON_PATH):
         self.filepath = filepath
+        self._records: List[Dict[str, Any]] = []
+        # complaint id -> position in _records (first occurrence wins, as before)
+        self._by_id: Dict[str, int] = {}
+        # _sync_status -> ordered set of positions in _records
+        self._by_sync_status: Dict[str, Dict[int, None]] = {}
+        self._seen_signature = None
+        self._lock = _ProcessLock(f"{filepath}.lock")
         self._ensure_file_exists()
-    
+        with self._lock:
+            self._reload()
+
     def _ensure_file_exists(self):
         """Create the JSON file if it doesn't exist"""
         if not os.path.exists(self.filepath):
             with open(self.filepath, 'w', encoding='utf-8') as f:
                 json.dump([], f)
-    
+
+    def _reload(self):
+        """Rebuild the in-memory view and indexes from disk"""
+        self._reset_index()
+        self._seen_signature = _file_signature(self.filepath)
+        for complaint in self._read_all():
+            self._index(complaint)
+
+    def _refresh(self):
+        """Pick up writes made by other processes since our last access"""
+        if _file_signature(self.filepath) != self._seen_signature:
+            self._reload()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the inter-process lock with an up-to-date view"""
+        with self._lock:
+            self._refresh()
+            yield
+
+    def _reset_index(self):
+        self._records = []
+        self._by_id = {}
+        self._by_sync_status = {}
+
+    def _index(self, complaint: Dict[str, Any]):
+        """Add a complaint to the in-memory view and its indexes"""
+        position = len(self._records)
+        self._records.append(complaint)
+
+        complaint_id = complaint.get("id")
+        if complaint_id is not None and complaint_id not in self._by_id:
+            self._by_id[complaint_id] = position
+
+        sync_status = complaint.get("_sync_status")
+        if sync_status is not None:
+            self._by_sync_status.setdefault(sync_status, {})[position] = None
+
+    def _find(self, complaint_id: str) -> Optional[Dict[str, Any]]:
+        """O(1) lookup of the stored record for a complaint id"""
+        position = self._by_id.get(complaint_id)
+        return self._records[position] if position is not None else None
+
+    def _set_fields(self, position: int, fields: Dict[str, Any]):
+        """Apply field changes to a record, keeping the status index coherent"""
+        complaint = self._records[position]
+        if "_sync_status" in fields:
+            old_status = complaint.get("_sync_status")
+            if old_status is not None:
+                self._by_sync_status.get(old_status, {}).pop(position, None)
+            self._by_sync_status.setdefault(fields["_sync_status"], {})[position] = None
+        complaint.update(fields)
+
+    def _with_status(self, sync_status: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Records with the given _sync_status, in insertion order"""
+        positions = self._by_sync_status.get(sync_status, {})
+        return [self._records[p] for p in islice(positions, limit)]
+
+    def _replace_file(self, indent: Optional[int] = None, fsync: bool = False):
+        """Atomically replace the JSON file with the in-memory view"""
+        tmp_path = f"{self.filepath}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._records, f, ensure_ascii=False, indent=indent, default=str)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.filepath)
+        self._seen_signature = _file_signature(self.filepath)
+
+    def _write_all(self):
+        """Persist the in-memory view to the JSON file"""
+        self._replace_file(indent=2)
+
+    def _update(self, complaint_id: str, fields: Dict[str, Any]) -> bool:
+        """Apply and persist a field update for one complaint"""
+        position = self._by_id.get(complaint_id)
+        if position is None:
+            return False
+        self._set_fields(position, fields)
+        try:
+            self._write_all()
+        except Exception:
+            # Keep memory consistent with what is actually on disk
+            self._reload()
+            raise
+        return True
+
+    def _update_many(self, complaint_ids: List[str], fields: Dict[str, Any]) -> int:
+        """Apply and persist the same field update for many complaints in one write"""
+        positions = [self._by_id[cid] for cid in complaint_ids if cid in self._by_id]
+        if not positions:
+            return 0
+        for position in positions:
+            self._set_fields(position, fields)
+        try:
+            self._write_all()
+        except Exception:
+            self._reload()
+            raise
+        return len(positions)
+
     def save_complaint(self, complaint: Dict[str, Any]) -> bool:
         """
         Save a complaint to the fallback JSON file
-        
+
         Args:
             complaint: Complaint data dictionary
-            
+
         Returns:
             True if saved successfully, False otherwise
         """
         try:
-            with _file_lock:
-                # Read existing complaints
-                complaints = self._read_all()
-                
+            with self._locked():
                 # Add metadata for sync tracking
                 complaint["_fallback_saved_at"] = datetime.utcnow().isoformat()
                 complaint["_sync_status"] = "pending"
-                
-                # Append new complaint
-                complaints.append(complaint)
-                
+
+                # Append new complaint (as it will read back from disk)
+                self._index(json.loads(json.dumps(complaint, ensure_ascii=False, default=str)))
+
                 # Write back
-                with open(self.filepath, 'w', encoding='utf-8') as f:
-                    json.dump(complaints, f, ensure_ascii=False, indent=2, default=str)
-                
+                try:
+                    self._write_all()
+                except Exception:
+                    self._reload()
+                    raise
+
                 logger.info(f"Complaint saved to fallback storage: {complaint.get('id', 'unknown')}")
                 return True
-                
+
         except Exception as e:
             logger.exception(f"Failed to save complaint to fallback storage: {e}")
             return False
-    
+
     def _read_all(self) -> List[Dict[str, Any]]:
         """Read all complaints from fallback file"""
         try:
@@ -79,123 +299,628 @@ class FallbackStorage:
                 return json.load(f)
         except (json.JSONDecodeError, FileNotFoundError):
             return []
-    
-    def get_pending_sync(self) -> List[Dict[str, Any]]:
-        """Get all complaints pending MongoDB sync"""
-        with _file_lock:
-            complaints = self._read_all()
-            return [c for c in complaints if c.get("_sync_status") == "pending"]
-    
+
+    def get_pending_sync(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get complaints pending MongoDB sync (oldest first, at most `limit`)"""
+        with self._locked():
+            return [dict(c) for c in self._with_status("pending", limit)]
+
+    def get_pending_count(self) -> int:
+        """Number of complaints pending MongoDB sync"""
+        with self._locked():
+            return len(self._by_sync_status.get("pending", {}))
+
     def mark_synced(self, complaint_id: str) -> bool:
         """Mark a complaint as synced to MongoDB"""
         try:
-            with _file_lock:
-                complaints = self._read_all()
-                updated = False
-                
-                for complaint in complaints:
-                    if complaint.get("id") == complaint_id:
-                        complaint["_sync_status"] = "synced"
-                        complaint["_synced_at"] = datetime.utcnow().isoformat()
-                        updated = True
-                        break
-                
+            with self._locked():
+                updated = self._update(complaint_id, {
+                    "_sync_status": "synced",
+                    "_synced_at": datetime.utcnow().isoformat()
+                })
                 if updated:
-                    with open(self.filepath, 'w', encoding='utf-8') as f:
-                        json.dump(complaints, f, ensure_ascii=False, indent=2, default=str)
                     logger.info(f"Marked complaint as synced: {complaint_id}")
-                
+
                 return updated
-                
+
         except Exception as e:
             logger.exception(f"Failed to mark complaint as synced: {e}")
             return False
-    
-    def sync_to_mongodb(self, mongodb_collection) -> Dict[str, Any]:
+
+    def mark_synced_many(self, complaint_ids: List[str]) -> int:
+        """Mark a batch of complaints as synced in a single storage write"""
+        if not complaint_ids:
+            return 0
+        try:
+            with self._locked():
+                updated = self._update_many(complaint_ids, {
+                    "_sync_status": "synced",
+                    "_synced_at": datetime.utcnow().isoformat()
+                })
+                logger.info(f"Marked {updated} complaints as synced")
+                return updated
+
+        except Exception as e:
+            logger.exception(f"Failed to mark complaints as synced: {e}")
+            return 0
+
+    def sync_batch(self, mongodb_collection, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Push one batch of pending complaints to MongoDB with a single bulk_write
+
+        Upserts are keyed on `id` and only set fields on insert, so complaints
+        that already reached MongoDB are left untouched. Connection errors are
+        raised to the caller; per-document write errors leave those complaints
+        pending for the next run.
+        """
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+
+        operations = []
+        complaint_ids = []
+        for complaint in batch:
+            # Remove fallback metadata before inserting to MongoDB
+            complaint_data = {k: v for k, v in complaint.items()
+                              if not k.startswith("_")}
+            # Fallback files hold timestamps as strings; store real dates in MongoDB
+            # so they sort and paginate together with directly inserted complaints
+            if isinstance(complaint_data.get("timestamp"), str):
+                try:
+                    complaint_data["timestamp"] = datetime.fromisoformat(complaint_data["timestamp"])
+                except ValueError:
+                    pass
+            operations.append(UpdateOne({"id": complaint_data.get("id")},
+                                        {"$setOnInsert": complaint_data},
+                                        upsert=True))
+            complaint_ids.append(complaint_data.get("id"))
+
+        if not operations:
+            return {"synced_count": 0, "failed_count": 0}
+
+        failed_indexes = set()
+        try:
+            mongodb_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            failed_indexes = {err["index"] for err in e.details.get("writeErrors", [])}
+            for err in e.details.get("writeErrors", []):
+                logger.error(f"Failed to sync complaint {complaint_ids[err['index']]}: {err.get('errmsg')}")
+
+        synced_ids = [cid for i, cid in enumerate(complaint_ids) if i not in failed_indexes]
+        self.mark_synced_many(synced_ids)
+        return {"synced_count": len(synced_ids), "failed_count": len(failed_indexes)}
+
+    def sync_to_mongodb(self, mongodb_collection, batch_size: int = FALLBACK_SYNC_BATCH_SIZE,
+                        on_batch=None) -> Dict[str, Any]:
         """
         Sync pending complaints to MongoDB
-        
+
         Args:
             mongodb_collection: PyMongo collection object
-            
+            batch_size: Complaints per bulk_write
+            on_batch: Optional callback receiving each batch result
+
         Returns:
-            Dict with 'synced_count' and 'failed_count'
+            Dict with 'synced_count', 'failed_count' and 'pending_remaining'
+            (plus 'error' if the sync was interrupted)
         """
-        pending = self.get_pending_sync()
         synced_count = 0
         failed_count = 0
-        
-        for complaint in pending:
+        error = None
+
+        while True:
+            batch = self.get_pending_sync(limit=batch_size)
+            if not batch:
+                break
             try:
-                # Remove fallback metadata before inserting to MongoDB
-                complaint_data = {k: v for k, v in complaint.items() 
-                                if not k.startswith("_")}
-                
-                # Check if already exists in MongoDB
-                existing = mongodb_collection.find_one({"id": complaint_data.get("id")})
-                
-                if not existing:
-                    mongodb_collection.insert_one(complaint_data)
-                    logger.info(f"Synced complaint to MongoDB: {complaint_data.get('id')}")
-                
-                self.mark_synced(complaint_data.get("id"))
-                synced_count += 1
-                
+                result = self.sync_batch(mongodb_collection, batch)
             except Exception as e:
-                logger.error(f"Failed to sync complaint {complaint.get('id')}: {e}")
-                failed_count += 1
-        
-        return {
+                logger.error(f"Fallback sync interrupted: {e}")
+                error = str(e)
+                break
+
+            synced_count += result["synced_count"]
+            failed_count += result["failed_count"]
+            if on_batch is not None:
+                on_batch(result)
+            # Only failing complaints are left at the head of the queue
+            if result["synced_count"] == 0:
+                break
+
+        summary = {
             "synced_count": synced_count,
             "failed_count": failed_count,
-            "pending_remaining": len(self.get_pending_sync())
+            "pending_remaining": self.get_pending_count()
         }
-    
+        if error is not None:
+            summary["error"] = error
+        return summary
+
     def get_all_complaints(self) -> List[Dict[str, Any]]:
         """Get all stored complaints (for admin viewing when DB is down)"""
-        with _file_lock:
-            complaints = self._read_all()
+        with self._locked():
             # Return without internal metadata
-            return [{k: v for k, v in c.items() if not k.startswith("_")} 
-                    for c in complaints]
-    
+            return [{k: v for k, v in c.items() if not k.startswith("_")}
+                    for c in self._records]
+
+    def query_complaints(self, filters: Optional[Dict[str, Any]] = None,
+                         date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         after: Optional[Tuple[str, str]] = None,
+                         limit: Optional[int] = None, offset: int = 0,
+                         exclude_fields: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Filtered complaints, newest first (for the admin dashboard when DB is down)
+
+        Mirrors the MongoDB query contract of /api/admin/complaints: results are
+        ordered by (timestamp, id) descending and `after` is the keyset cursor.
+
+        Args:
+            filters: Field -> value equality filters (status, department, ...)
+            date_from: Only complaints with timestamp >= this ISO string
+            date_to: Only complaints with timestamp <= this ISO string
+            after: (timestamp, id) of the last complaint on the previous page
+            limit: Maximum number of complaints to return (all if None)
+            offset: Number of matching complaints to skip
+            exclude_fields: Fields to leave out of each complaint
+        """
+        filters = filters or {}
+
+        def sort_key(c):
+            return sort_timestamp(c.get("timestamp")), str(c.get("id", ""))
+
+        with self._locked():
+            matches = []
+            for c in self._records:
+                if any(c.get(field) != value for field, value in filters.items()):
+                    continue
+                key = sort_key(c)
+                if (date_from and key[0] < date_from) or (date_to and key[0] > date_to):
+                    continue
+                if after is not None and key >= tuple(after):
+                    continue
+                matches.append(c)
+        matches.sort(key=sort_key, reverse=True)
+        end = offset + limit if limit is not None else None
+        excluded = set(exclude_fields)
+        return [{k: v for k, v in c.items() if not k.startswith("_") and k not in excluded}
+                for c in matches[offset:end]]
+
     def get_complaint_by_id(self, complaint_id: str) -> Optional[Dict[str, Any]]:
         """Get a single complaint by ID"""
-        with _file_lock:
-            complaints = self._read_all()
-            for complaint in complaints:
-                if complaint.get("id") == complaint_id:
-                    # Return without internal metadata
-                    return {k: v for k, v in complaint.items() if not k.startswith("_")}
-            return None
-    
+        with self._locked():
+            complaint = self._find(complaint_id)
+            if complaint is None:
+                return None
+            # Return without internal metadata
+            return {k: v for k, v in complaint.items() if not k.startswith("_")}
+
     def update_complaint_status(self, complaint_id: str, new_status: str) -> bool:
         """Update the status of a complaint in fallback storage"""
         try:
-            with _file_lock:
-                complaints = self._read_all()
-                updated = False
-                
-                for complaint in complaints:
-                    if complaint.get("id") == complaint_id:
-                        complaint["status"] = new_status
-                        updated = True
-                        break
-                
+            with self._locked():
+                updated = self._update(complaint_id, {"status": new_status})
                 if updated:
-                    with open(self.filepath, 'w', encoding='utf-8') as f:
-                        json.dump(complaints, f, ensure_ascii=False, indent=2, default=str)
                     logger.info(f"Updated complaint status in fallback: {complaint_id} -> {new_status}")
-                
+
                 return updated
-                
+
+        except Exception as e:
+            logger.exception(f"Failed to update complaint status in fallback: {e}")
+            return False
+
+
+class JournalFallbackStorage(FallbackStorage):
+    """
+    Append-only journal storage for complaints
+
+    Every write appends one NDJSON record to the journal instead of rewriting
+    the whole file. Reads are served from an in-memory view that is rebuilt at
+    startup from the last snapshot (the regular fallback JSON file) plus the
+    journal. Once the journal grows past `compact_every` records it is folded
+    into a fresh snapshot and truncated.
+    """
+
+    def __init__(self, filepath: str = FALLBACK_JSON_PATH,
+                 journal_path: str = FALLBACK_JOURNAL_PATH,
+                 compact_every: int = FALLBACK_JOURNAL_COMPACT_EVERY):
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self._journal_count = 0
+        # Byte offset up to which this process has applied the journal
+        self._journal_offset = 0
+        super().__init__(filepath)
+
+    def _reload(self):
+        """Rebuild the in-memory view from snapshot + journal"""
+        super()._reload()
+
+        self._journal_count = 0
+        self._journal_offset = 0
+        self._read_journal()
+
+        logger.info(f"Fallback journal loaded: {len(self._records)} complaints, "
+                    f"{self._journal_count} journal records")
+
+    def _refresh(self):
+        """Apply journal records appended by other processes since our last access"""
+        if _file_signature(self.filepath) != self._seen_signature:
+            # Another process compacted into a new snapshot
+            self._reload()
+            return
+
+        journal_size = _file_signature(self.journal_path)
+        journal_size = journal_size[2] if journal_size else 0
+        if journal_size < self._journal_offset:
+            self._reload()
+        elif journal_size > self._journal_offset:
+            self._read_journal()
+
+    def _read_journal(self):
+        """Apply journal records from the current offset to the end of the file"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Torn tail from a writer that crashed mid-append; cut it so
+                    # the next append starts on a clean line
+                    logger.warning(f"Discarding torn journal record at byte {self._journal_offset}")
+                    with open(self.journal_path, 'r+b') as tf:
+                        tf.truncate(self._journal_offset)
+                    break
+                self._journal_offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    logger.warning(f"Skipping unreadable journal record before byte {self._journal_offset}")
+                    continue
+                self._apply(entry)
+                self._journal_count += 1
+
+    def _apply(self, entry: Dict[str, Any]):
+        """Apply a single journal record to the in-memory view"""
+        op = entry.get("op")
+        if op == "insert":
+            complaint = entry.get("doc", {})
+            existing = self._find(complaint.get("id"))
+            # Replaying an insert already folded into the snapshot (crash during
+            # compaction) must not duplicate the complaint
+            if existing is not None and \
+                    existing.get("_fallback_saved_at") == complaint.get("_fallback_saved_at"):
+                return
+            self._index(complaint)
+        elif op == "update":
+            position = self._by_id.get(entry.get("id"))
+            if position is not None:
+                self._set_fields(position, entry.get("set", {}))
+        elif op == "update_many":
+            for complaint_id in entry.get("ids", []):
+                position = self._by_id.get(complaint_id)
+                if position is not None:
+                    self._set_fields(position, entry.get("set", {}))
+
+    def _append(self, entry: Dict[str, Any]):
+        """Append a record to the journal"""
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with open(self.journal_path, 'ab') as f:
+            f.write(line.encode('utf-8'))
+            f.flush()
+            if FALLBACK_JOURNAL_FSYNC:
+                os.fsync(f.fileno())
+            self._journal_offset = f.tell()
+        self._journal_count += 1
+
+    def _maybe_compact(self):
+        """Compact once the journal grows past the threshold"""
+        if self.compact_every and self._journal_count >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        """Write the in-memory view as a new snapshot and truncate the journal"""
+        self._replace_file(fsync=True)
+
+        # Snapshot is durable, the journal can start over
+        with open(self.journal_path, 'wb'):
+            pass
+        self._journal_offset = 0
+        logger.info(f"Fallback journal compacted: {len(self._records)} complaints "
+                    f"({self._journal_count} records folded)")
+        self._journal_count = 0
+
+    def _update(self, complaint_id: str, fields: Dict[str, Any]) -> bool:
+        """Journal and apply a field update for one complaint"""
+        position = self._by_id.get(complaint_id)
+        if position is None:
+            return False
+        # Persist first so the view never runs ahead of the journal
+        self._append({"op": "update", "id": complaint_id, "set": fields})
+        self._set_fields(position, fields)
+        self._maybe_compact()
+        return True
+
+    def _update_many(self, complaint_ids: List[str], fields: Dict[str, Any]) -> int:
+        """Journal one record covering a batch update"""
+        known_ids = [cid for cid in complaint_ids if cid in self._by_id]
+        if not known_ids:
+            return 0
+        self._append({"op": "update_many", "ids": known_ids, "set": fields})
+        for complaint_id in known_ids:
+            self._set_fields(self._by_id[complaint_id], fields)
+        self._maybe_compact()
+        return len(known_ids)
+
+    def compact(self):
+        """Force a snapshot + journal truncation"""
+        with self._locked():
+            self._compact()
+
+    def save_complaint(self, complaint: Dict[str, Any]) -> bool:
+        """Append a complaint insert record to the journal"""
+        try:
+            with self._locked():
+                complaint["_fallback_saved_at"] = datetime.utcnow().isoformat()
+                complaint["_sync_status"] = "pending"
+
+                # Round-trip through JSON so the view holds what a restart would load
+                record = json.loads(json.dumps(complaint, ensure_ascii=False, default=str))
+                self._append({"op": "insert", "doc": record})
+                self._index(record)
+                self._maybe_compact()
+
+                logger.info(f"Complaint saved to fallback journal: {complaint.get('id', 'unknown')}")
+                return True
+
+        except Exception as e:
+            logger.exception(f"Failed to save complaint to fallback journal: {e}")
+            return False
+
+
+class SQLiteFallbackStorage(FallbackStorage):
+    """
+    SQLite (WAL mode) fallback storage for complaints
+
+    Indexed columns (`id`, `timestamp`, `status`, `department`, `_sync_status`)
+    sit next to the raw JSON document, so filtering, sorting and pagination run
+    inside SQLite instead of over Python lists. WAL lets readers proceed while a
+    writer commits, and SQLite's own locking makes it safe across processes.
+    On first start an existing fallback JSON file is imported.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS complaints (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT,
+            timestamp TEXT,
+            status TEXT,
+            department TEXT,
+            _sync_status TEXT,
+            doc TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_complaints_id ON complaints(id);
+        CREATE INDEX IF NOT EXISTS idx_complaints_timestamp ON complaints(timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_complaints_status ON complaints(status, timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_complaints_department ON complaints(department, timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_complaints_sync ON complaints(_sync_status, seq);
+    """
+
+    def __init__(self, db_path: str = FALLBACK_SQLITE_PATH, import_from: Optional[str] = FALLBACK_JSON_PATH):
+        self.db_path = db_path
+        self.filepath = db_path
+        self._local = local()
+        conn = self._conn()
+        conn.executescript(self._SCHEMA)
+        if import_from:
+            self._import_json(import_from)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread (and per-process) connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (BEGIN IMMEDIATE takes the write lock up front)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _row_values(record: Dict[str, Any]):
+        return (record.get("id"), sort_timestamp(record.get("timestamp")), record.get("status"),
+                record.get("department"), record.get("_sync_status"),
+                json.dumps(record, ensure_ascii=False, default=str))
+
+    def _insert(self, conn: sqlite3.Connection, records: List[Dict[str, Any]]):
+        conn.executemany(
+            "INSERT INTO complaints (id, timestamp, status, department, _sync_status, doc) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [self._row_values(r) for r in records])
+
+    def _import_json(self, json_path: str):
+        """One-time import of the JSON fallback file into an empty database"""
+        if not os.path.exists(json_path):
+            return
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM complaints LIMIT 1").fetchone():
+                return
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                return
+            self._insert(conn, records)
+        if records:
+            logger.info(f"Imported {len(records)} complaints from {json_path} into {self.db_path}")
+
+    def _update_many(self, complaint_ids: List[str], fields: Dict[str, Any]) -> int:
+        """Apply the same field update to the first complaint with each id"""
+        updated = 0
+        with self._transaction() as conn:
+            for complaint_id in complaint_ids:
+                row = conn.execute("SELECT seq, doc FROM complaints WHERE id = ? ORDER BY seq LIMIT 1",
+                                   (complaint_id,)).fetchone()
+                if row is None:
+                    continue
+                record = json.loads(row[1])
+                record.update(fields)
+                conn.execute("UPDATE complaints SET id = ?, timestamp = ?, status = ?, department = ?, "
+                             "_sync_status = ?, doc = ? WHERE seq = ?",
+                             self._row_values(record) + (row[0],))
+                updated += 1
+        return updated
+
+    def _update(self, complaint_id: str, fields: Dict[str, Any]) -> bool:
+        return self._update_many([complaint_id], fields) == 1
+
+    def save_complaint(self, complaint: Dict[str, Any]) -> bool:
+        """Insert a complaint row"""
+        try:
+            complaint["_fallback_saved_at"] = datetime.utcnow().isoformat()
+            complaint["_sync_status"] = "pending"
+            with self._transaction() as conn:
+                self._insert(conn, [complaint])
+
+            logger.info(f"Complaint saved to fallback SQLite: {complaint.get('id', 'unknown')}")
+            return True
+
+        except Exception as e:
+            logger.exception(f"Failed to save complaint to fallback SQLite: {e}")
+            return False
+
+    def get_pending_sync(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get complaints pending MongoDB sync (oldest first, at most `limit`)"""
+        rows = self._conn().execute(
+            "SELECT doc FROM complaints WHERE _sync_status = 'pending' ORDER BY seq LIMIT ?",
+            (limit if limit is not None else -1,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_pending_count(self) -> int:
+        """Number of complaints pending MongoDB sync"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM complaints WHERE _sync_status = 'pending'").fetchone()[0]
+
+    def mark_synced(self, complaint_id: str) -> bool:
+        """Mark a complaint as synced to MongoDB"""
+        try:
+            updated = self._update(complaint_id, {
+                "_sync_status": "synced",
+                "_synced_at": datetime.utcnow().isoformat()
+            })
+            if updated:
+                logger.info(f"Marked complaint as synced: {complaint_id}")
+            return updated
+
+        except Exception as e:
+            logger.exception(f"Failed to mark complaint as synced: {e}")
+            return False
+
+    def mark_synced_many(self, complaint_ids: List[str]) -> int:
+        """Mark a batch of complaints as synced in a single transaction"""
+        if not complaint_ids:
+            return 0
+        try:
+            updated = self._update_many(complaint_ids, {
+                "_sync_status": "synced",
+                "_synced_at": datetime.utcnow().isoformat()
+            })
+            logger.info(f"Marked {updated} complaints as synced")
+            return updated
+
+        except Exception as e:
+            logger.exception(f"Failed to mark complaints as synced: {e}")
+            return 0
+
+    def get_all_complaints(self) -> List[Dict[str, Any]]:
+        """Get all stored complaints (for admin viewing when DB is down)"""
+        rows = self._conn().execute("SELECT doc FROM complaints ORDER BY seq").fetchall()
+        return [{k: v for k, v in json.loads(row[0]).items() if not k.startswith("_")}
+                for row in rows]
+
+    # Filters that map onto indexed columns; anything else is read from the JSON document
+    _COLUMN_FILTERS = {"id", "status", "department", "_sync_status"}
+
+    def query_complaints(self, filters: Optional[Dict[str, Any]] = None,
+                         date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         after: Optional[Tuple[str, str]] = None,
+                         limit: Optional[int] = None, offset: int = 0,
+                         exclude_fields: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Filtered complaints, newest first, sorted and paginated by SQLite"""
+        clauses, params = [], []
+        for field, value in (filters or {}).items():
+            if field in self._COLUMN_FILTERS:
+                clauses.append(f"{field} = ?")
+                params.append(value)
+            else:
+                clauses.append("json_extract(doc, ?) = ?")
+                params += [f"$.{field}", value]
+        if date_from:
+            clauses.append("timestamp >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("timestamp <= ?")
+            params.append(date_to)
+        if after is not None:
+            clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params += [after[0], after[0], after[1]]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params += [limit if limit is not None else -1, offset]
+
+        rows = self._conn().execute(
+            f"SELECT doc FROM complaints {where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            params).fetchall()
+        excluded = set(exclude_fields)
+        return [{k: v for k, v in json.loads(row[0]).items() if not k.startswith("_") and k not in excluded}
+                for row in rows]
+
+    def get_complaint_by_id(self, complaint_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single complaint by ID"""
+        row = self._conn().execute(
+            "SELECT doc FROM complaints WHERE id = ? ORDER BY seq LIMIT 1", (complaint_id,)).fetchone()
+        if row is None:
+            return None
+        return {k: v for k, v in json.loads(row[0]).items() if not k.startswith("_")}
+
+    def update_complaint_status(self, complaint_id: str, new_status: str) -> bool:
+        """Update the status of a complaint in fallback storage"""
+        try:
+            updated = self._update(complaint_id, {"status": new_status})
+            if updated:
+                logger.info(f"Updated complaint status in fallback: {complaint_id} -> {new_status}")
+            return updated
+
         except Exception as e:
             logger.exception(f"Failed to update complaint status in fallback: {e}")
             return False
 
 
+def _create_storage() -> FallbackStorage:
+    """Build the storage backend selected by FALLBACK_STORAGE_MODE"""
+    if FALLBACK_STORAGE_MODE == "journal":
+        return JournalFallbackStorage()
+    if FALLBACK_STORAGE_MODE == "sqlite":
+        return SQLiteFallbackStorage()
+    if FALLBACK_STORAGE_MODE != "json":
+        logger.warning(f"Unknown FALLBACK_STORAGE_MODE '{FALLBACK_STORAGE_MODE}', using json")
+    return FallbackStorage()
+
+
 # Singleton instance
-fallback_storage = FallbackStorage()
+fallback_storage = _create_storage()
 
 
 def save_complaint_fallback(complaint: Dict[str, Any]) -> bool:
@@ -0,0 +1,194 @@
+"""
+Shared HTTP Client for JantaVoice
+Pooled keep-alive session with retries, backoff and a per-request deadline
+for the external AI APIs (Groq Whisper, OpenRouter)
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive pool: hosts cached, and connections kept per host
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+# Retries after the first attempt on 429/5xx and connection errors
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Absolute time.monotonic() by which the current request chain must finish
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("http_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when the caller's overall time budget is used up"""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Overall time budget for every HTTP call made inside the block
+
+    Nested budgets can only shrink the outer one.
+    """
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(new_deadline, current)
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current deadline (None if no deadline is set)"""
+    current = _deadline.get()
+    if current is None:
+        return None
+    return current - time.monotonic()
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date)"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _rewind_files(files):
+    """Seek file uploads back to the start so a retry resends the whole body"""
+    if not files:
+        return
+    values = files.values() if isinstance(files, dict) else (v for _, v in files)
+    for value in values:
+        fileobj = value[1] if isinstance(value, tuple) and len(value) > 1 else value
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+
+class HTTPClient:
+    """
+    Pooled requests.Session with retry and deadline handling
+
+    Retries 429/5xx responses and connection errors with exponential backoff
+    and full jitter, honouring Retry-After. Each attempt's timeout is capped
+    by the remaining deadline, and no retry is scheduled past it.
+    """
+
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 max_retries: int = HTTP_MAX_RETRIES, backoff_base: float = HTTP_BACKOFF_BASE,
+                 backoff_max: float = HTTP_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "attempts": 0, "retries": 0, "deadline_exceeded": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _sleep_before_retry(self, delay: float) -> bool:
+        """Sleep unless that would overrun the deadline"""
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            return False
+        time.sleep(delay)
+        return True
+
+    def request(self, method: str, url: str, timeout: float = 30, **kwargs) -> requests.Response:
+        """
+        Send a request with retries
+
+        Args:
+            timeout: Per-attempt timeout in seconds (capped by the deadline)
+
+        Returns:
+            The final response (possibly a 429/5xx once retries run out)
+
+        Raises:
+            DeadlineExceeded: if the deadline expires before a response arrives
+            requests.RequestException: if the last attempt fails to connect
+        """
+        self._count("requests")
+        attempt = 0
+        while True:
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded(f"Deadline exceeded before {method} {url}")
+            attempt_timeout = timeout if remaining is None else min(timeout, remaining)
+
+            _rewind_files(kwargs.get("files"))
+            self._count("attempts")
+            try:
+                response = self.session.request(method, url, timeout=attempt_timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries or not self._sleep_before_retry(self._backoff(attempt)):
+                    if remaining is not None and attempt_timeout < timeout:
+                        self._count("deadline_exceeded")
+                        raise DeadlineExceeded(f"Deadline exceeded during {method} {url}") from e
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying")
+                attempt += 1
+                self._count("retries")
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+
+            retry_after = _retry_after_seconds(response)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if delay > self.backoff_max or not self._sleep_before_retry(delay):
+                # Server asked us to wait longer than we can afford
+                return response
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            response.close()
+            attempt += 1
+            self._count("retries")
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+# Singleton instance shared by all AI services
+http_client = HTTPClient()
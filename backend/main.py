@@ -1,11 +1,23 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from contextlib import asynccontextmanager
-from models import ExtensionState
+from models import ExtensionState, WebSocketMessage
 from services import ClassifierService
+import asyncio
 import uvicorn
 import json
+import uuid
+import os
+
+# How long a page that needs the LLM waits for a newer state from the same
+# tab before it is classified (0 disables debouncing)
+WS_DEBOUNCE_SECONDS = float(os.getenv("WS_DEBOUNCE_MS", "100")) / 1000
 
 classifier = ClassifierService()
+# connections_total counts every connection ever accepted; active is the current number
+ws_stats = {"connections_total": 0, "active": 0, "messages": 0, "superseded": 0}
+
+def metrics_snapshot() -> dict:
+    return {**classifier.metrics(), "websocket": dict(ws_stats)}
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -14,31 +26,86 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(title="Productivity Socket API", version="2.0.0", lifespan=lifespan)
 
+@app.get("/metrics")
+async def metrics():
+    return metrics_snapshot()
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     print("Extension Connected.")
+    ws_stats["connections_total"] += 1
+    ws_stats["active"] += 1
+
+    # Each message is classified in its own task so a slow LLM call doesn't
+    # hold up the next one; responses carry the request_id they answer
+    in_flight = set()
+    send_lock = asyncio.Lock()
+    # Only the latest state per tab (or per connection without tab_id) matters:
+    # tab -> (request_id, task) of the one still being classified
+    latest = {}
+    # History is kept per connection unless the extension sends a stable session_id
+    connection_id = f"conn-{uuid.uuid4().hex}"
+
+    async def send(message: WebSocketMessage):
+        try:
+            async with send_lock:
+                await websocket.send_text(message.model_dump_json())
+        except Exception as e:
+            print(f"Send Error ({message.request_id}): {e}")
+
+    async def handle(state: ExtensionState, tab: str):
+        # 2. Process with LLM (off the event loop)
+        response_msg = await classifier.aprocess_state(state, state.session_id or connection_id,
+                                                       debounce=WS_DEBOUNCE_SECONDS)
+        # Answered, so a newer state can no longer cancel this one mid-send
+        if latest.get(tab, (None, None))[1] is asyncio.current_task():
+            del latest[tab]
+
+        # 3. Push Actions back as soon as they're ready
+        await send(response_msg)
+
     try:
         while True:
             # 1. Receive State from Extension
             data = await websocket.receive_text()
             try:
                 state_dict = json.loads(data)
+                if state_dict.get("type") == "metrics":
+                    async with send_lock:
+                        await websocket.send_text(json.dumps({"type": "metrics", **metrics_snapshot()}))
+                    continue
                 # Map incoming JSON to our Pydantic Model
                 state = ExtensionState(**state_dict)
-                
-                # 2. Process with LLM
-                response_msg = classifier.process_state(state)
-                
-                # 3. Push Actions back immediately
-                await websocket.send_text(response_msg.model_dump_json())
-                
             except Exception as e:
                 print(f"Processing Error: {e}")
-                # Optional: Send error back or just log
-                
+                continue
+            ws_stats["messages"] += 1
+
+            # A newer state for the tab replaces the one still in progress; the
+            # older request_id still gets an (empty) answer so queues drain
+            tab = state.tab_id or ""
+            if tab in latest:
+                old_request_id, old_task = latest.pop(tab)
+                old_task.cancel()
+                ws_stats["superseded"] += 1
+                await send(WebSocketMessage(request_id=old_request_id or "unknown", actions=[],
+                                            decision="allow", confidence=0.0, superseded=True))
+
+            task = asyncio.create_task(handle(state, tab))
+            latest[tab] = (state.request_id, task)
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
     except WebSocketDisconnect:
         print("Extension Disconnected.")
+    finally:
+        ws_stats["active"] -= 1
+        # Nobody is listening for these answers any more
+        for task in in_flight:
+            task.cancel()
+        # Nobody can come back to a connection-keyed session
+        await asyncio.to_thread(classifier.sessions.drop, connection_id, True)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -4,6 +4,8 @@ from typing import List, Optional, Literal
 # --- INPUT: Data sent FROM Extension via WebSocket ---
 class ExtensionState(BaseModel):
     request_id: Optional[str] = Field(None, description="Unique ID for this request to handle async ordering")
+    session_id: Optional[str] = Field(None, description="Stable ID (e.g. per browser profile) so history survives reconnects")
+    tab_id: Optional[str] = Field(None, description="Browser tab; a newer state for the same tab supersedes older ones")
     url: str
     title: str = "Unknown Page"
     page_type: str = Field("unknown", description="video, feed, article, social, search, other")
@@ -47,3 +49,4 @@ class WebSocketMessage(BaseModel):
     actions: List[Action]
     decision: Literal["allow", "warn", "filter", "block", "redirect"] = "allow"
     confidence: float = Field(1.0, ge=0.0, le=1.0)
+    superseded: bool = Field(False, description="Not classified: a newer state for the same tab replaced it")
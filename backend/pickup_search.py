@@ -0,0 +1,144 @@
+"""
+Pickup Request Search for JantaVoice
+Normalized search fields and index-backed queries for /api/pickup/search
+"""
+
+import os
+import re
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Edge n-gram autocomplete on name/address words (prefix matches through a multikey index).
+# When disabled, name/address search falls back to the MongoDB text index (whole words only).
+PICKUP_SEARCH_NGRAMS = os.getenv("PICKUP_SEARCH_NGRAMS", "true").lower() == "true"
+NGRAM_MIN_LENGTH = 2
+NGRAM_MAX_LENGTH = 15
+MAX_SEARCH_LENGTH = 100
+
+# Marker document (in the migrations collection) recording that the backfill ran;
+# n-gram mode needs its own run because it also fills searchPrefixes
+SEARCH_BACKFILL_MARKER = "pickup_search_fields" + ("_ngrams" if PICKUP_SEARCH_NGRAMS else "")
+
+# Stored alongside each pickup; never returned to clients
+SEARCH_FIELDS = ("phoneNormalized", "idNormalized", "searchPrefixes")
+SEARCH_FIELDS_PROJECTION = {field: 0 for field in SEARCH_FIELDS}
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PHONE_LIKE_RE = re.compile(r"^[\d\s+\-()]+$")
+
+
+def normalize_phone(value) -> str:
+    """National digits only, so '+91 98765-43210' and '9876543210' share a prefix"""
+    value = str(value or "").strip()
+    digits = re.sub(r"\D", "", value)
+    if value.startswith("+") and digits.startswith("91"):
+        return digits[2:]
+    if len(digits) == 12 and digits.startswith("91"):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith("0"):
+        return digits[1:]
+    return digits
+
+
+def normalize_pickup_id(value) -> str:
+    """Upper-case alphanumerics, so 'pickup-123' matches 'PICKUP123...'"""
+    return re.sub(r"[^0-9A-Z]", "", str(value or "").upper())
+
+
+def edge_ngrams(*texts) -> List[str]:
+    """Lower-cased word prefixes of NGRAM_MIN_LENGTH..NGRAM_MAX_LENGTH characters"""
+    prefixes = set()
+    for text in texts:
+        for word in _WORD_RE.findall(str(text or "").lower()):
+            for size in range(NGRAM_MIN_LENGTH, min(len(word), NGRAM_MAX_LENGTH) + 1):
+                prefixes.add(word[:size])
+    return sorted(prefixes)
+
+
+def build_search_fields(pickup: Dict[str, Any]) -> Dict[str, Any]:
+    """Derived fields to store on a pickup document"""
+    fields = {
+        "phoneNormalized": normalize_phone(pickup.get("phone")),
+        "idNormalized": normalize_pickup_id(pickup.get("id")),
+    }
+    if PICKUP_SEARCH_NGRAMS:
+        fields["searchPrefixes"] = edge_ngrams(pickup.get("name"), pickup.get("address"))
+    return fields
+
+
+def build_search_query(term: str) -> Optional[Dict[str, Any]]:
+    """
+    Translate a user search term into an index-backed query
+
+    Phone and ID use anchored, case-sensitive prefix regexes on normalized
+    fields (index range scans); name/address use the n-gram index or the
+    text index. User input is never interpreted as a regex.
+
+    Returns None when the term has nothing indexable (e.g. a single character).
+    """
+    term = term.strip()[:MAX_SEARCH_LENGTH]
+    clauses = []
+
+    digits = normalize_phone(term)
+    if _PHONE_LIKE_RE.match(term) and len(digits) >= 3:
+        clauses.append({"phoneNormalized": {"$regex": f"^{re.escape(digits)}"}})
+
+    pickup_id = normalize_pickup_id(term)
+    if pickup_id:
+        if pickup_id.isdigit():
+            pickup_id = f"PICKUP{pickup_id}"
+        if pickup_id.startswith("PICKUP") and len(pickup_id) > len("PICKUP"):
+            clauses.append({"idNormalized": {"$regex": f"^{re.escape(pickup_id)}"}})
+
+    words = [w[:NGRAM_MAX_LENGTH] for w in _WORD_RE.findall(term.lower()) if len(w) >= NGRAM_MIN_LENGTH]
+    if words:
+        if PICKUP_SEARCH_NGRAMS:
+            clauses.append({"searchPrefixes": {"$all": words}})
+        else:
+            clauses.append({"$text": {"$search": " ".join(f'"{w}"' for w in words)}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def backfill_search_fields(collection, batch_size: int = 500) -> int:
+    """Populate search fields on pickups created before they existed"""
+    missing = {"phoneNormalized": {"$exists": False}}
+    if PICKUP_SEARCH_NGRAMS:
+        missing = {"$or": [missing, {"searchPrefixes": {"$exists": False}}]}
+
+    updated = 0
+    batch = []
+    for pickup in collection.find(missing, {"id": 1, "phone": 1, "name": 1, "address": 1}):
+        batch.append(UpdateOne({"_id": pickup["_id"]}, {"$set": build_search_fields(pickup)}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+
+    if updated:
+        logger.info(f"Backfilled search fields on {updated} pickup requests")
+    return updated
+
+
+def backfill_search_fields_once(collection, migrations) -> int:
+    """
+    Run backfill_search_fields unless the marker document says it already ran
+
+    The backfill scans the whole collection, so it runs once per database
+    rather than on every (re)connect of every worker. Pickups created since
+    get their search fields on insert.
+    """
+    if migrations.find_one({"_id": SEARCH_BACKFILL_MARKER}) is not None:
+        return 0
+    updated = backfill_search_fields(collection)
+    migrations.update_one({"_id": SEARCH_BACKFILL_MARKER},
+                          {"$set": {"completed_at": datetime.utcnow(), "updated": updated}}, upsert=True)
+    return updated
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, session, jsonify
-from config import complaints_collection
+import config
 from bson.objectid import ObjectId
+from utils.pagination import encode_cursor, decode_cursor, parse_page_size, parse_date
 import logging
 
 # Setup logging
@@ -16,7 +17,7 @@ ADMIN_PASSWORD = "admin123"
 # Check if database is available
 def is_database_available():
     """Check if MongoDB is available"""
-    return complaints_collection is not None
+    return config.complaints_collection is not None
 
 # 🔐 Admin Login route
 @admin_routes.route("/api/admin/login", methods=["POST"])
@@ -35,20 +36,77 @@ def admin_logout():
     session.pop("admin_logged_in", None)
     return jsonify({"success": True, "message": "Logged out successfully."})
 
+# Query parameters accepted as equality filters on /api/admin/complaints
+COMPLAINT_FILTER_FIELDS = ("status", "department", "urgency", "type", "category")
+# Heavy fields left out of list views (?view=list)
+LIST_VIEW_EXCLUDED_FIELDS = ("description", "transcript_hindi")
+
 # 📅 Get all complaints route
 @admin_routes.route("/api/admin/complaints", methods=["GET"])
 def get_all_complaints():
-    """Fetches all complaints from the database and returns them, sorted by timestamp."""
+    """
+    Fetches complaints sorted by timestamp (newest first).
+
+    Optional query parameters:
+    - status, department, urgency, type, category: equality filters
+    - from, to: date range on timestamp (YYYY-MM-DD or ISO datetime)
+    - view=list: omit descriptions and transcripts
+    - limit, cursor: keyset pagination on (timestamp, _id); pass back
+      pagination.next_cursor to get the next page. Without either, all
+      matching complaints are returned as before.
+    """
     try:
         # Check for admin session
         if not session.get("admin_logged_in"):
             return jsonify({"success": False, "message": "Unauthorized"}), 401
 
+        filters = {field: request.args[field] for field in COMPLAINT_FILTER_FIELDS
+                   if request.args.get(field)}
+        try:
+            date_from = parse_date(request.args.get("from"))
+            date_to = parse_date(request.args.get("to"), end_of_day=True)
+            after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        except ValueError as e:
+            return jsonify({"success": False, "message": f"Invalid query parameter: {e}"}), 400
+
+        paginate = "limit" in request.args or after is not None
+        limit = parse_page_size(request.args.get("limit")) if paginate else None
+        excluded = LIST_VIEW_EXCLUDED_FIELDS if request.args.get("view") == "list" else ()
+
         complaints = []
         
         # Try MongoDB first
         if is_database_available():
-            complaints = list(complaints_collection.find({}).sort("timestamp", -1))
+            clauses = [filters] if filters else []
+            if date_from or date_to:
+                time_range = {}
+                if date_from:
+                    time_range["$gte"] = date_from
+                if date_to:
+                    time_range["$lte"] = date_to
+                clauses.append({"timestamp": time_range})
+            if after is not None:
+                last_timestamp, last_id = after
+                if not ObjectId.is_valid(last_id):
+                    return jsonify({"success": False, "message": "Invalid query parameter: Invalid cursor"}), 400
+                clauses.append({"$or": [
+                    {"timestamp": {"$lt": last_timestamp}},
+                    {"timestamp": last_timestamp, "_id": {"$lt": ObjectId(last_id)}}
+                ]})
+            query = {"$and": clauses} if len(clauses) > 1 else (clauses[0] if clauses else {})
+            projection = {field: 0 for field in excluded} or None
+
+            cursor = (config.complaints_collection.find(query, projection)
+                      .sort([("timestamp", -1), ("_id", -1)]))
+            if limit is not None:
+                # One extra row tells us whether another page exists
+                cursor = cursor.limit(limit + 1)
+            complaints = list(cursor)
+
+            next_cursor = None
+            if limit is not None and len(complaints) > limit:
+                complaints = complaints[:limit]
+                next_cursor = encode_cursor(complaints[-1].get("timestamp"), complaints[-1]["_id"])
             
             # Convert ObjectId to string for JSON serialization
             for complaint in complaints:
@@ -57,18 +115,35 @@ def get_all_complaints():
                 complaint["longitude"] = complaint.get("longitude")
                 complaint["location"] = complaint.get("location")
         else:
-            # Fallback to JSON storage
+            # Fallback storage: filtering, sorting and paging happen in the storage engine
             logger.warning("Database not available - using fallback storage")
-            from fallback_storage import get_fallback_complaints
-            complaints = get_fallback_complaints()
-            # Sort by timestamp (descending)
-            complaints.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+            from fallback_storage import fallback_storage, sort_timestamp
+            complaints = fallback_storage.query_complaints(
+                filters=filters,
+                date_from=date_from.isoformat() if date_from else None,
+                date_to=date_to.isoformat() if date_to else None,
+                after=(sort_timestamp(after[0]), after[1]) if after is not None else None,
+                limit=limit + 1 if limit is not None else None,
+                exclude_fields=excluded
+            )
 
-        return jsonify({
+            next_cursor = None
+            if limit is not None and len(complaints) > limit:
+                complaints = complaints[:limit]
+                next_cursor = encode_cursor(complaints[-1].get("timestamp"), complaints[-1].get("id"))
+
+        response = {
             "success": True,
             "complaints": complaints,
             "source": "mongodb" if is_database_available() else "fallback"
-        }), 200
+        }
+        if paginate:
+            response["pagination"] = {
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            }
+        return jsonify(response), 200
     except Exception as e:
         logger.error(f"Error fetching complaints: {e}")
         return jsonify({
@@ -95,7 +170,7 @@ def update_status():
     
     # Try MongoDB first
     if is_database_available():
-        result = complaints_collection.update_one(
+        result = config.complaints_collection.update_one(
             {"id": complaint_id},
             {"$set": {"status": new_status}}
         )
@@ -103,7 +178,7 @@ def update_status():
             updated = True
         else:
             # Check if already has same status
-            exists = complaints_collection.find_one({"id": complaint_id})
+            exists = config.complaints_collection.find_one({"id": complaint_id})
             if exists:
                 updated = True
     
@@ -116,3 +191,24 @@ def update_status():
         return jsonify({"success": True, "message": f"Status updated to {new_status}."})
     else:
         return jsonify({"success": False, "message": "Complaint not found."}), 404
+
+# 🔄 Fallback sync progress route
+@admin_routes.route("/api/admin/sync-status", methods=["GET"])
+def sync_status():
+    """Returns the fallback-to-MongoDB sync worker's progress counters."""
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    from sync_worker import sync_worker
+    return jsonify({"success": True, "sync": sync_worker.stats()}), 200
+
+# ▶️ Trigger a fallback sync run immediately
+@admin_routes.route("/api/admin/sync", methods=["POST"])
+def trigger_sync():
+    """Runs one fallback sync pass now instead of waiting for the next interval."""
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    from sync_worker import sync_worker
+    result = sync_worker.run_once()
+    return jsonify({"success": "error" not in result, "result": result, "sync": sync_worker.stats()}), 200
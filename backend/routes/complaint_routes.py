@@ -1,5 +1,5 @@
 from flask import send_from_directory, Blueprint, request, jsonify, session
-from config import complaints_collection
+import config
 from utils.generate_id import generate_complaint_id, generate_token
 import datetime
 import os
@@ -17,7 +17,7 @@ complaint_routes = Blueprint("complaint_routes", __name__)
 # Check if database is available
 def is_database_available():
     """Check if MongoDB is available"""
-    return complaints_collection is not None
+    return config.complaints_collection is not None
 
 # ------------------ Serve uploaded files ------------------
 @complaint_routes.route('/uploads/<filename>')
@@ -116,7 +116,7 @@ def submit_complaint():
 
         # Try to save to database, fallback to JSON if unavailable
         if is_database_available():
-            inserted = complaints_collection.insert_one(complaint)
+            inserted = config.complaints_collection.insert_one(complaint)
             logger.info(f"Complaint saved to MongoDB: {complaint_id}")
         else:
             # Use fallback storage when MongoDB is unavailable
@@ -224,7 +224,7 @@ def submit_women_child_complaint():
                 "status": "Pending"
             }
         
-        inserted = complaints_collection.insert_one(complaint)
+        inserted = config.complaints_collection.insert_one(complaint)
 
         return jsonify({
             "success": True,
@@ -253,7 +253,7 @@ def update_complaint_status():
         if not complaint_id or not new_status:
             return jsonify({"success": False, "message": "Invalid input"}), 400
 
-        result = complaints_collection.update_one(
+        result = config.complaints_collection.update_one(
             {"id": complaint_id},
             {"$set": {"status": new_status}}
         )
@@ -279,7 +279,7 @@ def get_complaint_status(complaint_id):
         
         # Try MongoDB first
         if is_database_available():
-            complaint = complaints_collection.find_one({"id": complaint_id})
+            complaint = config.complaints_collection.find_one({"id": complaint_id})
             if complaint:
                 complaint.pop('_id', None)
                 complaint.pop('token', None)
@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify
-from config import pickup_collection
+from bson.objectid import ObjectId
+import config
 from utils.generate_id import generate_pickup_id
+from utils.pagination import encode_cursor, decode_cursor, parse_page_size
+from utils.ttl_cache import TTLCache
+from pickup_search import build_search_fields, build_search_query, SEARCH_FIELDS_PROJECTION
 import datetime
 import logging
+import os
 import traceback
 
 # Setup logging
@@ -10,10 +15,25 @@ logger = logging.getLogger(__name__)
 
 pickup_routes = Blueprint("pickup_routes", __name__)
 
+# Dashboard stats are polled every few seconds; serve them from a short-lived
+# cache that create/status-update routes invalidate. With several workers each
+# process keeps its own copy, so other workers may lag by up to the TTL.
+PICKUP_STATS_CACHE_TTL = float(os.getenv("PICKUP_STATS_CACHE_TTL", "5"))
+PICKUP_STATS_CACHE_KEY = "pickup_stats"
+pickup_stats_cache = TTLCache(ttl=PICKUP_STATS_CACHE_TTL, maxsize=4)
+
+STATUS_COUNT_KEYS = {
+    "Pending": "pending",
+    "Confirmed": "confirmed",
+    "In Progress": "inProgress",
+    "Completed": "completed",
+    "Cancelled": "cancelled"
+}
+
 # Check if database is available
 def is_database_available():
     """Check if MongoDB is available"""
-    return pickup_collection is not None
+    return config.pickup_collection is not None
 
 # ------------------ Create Pickup Request ------------------
 @pickup_routes.route("/api/pickup/request", methods=["POST"])
@@ -64,14 +84,16 @@ def create_pickup_request():
             "pickupTime": None,
             "notes": []
         }
+        pickup_request.update(build_search_fields(pickup_request))
 
         # Insert into database
-        result = pickup_collection.insert_one(pickup_request)
+        result = config.pickup_collection.insert_one(pickup_request)
         
         if result.inserted_id:
+            pickup_stats_cache.invalidate(PICKUP_STATS_CACHE_KEY)
             logger.info(f"Pickup request created successfully: {pickup_id}")
             # Create a clean response without ObjectId
-            response_data = pickup_request.copy()
+            response_data = {k: v for k, v in pickup_request.items() if k not in SEARCH_FIELDS_PROJECTION}
             response_data["_id"] = str(result.inserted_id)
             return jsonify({
                 "success": True,
@@ -98,6 +120,13 @@ def create_pickup_request():
 def get_all_pickup_requests():
     """
     Get all pickup requests (for admin dashboard)
+
+    Pagination:
+    - cursor: keyset pagination on (createdAt, _id); pass back
+      pagination.next_cursor to get the next page
+    - page: legacy offset pagination (used when no cursor is given)
+    - total=true|false: include the total count (default: true for page,
+      false for cursor). Unfiltered totals use the estimated collection count.
     """
     try:
         if not is_database_available():
@@ -127,19 +156,43 @@ def get_all_pickup_requests():
                     "$lte": end_of_week.strftime("%Y-%m-%d")
                 }
 
-        # Get pickup requests with pagination
-        page = int(request.args.get("page", 1))
-        limit = int(request.args.get("limit", 20))
-        skip = (page - 1) * limit
-
-        # Get total count
-        total_count = pickup_collection.count_documents(filter_query)
-        
-        # Get pickup requests
-        pickup_requests = list(pickup_collection.find(filter_query)
-                             .sort("createdAt", -1)
+        limit = parse_page_size(request.args.get("limit"), default=20)
+        cursor_token = request.args.get("cursor")
+        try:
+            after = decode_cursor(cursor_token) if cursor_token else None
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        if after is not None and not ObjectId.is_valid(after[1]):
+            return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+        query = filter_query
+        skip = 0
+        page = None
+        if after is not None:
+            last_created_at, last_id = after
+            keyset = {"$or": [
+                {"createdAt": {"$lt": last_created_at}},
+                {"createdAt": last_created_at, "_id": {"$lt": ObjectId(last_id)}}
+            ]}
+            query = {"$and": [filter_query, keyset]} if filter_query else keyset
+        else:
+            try:
+                page = max(1, int(request.args.get("page", 1)))
+            except ValueError:
+                page = 1
+            skip = (page - 1) * limit
+
+        # Get pickup requests (one extra row tells us whether another page exists)
+        pickup_requests = list(config.pickup_collection.find(query, SEARCH_FIELDS_PROJECTION)
+                             .sort([("createdAt", -1), ("_id", -1)])
                              .skip(skip)
-                             .limit(limit))
+                             .limit(limit + 1))
+        has_more = len(pickup_requests) > limit
+        pickup_requests = pickup_requests[:limit]
+        next_cursor = None
+        if has_more:
+            last = pickup_requests[-1]
+            next_cursor = encode_cursor(last["createdAt"], last["_id"])
 
         # Convert ObjectId to string for JSON serialization
         for pickup_request in pickup_requests:
@@ -147,15 +200,27 @@ def get_all_pickup_requests():
             pickup_request["createdAt"] = pickup_request["createdAt"].isoformat()
             pickup_request["updatedAt"] = pickup_request["updatedAt"].isoformat()
 
+        pagination = {
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
+        if page is not None:
+            pagination["page"] = page
+
+        include_total = request.args.get("total", "true" if after is None else "false").lower() == "true"
+        if include_total:
+            if filter_query:
+                total_count = config.pickup_collection.count_documents(filter_query)
+            else:
+                total_count = config.pickup_collection.estimated_document_count()
+            pagination["total"] = total_count
+            pagination["pages"] = (total_count + limit - 1) // limit
+
         return jsonify({
             "success": True,
             "data": pickup_requests,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total_count,
-                "pages": (total_count + limit - 1) // limit
-            }
+            "pagination": pagination
         }), 200
 
     except Exception as e:
@@ -179,7 +244,7 @@ def get_pickup_request(pickup_id):
                 "message": "Database not available. Please try again later."
             }), 503
 
-        pickup_request = pickup_collection.find_one({"id": pickup_id})
+        pickup_request = config.pickup_collection.find_one({"id": pickup_id}, SEARCH_FIELDS_PROJECTION)
         
         if not pickup_request:
             return jsonify({
@@ -244,7 +309,7 @@ def update_pickup_status(pickup_id):
 
         # Add notes if provided
         if notes:
-            update_data["notes"] = pickup_collection.find_one({"id": pickup_id}).get("notes", []) + [{
+            update_data["notes"] = config.pickup_collection.find_one({"id": pickup_id}).get("notes", []) + [{
                 "text": notes,
                 "timestamp": datetime.datetime.utcnow().isoformat(),
                 "status": new_status
@@ -256,12 +321,13 @@ def update_pickup_status(pickup_id):
             update_data["pickupTime"] = data.get("pickupTime")
             update_data["assignedDriver"] = data.get("assignedDriver")
 
-        result = pickup_collection.update_one(
+        result = config.pickup_collection.update_one(
             {"id": pickup_id},
             {"$set": update_data}
         )
 
         if result.modified_count > 0:
+            pickup_stats_cache.invalidate(PICKUP_STATS_CACHE_KEY)
             logger.info(f"Pickup request {pickup_id} status updated to {new_status}")
             return jsonify({
                 "success": True,
@@ -282,6 +348,67 @@ def update_pickup_status(pickup_id):
         }), 500
 
 # ------------------ Get Pickup Statistics ------------------
+def build_pickup_stats_pipeline(now=None):
+    """
+    Single aggregation computing every dashboard counter in one round trip
+    """
+    today = (now or datetime.datetime.utcnow()).date()
+    start_of_today = datetime.datetime.combine(today, datetime.time.min)
+    start_of_tomorrow = start_of_today + datetime.timedelta(days=1)
+    start_of_week = datetime.datetime.combine(today - datetime.timedelta(days=today.weekday()), datetime.time.min)
+    end_of_week = start_of_week + datetime.timedelta(days=7)
+
+    return [
+        {"$facet": {
+            "statusCounts": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ],
+            "timeBased": [
+                {"$match": {"createdAt": {"$gte": start_of_week, "$lt": end_of_week}}},
+                {"$group": {
+                    "_id": None,
+                    "thisWeek": {"$sum": 1},
+                    "today": {"$sum": {"$cond": [
+                        {"$and": [
+                            {"$gte": ["$createdAt", start_of_today]},
+                            {"$lt": ["$createdAt", start_of_tomorrow]}
+                        ]}, 1, 0
+                    ]}}
+                }}
+            ],
+            "materialDistribution": [
+                {"$unwind": "$materials"},
+                {"$group": {"_id": "$materials", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ]
+        }}
+    ]
+
+def compute_pickup_statistics(collection, now=None):
+    """
+    Run the stats aggregation and shape it for the admin dashboard
+    """
+    result = next(collection.aggregate(build_pickup_stats_pipeline(now)), {})
+
+    status_counts = {key: 0 for key in STATUS_COUNT_KEYS.values()}
+    total_requests = 0
+    for group in result.get("statusCounts", []):
+        total_requests += group["count"]
+        if group["_id"] in STATUS_COUNT_KEYS:
+            status_counts[STATUS_COUNT_KEYS[group["_id"]]] = group["count"]
+
+    time_based = (result.get("timeBased") or [{}])[0]
+
+    return {
+        "totalRequests": total_requests,
+        "statusCounts": status_counts,
+        "timeBased": {
+            "today": time_based.get("today", 0),
+            "thisWeek": time_based.get("thisWeek", 0)
+        },
+        "materialDistribution": result.get("materialDistribution", [])
+    }
+
 @pickup_routes.route("/api/pickup/stats", methods=["GET"])
 def get_pickup_statistics():
     """
@@ -294,56 +421,10 @@ def get_pickup_statistics():
                 "message": "Database not available. Please try again later."
             }), 503
 
-        # Get total counts by status
-        total_pending = pickup_collection.count_documents({"status": "Pending"})
-        total_confirmed = pickup_collection.count_documents({"status": "Confirmed"})
-        total_in_progress = pickup_collection.count_documents({"status": "In Progress"})
-        total_completed = pickup_collection.count_documents({"status": "Completed"})
-        total_cancelled = pickup_collection.count_documents({"status": "Cancelled"})
-        total_requests = pickup_collection.count_documents({})
-
-        # Get today's requests
-        today = datetime.datetime.utcnow().date()
-        today_requests = pickup_collection.count_documents({
-            "createdAt": {
-                "$gte": datetime.datetime.combine(today, datetime.time.min),
-                "$lt": datetime.datetime.combine(today, datetime.time.max)
-            }
-        })
-
-        # Get this week's requests
-        start_of_week = today - datetime.timedelta(days=today.weekday())
-        end_of_week = start_of_week + datetime.timedelta(days=6)
-        week_requests = pickup_collection.count_documents({
-            "createdAt": {
-                "$gte": datetime.datetime.combine(start_of_week, datetime.time.min),
-                "$lt": datetime.datetime.combine(end_of_week, datetime.time.max)
-            }
-        })
-
-        # Get material distribution
-        pipeline = [
-            {"$unwind": "$materials"},
-            {"$group": {"_id": "$materials", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        material_stats = list(pickup_collection.aggregate(pipeline))
-
-        stats = {
-            "totalRequests": total_requests,
-            "statusCounts": {
-                "pending": total_pending,
-                "confirmed": total_confirmed,
-                "inProgress": total_in_progress,
-                "completed": total_completed,
-                "cancelled": total_cancelled
-            },
-            "timeBased": {
-                "today": today_requests,
-                "thisWeek": week_requests
-            },
-            "materialDistribution": material_stats
-        }
+        stats = pickup_stats_cache.get_or_set(
+            PICKUP_STATS_CACHE_KEY,
+            lambda: compute_pickup_statistics(config.pickup_collection)
+        )
 
         return jsonify({
             "success": True,
@@ -378,18 +459,17 @@ def search_pickup_requests():
                 "message": "Search term is required"
             }), 400
 
-        # Build search query
-        search_query = {
-            "$or": [
-                {"name": {"$regex": search_term, "$options": "i"}},
-                {"phone": {"$regex": search_term, "$options": "i"}},
-                {"address": {"$regex": search_term, "$options": "i"}},
-                {"id": {"$regex": search_term, "$options": "i"}}
-            ]
-        }
+        # Build an index-backed search query (input is escaped, never run as a regex)
+        search_query = build_search_query(search_term)
+        if search_query is None:
+            return jsonify({
+                "success": True,
+                "data": [],
+                "count": 0
+            }), 200
 
         # Get search results
-        results = list(pickup_collection.find(search_query)
+        results = list(config.pickup_collection.find(search_query, SEARCH_FIELDS_PROJECTION)
                       .sort("createdAt", -1)
                       .limit(20))
 
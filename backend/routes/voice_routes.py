@@ -11,9 +11,12 @@ import uuid
 from datetime import datetime
 
 # Import AI services
-from ai_services import transcribe_hindi_audio, extract_fields_from_complaint
+from ai_services import transcribe_hindi_audio, extract_fields_from_complaint, openrouter_service, whisper_service
 from fallback_storage import save_complaint_fallback
-from config import complaints_collection
+from voice_jobs import voice_job_queue, QueueFullError, VOICE_JOBS_ENABLED
+from http_client import deadline
+from transcription_cache import save_and_hash
+import config
 from utils.generate_id import generate_complaint_id, generate_token
 
 voice_routes = Blueprint('voice_routes', __name__)
@@ -28,6 +31,12 @@ os.makedirs(AUDIO_UPLOAD_FOLDER, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'webm', 'ogg', 'm4a', 'flac'}
 
+# Overall time budget for transcription + extraction of one complaint
+VOICE_PIPELINE_DEADLINE = float(os.getenv("VOICE_PIPELINE_DEADLINE", "90"))
+
+# Seconds clients are asked to wait when the async queue is full
+VOICE_QUEUE_RETRY_AFTER = int(os.getenv("VOICE_QUEUE_RETRY_AFTER", "30"))
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -36,7 +45,138 @@ def allowed_file(filename):
 
 def is_database_available():
     """Check if MongoDB is available"""
-    return complaints_collection is not None
+    return config.complaints_collection is not None
+
+
+def process_voice_complaint(payload, set_stage=lambda stage: None):
+    """
+    Transcribe, extract and save a voice complaint whose audio is already on disk
+
+    Shared by the synchronous endpoint and the async job workers. All AI calls
+    share one VOICE_PIPELINE_DEADLINE budget.
+
+    Args:
+        payload: audio_path, audio_filename and optional name/phone from the form;
+            a 'transcript' already produced elsewhere (e.g. by the streaming
+            intake) skips transcription
+        set_stage: Called with the name of each pipeline stage as it starts
+
+    Returns:
+        (response body, HTTP status)
+    """
+    with deadline(VOICE_PIPELINE_DEADLINE):
+        return _run_voice_pipeline(payload, set_stage)
+
+
+def _run_voice_pipeline(payload, set_stage):
+    audio_path = payload["audio_path"]
+    unique_filename = payload["audio_filename"]
+
+    # Step 1: Transcribe audio using OpenAI Whisper
+    if payload.get("transcript") is not None:
+        transcription_result = {"success": True, "transcript": payload["transcript"], "cached": False}
+    else:
+        set_stage("transcribing")
+        logger.info("Starting transcription...")
+        transcription_result = transcribe_hindi_audio(audio_path, audio_hash=payload.get("audio_sha256"))
+    
+    if not transcription_result.get("success"):
+        return {
+            "success": False,
+            "error": "Failed to transcribe audio",
+            "details": transcription_result.get("error")
+        }, 500
+    
+    transcript = transcription_result.get("transcript", "")
+    logger.info(f"Transcription complete: {transcript[:100]}...")
+    
+    # Step 2: Extract fields using OpenRouter LLM
+    set_stage("extracting")
+    logger.info("Extracting fields...")
+    extraction_result = extract_fields_from_complaint(
+        transcript, known_fields={"name": payload.get("name"), "phone": payload.get("phone")})
+    
+    if not extraction_result.get("success"):
+        logger.warning("Field extraction failed, using fallback")
+    
+    fields = extraction_result.get("fields", {})
+    
+    # Step 3: Create complaint document
+    set_stage("saving")
+    complaint_id = generate_complaint_id()
+    token = generate_token()
+    
+    # Override with form data if provided
+    name = payload.get('name') or fields.get('name', 'Unknown')
+    phone = payload.get('phone') or fields.get('phone')
+    
+    complaint = {
+        "id": complaint_id,
+        "token": token,
+        "type": "voice",
+        "name": name,
+        "phone": phone,
+        "location": fields.get('location', 'Unknown'),
+        "department": fields.get('department', 'General Administration'),
+        "description": fields.get('description', transcript),
+        "urgency": fields.get('urgency', 'Medium'),
+        "transcript_hindi": transcript,
+        "audio_path": f"/audios/{unique_filename}",
+        "status": "Pending",
+        "timestamp": datetime.utcnow(),
+        "created_at": datetime.utcnow().isoformat()
+    }
+    
+    # Step 4: Save to database (with fallback)
+    saved_to_db = False
+    if is_database_available():
+        try:
+            config.complaints_collection.insert_one(complaint.copy())
+            saved_to_db = True
+            logger.info(f"Complaint saved to MongoDB: {complaint_id}")
+        except Exception as db_error:
+            logger.error(f"MongoDB save failed: {db_error}")
+            # Fall through to fallback
+    
+    if not saved_to_db:
+        # Save to fallback JSON storage
+        save_complaint_fallback(complaint)
+        logger.warning(f"Complaint saved to fallback storage: {complaint_id}")
+    
+    return {
+        "success": True,
+        "complaint_id": complaint_id,
+        "token": token,
+        "transcript": transcript,
+        "transcript_cached": transcription_result.get("cached", False),
+        "extracted_fields": {
+            "name": name,
+            "phone": phone,
+            "location": fields.get('location'),
+            "department": fields.get('department'),
+            "description": fields.get('description'),
+            "urgency": fields.get('urgency')
+        },
+        "saved_to_database": saved_to_db,
+        "message": "शिकायत सफलतापूर्वक दर्ज हो गई है" if saved_to_db else "शिकायत सहेजी गई, डेटाबेस में बाद में sync होगी"
+    }, 201
+
+
+def start_voice_job_workers():
+    """Start the async voice job worker pool"""
+    voice_job_queue.start(process_voice_complaint)
+
+
+def wants_async():
+    """
+    Async mode is requested with ?async=true or a 'Prefer: respond-async' header
+
+    Ignored when VOICE_JOBS_ENABLED is off: no worker would ever pick the job up.
+    """
+    if not VOICE_JOBS_ENABLED:
+        return False
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
 
 
 @voice_routes.route('/api/complaint/voice', methods=['POST'])
@@ -49,7 +189,12 @@ def handle_voice_complaint():
     - name: (optional) Complainant name
     - phone: (optional) Phone number
     
-    Returns structured complaint data with transcript
+    Returns structured complaint data with transcript.
+
+    In async mode (?async=true or 'Prefer: respond-async') the upload is
+    queued and 202 is returned with a job id to poll at
+    /api/complaint/voice/jobs/<job_id>; 429 if the queue is full. With
+    VOICE_JOBS_ENABLED=false such requests are processed synchronously.
     """
     try:
         logger.info("Voice complaint endpoint triggered")
@@ -74,95 +219,44 @@ def handle_voice_complaint():
                 "success": False,
                 "error": f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
             }), 400
+
+        async_mode = wants_async()
+        if async_mode and voice_job_queue.depth() >= voice_job_queue.max_depth:
+            # Cheap early rejection before the upload is written to disk
+            return queue_full_response()
         
         # Generate unique filename and save audio
         file_ext = audio_file.filename.rsplit('.', 1)[1].lower()
         unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
         audio_path = os.path.join(AUDIO_UPLOAD_FOLDER, unique_filename)
-        audio_file.save(audio_path)
-        logger.info(f"Audio saved: {audio_path}")
-        
-        # Step 1: Transcribe audio using OpenAI Whisper
-        logger.info("Starting transcription...")
-        transcription_result = transcribe_hindi_audio(audio_path)
-        
-        if not transcription_result.get("success"):
-            return jsonify({
-                "success": False,
-                "error": "Failed to transcribe audio",
-                "details": transcription_result.get("error")
-            }), 500
-        
-        transcript = transcription_result.get("transcript", "")
-        logger.info(f"Transcription complete: {transcript[:100]}...")
-        
-        # Step 2: Extract fields using OpenRouter LLM
-        logger.info("Extracting fields...")
-        extraction_result = extract_fields_from_complaint(transcript)
-        
-        if not extraction_result.get("success"):
-            logger.warning("Field extraction failed, using fallback")
-        
-        fields = extraction_result.get("fields", {})
-        
-        # Step 3: Create complaint document
-        complaint_id = generate_complaint_id()
-        token = generate_token()
-        
-        # Override with form data if provided
-        name = request.form.get('name') or fields.get('name', 'Unknown')
-        phone = request.form.get('phone') or fields.get('phone')
-        
-        complaint = {
-            "id": complaint_id,
-            "token": token,
-            "type": "voice",
-            "name": name,
-            "phone": phone,
-            "location": fields.get('location', 'Unknown'),
-            "department": fields.get('department', 'General Administration'),
-            "description": fields.get('description', transcript),
-            "urgency": fields.get('urgency', 'Medium'),
-            "transcript_hindi": transcript,
-            "audio_path": f"/audios/{unique_filename}",
-            "status": "Pending",
-            "timestamp": datetime.utcnow(),
-            "created_at": datetime.utcnow().isoformat()
+        audio_sha256, audio_size = save_and_hash(audio_file.stream, audio_path)
+        logger.info(f"Audio saved: {audio_path} ({audio_size} bytes, sha256 {audio_sha256[:12]})")
+
+        payload = {
+            "audio_path": audio_path,
+            "audio_filename": unique_filename,
+            "audio_sha256": audio_sha256,
+            "name": request.form.get('name'),
+            "phone": request.form.get('phone')
         }
-        
-        # Step 4: Save to database (with fallback)
-        saved_to_db = False
-        if is_database_available():
+
+        if async_mode:
             try:
-                complaints_collection.insert_one(complaint.copy())
-                saved_to_db = True
-                logger.info(f"Complaint saved to MongoDB: {complaint_id}")
-            except Exception as db_error:
-                logger.error(f"MongoDB save failed: {db_error}")
-                # Fall through to fallback
-        
-        if not saved_to_db:
-            # Save to fallback JSON storage
-            save_complaint_fallback(complaint)
-            logger.warning(f"Complaint saved to fallback storage: {complaint_id}")
-        
-        # Return success response
-        return jsonify({
-            "success": True,
-            "complaint_id": complaint_id,
-            "token": token,
-            "transcript": transcript,
-            "extracted_fields": {
-                "name": name,
-                "phone": phone,
-                "location": fields.get('location'),
-                "department": fields.get('department'),
-                "description": fields.get('description'),
-                "urgency": fields.get('urgency')
-            },
-            "saved_to_database": saved_to_db,
-            "message": "शिकायत सफलतापूर्वक दर्ज हो गई है" if saved_to_db else "शिकायत सहेजी गई, डेटाबेस में बाद में sync होगी"
-        }), 201
+                job_id = voice_job_queue.submit(payload)
+            except QueueFullError:
+                os.remove(audio_path)
+                return queue_full_response()
+            logger.info(f"Voice complaint queued as job {job_id}")
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/api/complaint/voice/jobs/{job_id}",
+                "message": "शिकायत प्राप्त हुई, प्रक्रिया जारी है"
+            }), 202
+
+        body, status_code = process_voice_complaint(payload)
+        return jsonify(body), status_code
         
     except Exception as e:
         logger.exception(f"Voice complaint error: {e}")
@@ -174,6 +268,32 @@ def handle_voice_complaint():
         }), 500
 
 
+def queue_full_response():
+    """429 with a retry hint when the async queue is at capacity"""
+    response = jsonify({
+        "success": False,
+        "error": "Voice processing queue is full",
+        "message": "सर्वर व्यस्त है, कृपया थोड़ी देर बाद पुनः प्रयास करें"
+    })
+    response.headers["Retry-After"] = str(VOICE_QUEUE_RETRY_AFTER)
+    return response, 429
+
+
+@voice_routes.route('/api/complaint/voice/jobs/<job_id>', methods=['GET'])
+def get_voice_job(job_id):
+    """Status of an async voice complaint job (queued, transcribing, extracting, saving, completed, failed)"""
+    job = voice_job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    return jsonify({
+        "success": True,
+        "job": job
+    }), 200
+
+
 @voice_routes.route('/api/voice-status', methods=['GET'])
 def voice_status():
     """Check if voice bot is ready and working"""
@@ -185,6 +305,14 @@ def voice_status():
             "speech_to_text": "OpenAI Whisper",
             "field_extraction": "OpenRouter LLM",
             "database": "MongoDB" if is_database_available() else "Fallback JSON"
+        },
+        "jobs": voice_job_queue.stats(),
+        "transcription_cache": whisper_service.cache.stats(),
+        "audio_preprocessing": whisper_service.preprocessor.stats(),
+        "llm_cache": openrouter_service.cache_stats(),
+        "rule_extraction": openrouter_service.rule_extraction_stats(),
+        "circuit_breakers": {
+            "openrouter": openrouter_service.breaker.stats()
         }
     }), 200
 
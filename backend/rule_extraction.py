@@ -0,0 +1,184 @@
+"""
+Rule-based Pre-extraction for JantaVoice
+Deterministic extraction of complaint fields (phone, name, location,
+department) from transcripts, so the LLM only fills in the gaps. Urgency
+is only a keyword hint: the LLM has the final say when it runs
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+from utils.text_normalize import normalize_text
+from department_classifier import classify_department
+
+logger = logging.getLogger(__name__)
+
+# Fields that must be resolved with confidence before the LLM call is skipped
+RULE_EXTRACTION_REQUIRED_FIELDS = [
+    f.strip() for f in os.getenv("RULE_EXTRACTION_REQUIRED_FIELDS", "name,phone,location,department").split(",")
+    if f.strip()
+]
+# Minimum classifier confidence for the department to count as resolved
+RULE_DEPARTMENT_MIN_CONFIDENCE = float(os.getenv("RULE_DEPARTMENT_MIN_CONFIDENCE", "0.75"))
+# Optional JSON list of extra localities, e.g. ["Kothrud", "कोथरूड"]
+LOCALITY_GAZETTEER_PATH = os.getenv("LOCALITY_GAZETTEER_PATH", "")
+
+ALL_FIELDS = ("name", "phone", "location", "department", "description", "urgency")
+
+DEFAULT_FIELDS = {
+    "name": "Unknown",
+    "phone": None,
+    "location": "Unknown",
+    "department": "General Administration",
+    "urgency": "Medium"
+}
+
+# Matched as whole words, so inflected forms are listed explicitly
+URGENCY_KEYWORDS = {
+    "High": ["fire", "flood", "flooded", "flooding", "accident", "emergency", "danger", "dangerous",
+             "electrocuted", "electrocution", "live wire", "injured", "injury", "collapse", "collapsed",
+             "no water for days", "आग", "बाढ़", "दुर्घटना", "हादसा", "खतरा", "खतरे", "खतरनाक", "करंट",
+             "घायल", "इमरजेंसी", "कई दिन", "कई दिनों"],
+    "Low": ["suggestion", "minor", "सुझाव"]
+}
+
+# Seed gazetteer (localities seen in past complaints); extend with LOCALITY_GAZETTEER_PATH
+LOCALITIES = [
+    "सुखसागर नगर", "सुखसागर", "बीबेवाडी", "रामनगर", "साईं नगर", "गोपाल नगर", "अहमदनगर", "रामपुर",
+    "Sukhsagar Nagar", "Sukhsagar", "Bibwewadi", "Ramnagar", "Sai Nagar", "Ahmednagar", "Rampur"
+]
+CITIES = ["पुणे", "चंद्रपुर", "मुंबई", "नागपुर", "दिल्ली", "Pune", "Chandrapur", "Mumbai", "Nagpur", "Delhi"]
+
+# Indian mobile: optional +91 / 91 / 0 prefix, then 10 digits starting 6-9 (separators allowed)
+_PHONE_RE = re.compile(r"(?<!\d)(?:\+?91[\s-]?|0)?([6-9](?:[\s-]?\d){9})(?!\d)")
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_NAME_PATTERNS = [
+    re.compile(r"मेरा नाम\s+([^\s,।]+(?:\s+[^\s,।]+)?)\s+है"),
+    re.compile(r"my name is\s+([a-z']+(?:\s+[a-z']+)?)", re.IGNORECASE),
+    re.compile(r"मैं\s+([^\s,।]+)\s+बोल\s+(?:रहा|रही)")
+]
+# The English pattern has no closing anchor, so the name ends at the first of these
+# ("my name is ramesh and I live in Pune" -> "Ramesh")
+_NAME_STOP_WORDS = {
+    "and", "from", "i", "im", "i'm", "live", "living", "calling", "here", "this", "the", "is", "am", "at",
+    "in", "of", "my", "me", "ji", "sir", "madam", "speaking", "near", "to", "for", "with", "but", "so"
+}
+
+
+def _load_gazetteer() -> List[str]:
+    localities = list(LOCALITIES)
+    if LOCALITY_GAZETTEER_PATH:
+        try:
+            with open(LOCALITY_GAZETTEER_PATH, "r", encoding="utf-8") as f:
+                localities.extend(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load locality gazetteer {LOCALITY_GAZETTEER_PATH}: {e}")
+    # Longest first, so "सुखसागर नगर" wins over "सुखसागर"
+    return sorted({normalize_text(l) for l in localities}, key=len, reverse=True)
+
+
+_LOCALITIES = _load_gazetteer()
+# Keywords are matched against normalized text, so normalize them the same way
+_URGENCY_KEYWORDS = {u: [normalize_text(k) for k in kws] for u, kws in URGENCY_KEYWORDS.items()}
+_CITIES = [normalize_text(c) for c in CITIES]
+_CITY_NAMES = {normalize_text(c): c for c in CITIES}
+_LOCALITY_NAMES = {normalize_text(l): l for l in LOCALITIES}
+
+
+def _contains_word(text: str, phrase: str) -> bool:
+    """Phrase match on word boundaries of normalized text"""
+    return f" {phrase} " in f" {text} "
+
+
+def extract_phone(transcript: str) -> Optional[str]:
+    match = _PHONE_RE.search(transcript.translate(_DEVANAGARI_DIGITS))
+    return re.sub(r"\D", "", match.group(1)) if match else None
+
+
+def extract_name(transcript: str) -> Optional[str]:
+    for pattern in _NAME_PATTERNS:
+        match = pattern.search(transcript)
+        if not match:
+            continue
+        name = []
+        for token in match.group(1).split():
+            if token.lower() in _NAME_STOP_WORDS:
+                break
+            name.append(token)
+        if name:
+            return " ".join(name).title()
+    return None
+
+
+def extract_location(text: str) -> Optional[str]:
+    """Locality (and city if mentioned) from the gazetteer"""
+    locality = next((l for l in _LOCALITIES if _contains_word(text, l)), None)
+    city = next((c for c in _CITIES if _contains_word(text, c)), None)
+    parts = [_LOCALITY_NAMES.get(locality, locality) if locality else None,
+             _CITY_NAMES.get(city, city) if city else None]
+    parts = [p for p in parts if p]
+    return ", ".join(parts) if parts else None
+
+
+def extract_urgency(text: str) -> Optional[str]:
+    for urgency in ("High", "Low"):
+        if any(_contains_word(text, keyword) for keyword in _URGENCY_KEYWORDS[urgency]):
+            return urgency
+    return None
+
+
+def pre_extract(transcript: str, known_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract whatever can be determined with certainty
+
+    Args:
+        transcript: Complaint transcript
+        known_fields: Values already supplied by the caller (e.g. form name/phone)
+
+    Returns:
+        Dict with 'fields' (resolved values), 'hints' (keyword guesses the
+        LLM may overrule, i.e. urgency), 'resolved' and 'unresolved'
+        (required fields still missing) lists
+    """
+    text = normalize_text(transcript)
+    fields = {k: v for k, v in (known_fields or {}).items() if v}
+
+    if "phone" not in fields:
+        phone = extract_phone(transcript)
+        if phone:
+            fields["phone"] = phone
+    if "name" not in fields:
+        name = extract_name(transcript)
+        if name:
+            fields["name"] = name
+    if "location" not in fields:
+        location = extract_location(text)
+        if location:
+            fields["location"] = location
+    if "department" not in fields:
+        classification = classify_department(text)
+        # Ambiguous matches (e.g. water *and* road) are left to the LLM
+        if classification["labels"] and classification["confidence"] >= RULE_DEPARTMENT_MIN_CONFIDENCE:
+            fields["department"] = classification["department"]
+    hints = {}
+    if "urgency" not in fields:
+        urgency = extract_urgency(text)
+        if urgency:
+            hints["urgency"] = urgency
+
+    return {
+        "fields": fields,
+        "hints": hints,
+        "resolved": [f for f in ALL_FIELDS if f in fields],
+        "unresolved": [f for f in RULE_EXTRACTION_REQUIRED_FIELDS if f not in fields]
+    }
+
+
+def complete_fields(fields: Dict[str, Any], transcript: str) -> Dict[str, Any]:
+    """Fill any missing field with its default (description defaults to the transcript)"""
+    complete = dict(DEFAULT_FIELDS, description=transcript)
+    complete.update({k: v for k, v in fields.items() if k in ALL_FIELDS})
+    return complete
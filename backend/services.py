@@ -1,17 +1,36 @@
 import os
 import json
+import time
+import asyncio
+import threading
 import traceback
-from datetime import datetime
-from collections import deque
-from groq import Groq
+from groq import Groq, AsyncGroq
 from dotenv import load_dotenv
 from models import (
     ExtensionState, WebSocketMessage, Action, 
     FilterRule, HideRule, WarningData, RedirectData
 )
+from session_manager import SessionManager, ClassifierSession, create_store
+from classifier_rules import classifier_rules, CLASSIFIER_RULES_ENABLED, ALLOW
+from utils.ttl_cache import TTLCache
+from utils.url_normalize import normalize_url, url_domain
 
 load_dotenv()
 
+CLASSIFIER_MODEL = "llama-3.3-70b-versatile"
+# Upper bound on LLM calls in flight across all connections; extra
+# requests wait for a slot instead of piling onto the Groq rate limit
+CLASSIFIER_MAX_CONCURRENCY = int(os.getenv("CLASSIFIER_MAX_CONCURRENCY", "16"))
+
+# Verdicts for pages already classified (0 disables the cache)
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", "600"))
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "10000"))
+# Page types whose verdict depends on the site rather than the exact URL
+# (a YouTube home feed is filtered the same way whatever the query string)
+VERDICT_DOMAIN_PAGE_TYPES = set(filter(None, os.getenv("VERDICT_DOMAIN_PAGE_TYPES", "feed").split(",")))
+
+WARNINGS_BEFORE_BLOCK = {"medium": 3, "strict": 1, "very_strict": 0}
+
 # Redirect URLs based on task keywords
 REDIRECT_URLS = {
     "python": "https://www.youtube.com/results?search_query=python+tutorial",
@@ -39,29 +58,35 @@ class ClassifierService:
         if not self.api_key:
             print("Warning: GROQ_API_KEY not found.")
             self.client = None
+            self.async_client = None
         else:
             self.client = Groq(api_key=self.api_key)
+            # Used by the WebSocket handler so an LLM call never blocks the event loop
+            self.async_client = AsyncGroq(api_key=self.api_key)
+        self._llm_slots = asyncio.Semaphore(CLASSIFIER_MAX_CONCURRENCY)
         
-        # Context window
-        self.history = deque(maxlen=5)
-        self.last_decisions = deque(maxlen=5)
+        # Context window, one per connection / user
+        self.sessions = SessionManager(store=create_store())
+        self.verdicts = TTLCache(ttl=VERDICT_CACHE_TTL, maxsize=VERDICT_CACHE_SIZE)
+        self._stats_lock = threading.Lock()
+        self.rules = classifier_rules if CLASSIFIER_RULES_ENABLED else None
+        # llm_errors: the completion call itself failed; errors: anything else
+        # (session store, unparseable answer)
+        self._stats = {"requests": 0, "local": 0, "cached": 0, "llm_calls": 0, "llm_cancelled": 0,
+                       "llm_errors": 0, "errors": 0, "llm_seconds": 0.0}
 
-    def _build_context_window(self) -> str:
-        if not self.history:
+    def _build_context_window(self, session: ClassifierSession) -> str:
+        if not session.history:
             return "No previous browsing history in this session."
         
         context_lines = []
-        for i, entry in enumerate(self.history, 1):
-            decision_info = self.last_decisions[i-1] if i <= len(self.last_decisions) else "unknown"
-            context_lines.append(f"  {i}. [{entry['time']}] {entry['title'][:40]} → {decision_info}")
+        for i, (seen_at, title, decision) in enumerate(session.history, 1):
+            context_lines.append(f"  {i}. [{seen_at}] {title} → {decision}")
         
         return "\n".join(context_lines)
 
-    def process_state(self, state: ExtensionState) -> WebSocketMessage:
-        if not self.client:
-            return WebSocketMessage(actions=[], decision="allow", confidence=0.0)
-
-        context_window = self._build_context_window()
+    def _build_prompt(self, state: ExtensionState, session: ClassifierSession) -> str:
+        context_window = self._build_context_window(session)
         
         # Strictness rules
         strictness_rules = {
@@ -70,8 +95,7 @@ class ClassifierService:
             "very_strict": "NO warnings. Immediately redirect distracting pages. Zero tolerance."
         }
         
-        warnings_before_block = {"medium": 3, "strict": 1, "very_strict": 0}
-        max_warnings = warnings_before_block.get(state.strictness, 3)
+        max_warnings = WARNINGS_BEFORE_BLOCK.get(state.strictness, 3)
         
         system_prompt = f"""You are a Productivity Guardian AI. Your job is to BLOCK distractions and help the user focus.
 
@@ -84,6 +108,9 @@ CURRENT PAGE:
 - Title: {state.title}
 - Type: {state.page_type}
 
+RECENT PAGES THIS SESSION:
+{context_window}
+
 CLASSIFICATION RULES (Apply in order):
 
 1. ALWAYS ALLOW (Productive Tools):
@@ -125,70 +152,208 @@ IMPORTANT:
 - For warnings, be friendly but firm: "Hey! This isn't work. Back to [task]?"
 - For YouTube feed filtering, use "title_does_not_contain" with keywords from task
 - Respond ONLY with valid JSON"""
+        return system_prompt
 
+    def _completion_kwargs(self, state: ExtensionState, session: ClassifierSession) -> dict:
+        return {
+            "messages": [{"role": "system", "content": self._build_prompt(state, session)}],
+            "model": CLASSIFIER_MODEL,
+            "temperature": 0.0,
+            "response_format": {"type": "json_object"}
+        }
 
-
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[{"role": "system", "content": system_prompt}],
-                model="llama-3.3-70b-versatile",
-                temperature=0.0,
-                response_format={"type": "json_object"}
-            )
-            
-            content = chat_completion.choices[0].message.content
-            
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-                
-            result_json = json.loads(content)
-            
-            # Parse actions
-            actions = []
-            for action_data in result_json.get("actions", []):
-                action_type = action_data.get("type", "allow")
-                
-                action = Action(
-                    type=action_type,
-                    reason=action_data.get("reason"),
-                    filter_rule=FilterRule(**action_data["filter_rule"]) if action_data.get("filter_rule") else None,
-                    hide_rule=HideRule(**action_data["hide_rule"]) if action_data.get("hide_rule") else None,
-                    warning=WarningData(**action_data["warning"]) if action_data.get("warning") else None,
-                    redirect=RedirectData(**action_data["redirect"]) if action_data.get("redirect") else None
-                )
-                actions.append(action)
-            
-            decision = result_json.get("decision", "allow")
-            
-            # Add to history
-            self.history.append({
-                "url": state.url,
-                "title": state.title,
-                "page_type": state.page_type,
-                "time": datetime.now().strftime("%H:%M:%S")
-            })
-            self.last_decisions.append(decision)
+    def _parse_response(self, state: ExtensionState, session: ClassifierSession, chat_completion) -> WebSocketMessage:
+        content = chat_completion.choices[0].message.content
+        
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
             
-            # Safely handle request_id
-            req_id = state.request_id if state.request_id else "unknown"
+        result_json = json.loads(content)
+        
+        # Parse actions
+        actions = []
+        for action_data in result_json.get("actions", []):
+            action_type = action_data.get("type", "allow")
             
-            return WebSocketMessage(
-                request_id=req_id,
-                actions=actions,
-                decision=decision,
-                confidence=result_json.get("confidence", 1.0)
+            action = Action(
+                type=action_type,
+                reason=action_data.get("reason"),
+                filter_rule=FilterRule(**action_data["filter_rule"]) if action_data.get("filter_rule") else None,
+                hide_rule=HideRule(**action_data["hide_rule"]) if action_data.get("hide_rule") else None,
+                warning=WarningData(**action_data["warning"]) if action_data.get("warning") else None,
+                redirect=RedirectData(**action_data["redirect"]) if action_data.get("redirect") else None
             )
+            actions.append(action)
+        
+        decision = result_json.get("decision", "allow")
+        
+        # Add to history
+        session.record(state.title, decision)
+        
+        # Safely handle request_id
+        req_id = state.request_id if state.request_id else "unknown"
+        
+        return WebSocketMessage(
+            request_id=req_id,
+            actions=actions,
+            decision=decision,
+            confidence=result_json.get("confidence", 1.0)
+        )
+
+    def _fallback(self, state: ExtensionState) -> WebSocketMessage:
+        # Allow with the original request_id to avoid frontend queue lock
+        return WebSocketMessage(
+            request_id=state.request_id or "unknown",
+            actions=[],
+            decision="allow",
+            confidence=0.0
+        )
+
+    def _rule_verdict(self, state: ExtensionState, session: ClassifierSession):
+        """Verdict from the deterministic rules, or None if the page needs the LLM"""
+        if self.rules is None:
+            return None
+        match = self.rules.evaluate(state.url)
+        if match is None:
+            return None
 
+        if match.verdict == ALLOW:
+            decision, actions = "allow", []
+        elif state.warning_count < WARNINGS_BEFORE_BLOCK.get(state.strictness, 3):
+            decision = "warn"
+            actions = [Action(type="show_warning", reason=match.reason, warning=WarningData(
+                message=f"Hey! This isn't work. Back to {state.user_task}?", severity="medium"))]
+        else:
+            decision = "redirect"
+            actions = [Action(type="redirect", reason=match.reason, redirect=RedirectData(
+                url=get_redirect_url(state.user_task), reason=match.reason))]
+
+        self._count("local")
+        session.record(state.title, decision)
+        return WebSocketMessage(request_id=state.request_id or "unknown", actions=actions,
+                                decision=decision, confidence=1.0)
+
+    def _verdict_key(self, state: ExtensionState):
+        if state.page_type in VERDICT_DOMAIN_PAGE_TYPES:
+            page = f"{url_domain(state.url)}|{state.page_type}"
+        else:
+            page = normalize_url(state.url)
+        # warn vs redirect flips once the warning budget is spent, so a
+        # verdict given before that point must not be reused after it
+        out_of_warnings = state.warning_count >= WARNINGS_BEFORE_BLOCK.get(state.strictness, 3)
+        return (page, " ".join(state.user_task.lower().split()), state.strictness, out_of_warnings)
+
+    def _cached_verdict(self, state: ExtensionState, session: ClassifierSession):
+        """Cached verdict for this page, re-addressed to this request, or None"""
+        if self.verdicts.ttl <= 0:
+            return None
+        cached = self.verdicts.get(self._verdict_key(state))
+        if cached is None:
+            return None
+        self._count("cached")
+        session.record(state.title, cached.decision)
+        return cached.model_copy(update={"request_id": state.request_id or "unknown"})
+
+    def _store_verdict(self, state: ExtensionState, response: WebSocketMessage):
+        if self.verdicts.ttl > 0:
+            self.verdicts.set(self._verdict_key(state), response)
+
+    def _count(self, key: str, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _llm_failed(self, state: ExtensionState, error: Exception) -> WebSocketMessage:
+        self._count("llm_errors")
+        print(f"LLM Error: {error}")
+        traceback.print_exc()
+        return self._fallback(state)
+
+    def process_state(self, state: ExtensionState, session_id: str = None) -> WebSocketMessage:
+        if not self.client:
+            return self._fallback(state)
+
+        self._count("requests")
+        try:
+            session = self.sessions.get(session_id or state.session_id or "default")
+            response = self._rule_verdict(state, session) or self._cached_verdict(state, session)
+            if response is None:
+                started = time.perf_counter()
+                self._count("llm_calls")
+                try:
+                    chat_completion = self.client.chat.completions.create(**self._completion_kwargs(state, session))
+                except Exception as e:
+                    return self._llm_failed(state, e)
+                self._count("llm_seconds", time.perf_counter() - started)
+                response = self._parse_response(state, session, chat_completion)
+                self._store_verdict(state, response)
+            self.sessions.save(session)
+            return response
         except Exception as e:
-            print(f"LLM Error: {e}")
+            self._count("errors")
+            print(f"Classifier Error: {e}")
             traceback.print_exc()
-            # Return allow with original request_id to avoid frontend queue lock
-            req_id = state.request_id if hasattr(state, 'request_id') and state.request_id else "unknown"
-            return WebSocketMessage(
-                request_id=req_id, 
-                actions=[], 
-                decision="allow", 
-                confidence=0.0
-            )
+            return self._fallback(state)
+
+    async def aprocess_state(self, state: ExtensionState, session_id: str = None,
+                             debounce: float = 0.0) -> WebSocketMessage:
+        """
+        Async variant of process_state for the WebSocket handler
+
+        Rule and cache hits answer at once; pages that need the LLM first
+        wait `debounce` seconds, so a caller can cancel the task if a newer
+        state for the same tab arrives meanwhile.
+        """
+        if not self.async_client:
+            return self._fallback(state)
+
+        self._count("requests")
+        try:
+            session = await self._session_io(self.sessions.get, session_id or state.session_id or "default")
+            response = self._rule_verdict(state, session) or self._cached_verdict(state, session)
+            if response is None:
+                if debounce > 0:
+                    await asyncio.sleep(debounce)
+                async with self._llm_slots:
+                    started = time.perf_counter()
+                    self._count("llm_calls")
+                    try:
+                        chat_completion = await self.async_client.chat.completions.create(
+                            **self._completion_kwargs(state, session))
+                    except asyncio.CancelledError:
+                        self._count("llm_cancelled")
+                        raise
+                    except Exception as e:
+                        return self._llm_failed(state, e)
+                    self._count("llm_seconds", time.perf_counter() - started)
+                response = self._parse_response(state, session, chat_completion)
+                self._store_verdict(state, response)
+            await self._session_io(self.sessions.save, session)
+            return response
+        except Exception as e:
+            self._count("errors")
+            print(f"Classifier Error: {e}")
+            traceback.print_exc()
+            return self._fallback(state)
+
+    def metrics(self) -> dict:
+        """Counters for the /metrics endpoint and {"type": "metrics"} WebSocket messages"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["llm_seconds"] = round(stats["llm_seconds"], 3)
+        stats["avg_llm_ms"] = round(stats["llm_seconds"] * 1000 / stats["llm_calls"], 1) if stats["llm_calls"] else 0.0
+        avoided = stats["local"] + stats["cached"]
+        stats["llm_avoided_rate"] = round(avoided / stats["requests"], 3) if stats["requests"] else 0.0
+        return {
+            "classifier": stats,
+            "rules": self.rules.stats() if self.rules is not None else None,
+            "verdict_cache": self.verdicts.stats(),
+            "sessions": self.sessions.stats()
+        }
+
+    async def _session_io(self, func, *args):
+        # Session store calls block, so keep them off the event loop
+        if self.sessions.store is None:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
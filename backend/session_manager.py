@@ -0,0 +1,229 @@
+"""
+Session Manager for the productivity classifier
+Per-connection (or per-user) browsing history for ClassifierService prompts
+
+Each session keeps the last SESSION_HISTORY_SIZE pages it saw, trimmed to
+what the prompt actually uses. Sessions idle for SESSION_IDLE_SECONDS, or
+beyond the SESSION_MAX_SESSIONS most recently used, are dropped from memory.
+
+With SESSION_STORE_URL set, history is also written through to an external
+store, so a session survives reconnects, restarts and can be served by any
+worker process:
+    sqlite:///path/to/sessions.db   (workers on one host)
+    redis://localhost:6379/0        (needs the redis package)
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from threading import local
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_HISTORY_SIZE = int(os.getenv("SESSION_HISTORY_SIZE", "5"))
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "900"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "50000"))
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "")
+# How long the external store keeps a session nobody has touched
+SESSION_STORE_TTL_SECONDS = int(os.getenv("SESSION_STORE_TTL_SECONDS", str(24 * 3600)))
+
+# The prompt only shows this much of each title
+TITLE_CHARS = 40
+
+
+class ClassifierSession:
+    """Recent pages and decisions for one connection or user"""
+
+    __slots__ = ("session_id", "history", "last_seen")
+
+    def __init__(self, session_id: str, entries=(), history_size: int = SESSION_HISTORY_SIZE):
+        self.session_id = session_id
+        # (time, title, decision) tuples, oldest first
+        self.history = deque((tuple(entry) for entry in entries), maxlen=history_size)
+        self.last_seen = time.monotonic()
+
+    def record(self, title: str, decision: str):
+        self.history.append((datetime.now().strftime("%H:%M:%S"), title[:TITLE_CHARS], decision))
+
+
+class SQLiteSessionStore:
+    """Session history in a SQLite file shared by worker processes"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            history TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int = SESSION_STORE_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._local = local()
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread (and per-process) connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, session_id: str) -> Optional[List]:
+        row = self._conn().execute("SELECT history FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                                   (session_id, time.time() - self.ttl_seconds)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id: str, history: List):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO sessions (session_id, history, updated_at) VALUES (?, ?, ?)",
+                     (session_id, json.dumps(history, ensure_ascii=False), now))
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    def delete(self, session_id: str):
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+class RedisSessionStore:
+    """Session history in Redis, for workers on several hosts"""
+
+    def __init__(self, url: str, ttl_seconds: int = SESSION_STORE_TTL_SECONDS, prefix: str = "classifier:session:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def load(self, session_id: str) -> Optional[List]:
+        raw = self.client.get(self.prefix + session_id)
+        return json.loads(raw) if raw else None
+
+    def save(self, session_id: str, history: List):
+        self.client.setex(self.prefix + session_id, self.ttl_seconds, json.dumps(history, ensure_ascii=False))
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
+
+
+def create_store(url: str = SESSION_STORE_URL):
+    """Store for a SESSION_STORE_URL, or None to keep sessions in memory only"""
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            return RedisSessionStore(url)
+        except ImportError:
+            logger.warning("SESSION_STORE_URL is redis but the redis package is not installed; "
+                           "sessions stay in memory")
+            return None
+    logger.warning(f"Unsupported SESSION_STORE_URL {url!r}; sessions stay in memory")
+    return None
+
+
+class SessionManager:
+    """
+    In-memory sessions in least-recently-used order, optionally backed by a store
+
+    Store calls are blocking; async callers should run get/save in a thread
+    when `store` is set.
+    """
+
+    def __init__(self, store=None, history_size: int = SESSION_HISTORY_SIZE,
+                 idle_seconds: float = SESSION_IDLE_SECONDS, max_sessions: int = SESSION_MAX_SESSIONS):
+        self.store = store
+        self.history_size = history_size
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "restored": 0, "evicted_idle": 0, "evicted_lru": 0, "store_errors": 0}
+
+    def get(self, session_id: str) -> ClassifierSession:
+        """The session for session_id, restored from the store or created if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_seen = now
+                return session
+
+        entries = None
+        if self.store is not None:
+            try:
+                entries = self.store.load(session_id)
+            except Exception as e:
+                self._stats["store_errors"] += 1
+                logger.warning(f"Session store load failed: {e}")
+
+        with self._lock:
+            # Another caller may have created it while we were loading
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ClassifierSession(session_id, entries or (), self.history_size)
+                self._sessions[session_id] = session
+                self._stats["restored" if entries else "created"] += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._stats["evicted_lru"] += 1
+            self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            return session
+
+    def save(self, session: ClassifierSession):
+        """Write the session through to the store, if there is one"""
+        if self.store is None:
+            return
+        try:
+            self.store.save(session.session_id, list(session.history))
+        except Exception as e:
+            self._stats["store_errors"] += 1
+            logger.warning(f"Session store save failed: {e}")
+
+    def drop(self, session_id: str, forget: bool = False):
+        """Remove a session from memory (and from the store with forget=True)"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if forget and self.store is not None:
+            try:
+                self.store.delete(session_id)
+            except Exception as e:
+                self._stats["store_errors"] += 1
+                logger.warning(f"Session store delete failed: {e}")
+
+    def _evict_idle(self, now: float):
+        # Oldest first, so stop at the first session that is still active
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen < self.idle_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self._stats["evicted_idle"] += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            stats = dict(self._stats)
+            stats["active"] = len(self._sessions)
+        stats["max_sessions"] = self.max_sessions
+        stats["idle_seconds"] = self.idle_seconds
+        stats["store"] = type(self.store).__name__ if self.store is not None else None
+        return stats
@@ -0,0 +1,152 @@
+"""
+Fallback Sync Worker for JantaVoice
+Watches MongoDB availability and drains fallback complaints back into it
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import config
+from fallback_storage import fallback_storage, FallbackStorage, FALLBACK_SYNC_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Seconds between availability checks / drain runs
+SYNC_INTERVAL_SECONDS = float(os.getenv("FALLBACK_SYNC_INTERVAL", "10"))
+# Short timeout so reconnect probes never stall the worker for long
+SYNC_CONNECT_TIMEOUT_MS = int(os.getenv("FALLBACK_SYNC_CONNECT_TIMEOUT_MS", "2000"))
+
+
+class FallbackSyncWorker:
+    """
+    Background thread that fails back from JSON storage to MongoDB
+
+    Each run it makes sure MongoDB is reachable (reconnecting and swapping the
+    live handles in `config` when it comes back, dropping them when it goes
+    away), then drains pending fallback complaints in bulk batches.
+    """
+
+    def __init__(self, storage: FallbackStorage = fallback_storage,
+                 interval: float = SYNC_INTERVAL_SECONDS,
+                 batch_size: int = FALLBACK_SYNC_BATCH_SIZE):
+        self.storage = storage
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "state": "stopped",
+            "reconnects": 0,
+            "runs": 0,
+            "batches": 0,
+            "synced_total": 0,
+            "failed_total": 0,
+            "last_run_at": None,
+            "last_synced_at": None,
+            "last_duration_seconds": None,
+            "last_error": None,
+        }
+
+    def _set(self, **values):
+        with self._stats_lock:
+            self._stats.update(values)
+
+    def _on_batch(self, result: Dict[str, int]):
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["synced_total"] += result["synced_count"]
+            self._stats["failed_total"] += result["failed_count"]
+            if result["synced_count"]:
+                self._stats["last_synced_at"] = datetime.utcnow().isoformat()
+
+    def _ensure_database(self) -> bool:
+        """Make sure the live handles point at a reachable MongoDB"""
+        if config.complaints_collection is not None:
+            if config.is_mongodb_reachable():
+                return True
+            logger.warning("MongoDB became unreachable, switching routes to fallback storage")
+            config.disconnect_mongodb()
+            return False
+
+        if not config.connect_mongodb(timeout_ms=SYNC_CONNECT_TIMEOUT_MS):
+            return False
+
+        logger.info("MongoDB is reachable again, routes switched back to the database")
+        with self._stats_lock:
+            self._stats["reconnects"] += 1
+        return True
+
+    def run_once(self) -> Dict[str, Any]:
+        """Check availability and drain the pending queue once"""
+        with self._run_lock:
+            started = time.monotonic()
+            self._set(last_run_at=datetime.utcnow().isoformat())
+            with self._stats_lock:
+                self._stats["runs"] += 1
+
+            if not self._ensure_database():
+                self._set(state="waiting_for_database")
+                return {"synced_count": 0, "failed_count": 0,
+                        "pending_remaining": self.storage.get_pending_count()}
+
+            self._set(state="draining")
+            result = self.storage.sync_to_mongodb(config.complaints_collection,
+                                                  batch_size=self.batch_size,
+                                                  on_batch=self._on_batch)
+            self._set(state="idle",
+                      last_error=result.get("error"),
+                      last_duration_seconds=round(time.monotonic() - started, 3))
+            if result["synced_count"]:
+                logger.info(f"Fallback sync: {result['synced_count']} synced, "
+                            f"{result['failed_count']} failed, "
+                            f"{result['pending_remaining']} pending")
+            return result
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception(f"Fallback sync run failed: {e}")
+                self._set(state="error", last_error=str(e))
+            self._stop_event.wait(self.interval)
+        self._set(state="stopped")
+
+    def start(self):
+        """Start the background thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="fallback-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"Fallback sync worker started (every {self.interval}s, batch {self.batch_size})")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Progress counters for dashboards"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["database_available"] = config.complaints_collection is not None
+        stats["pending"] = self.storage.get_pending_count()
+        return stats
+
+
+# Singleton instance
+sync_worker = FallbackSyncWorker()
+
+
+def start_sync_worker() -> FallbackSyncWorker:
+    """Convenience function to start the singleton worker"""
+    sync_worker.start()
+    return sync_worker
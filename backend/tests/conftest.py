@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+# Module-level singletons (fallback storage, caches, job queue) open their
+# files on import, so point them at a scratch directory before anything is
+# imported. MongoDB is pointed at a closed port so the routes run in fallback mode.
+_scratch = tempfile.mkdtemp(prefix="jantavoice-tests-")
+for name, filename in (("FALLBACK_JSON_PATH", "fallback_complaints.json"),
+                       ("SYNC_PENDING_PATH", "sync_pending.json"),
+                       ("FALLBACK_JOURNAL_PATH", "fallback_complaints.journal"),
+                       ("FALLBACK_SQLITE_PATH", "fallback_complaints.db"),
+                       ("VOICE_JOBS_DB_PATH", "voice_jobs.db"),
+                       ("TRANSCRIPTION_CACHE_PATH", "transcription_cache.db"),
+                       ("TTS_CACHE_DIR", "tts_cache")):
+    os.environ[name] = os.path.join(_scratch, filename)
+os.environ["MONGO_URI"] = "mongodb://127.0.0.1:9"
+os.environ["FALLBACK_STORAGE_MODE"] = "json"
+
+# Ensure we can import from the backend directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
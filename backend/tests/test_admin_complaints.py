@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor, parse_date, parse_page_size
+
+flask = pytest.importorskip("flask")
+
+
+def test_cursor_round_trip():
+    when = datetime.datetime(2024, 5, 1, 10, 30, 15, 123000)
+    cursor = encode_cursor(when, "665f1c2e9b1e8a3d4c5b6a79")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (when, "665f1c2e9b1e8a3d4c5b6a79")
+    assert decode_cursor(encode_cursor("2024-05-01T10:30:15", 42)) == ("2024-05-01T10:30:15", "42")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", encode_cursor("x", "y")[:-3], "WzFd"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_size_and_dates():
+    assert parse_page_size(None) == 50
+    assert parse_page_size("5000") == 200
+    assert parse_page_size("0") == 1
+    assert parse_page_size("ten") == 50
+    assert parse_date("2024-05-01", end_of_day=True) == datetime.datetime(2024, 5, 1, 23, 59, 59, 999999)
+    assert parse_date("2024-05-01T10:00:00", end_of_day=True) == datetime.datetime(2024, 5, 1, 10)
+    with pytest.raises(ValueError):
+        parse_date("01/05/2024")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import config
+    import fallback_storage
+    from routes.admin_routes import admin_routes
+
+    storage = fallback_storage.FallbackStorage(str(tmp_path / "fallback.json"))
+    for n in range(5):
+        storage.save_complaint({"id": f"C{n}", "timestamp": f"2024-05-0{n + 1}T09:00:00",
+                                "status": "Resolved" if n % 2 else "Pending", "description": "x"})
+    monkeypatch.setattr(fallback_storage, "fallback_storage", storage)
+    monkeypatch.setattr(config, "complaints_collection", None)
+
+    app = flask.Flask(__name__)
+    app.secret_key = "test"
+    app.register_blueprint(admin_routes)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+    return client
+
+
+def test_fallback_pages_follow_next_cursor(client):
+    seen = []
+    url = "/api/admin/complaints?limit=2&view=list"
+    while True:
+        body = client.get(url).get_json()
+        seen += [c["id"] for c in body["complaints"]]
+        assert all("description" not in c for c in body["complaints"])
+        if not body["pagination"]["has_more"]:
+            break
+        url = f"/api/admin/complaints?limit=2&view=list&cursor={body['pagination']['next_cursor']}"
+    assert seen == ["C4", "C3", "C2", "C1", "C0"]
+
+
+def test_filters_and_date_range(client):
+    body = client.get("/api/admin/complaints?status=Pending&from=2024-05-02&to=2024-05-05").get_json()
+    assert [c["id"] for c in body["complaints"]] == ["C4", "C2"]
+    assert "pagination" not in body
+
+
+@pytest.mark.parametrize("query", ["cursor=garbage!", "from=yesterday", "to=2024-13-01"])
+def test_bad_cursor_or_date_is_a_400(client, query):
+    response = client.get(f"/api/admin/complaints?{query}")
+    assert response.status_code == 400
+    assert response.get_json()["message"].startswith("Invalid query parameter")
+
+
+def test_cursor_without_an_object_id_is_a_400_against_mongodb(client, monkeypatch):
+    import config
+    monkeypatch.setattr(config, "complaints_collection", object())
+    response = client.get(f"/api/admin/complaints?cursor={encode_cursor('2024-05-01T09:00:00', 'C1')}")
+    assert response.status_code == 400
+
+
+def test_requires_admin_session(client):
+    with client.session_transaction() as session:
+        session.clear()
+    assert client.get("/api/admin/complaints").status_code == 401
@@ -0,0 +1,41 @@
+import pytest
+
+from audio_preprocessing import stitch_transcripts
+
+
+def test_overlap_across_a_boundary_is_kept_once():
+    parts = ["हमारे मोहल्ले में पानी नहीं आ रहा", "पानी नहीं आ रहा है तीन दिन से"]
+    assert stitch_transcripts(parts) == "हमारे मोहल्ले में पानी नहीं आ रहा है तीन दिन से"
+
+
+def test_overlap_ignores_punctuation_and_case():
+    assert stitch_transcripts(["The road is broken.", "road is broken near the school"]) == \
+        "The road is broken. near the school"
+
+
+def test_single_repeated_word_is_not_an_overlap():
+    assert stitch_transcripts(["मेरे घर में पानी", "पानी नहीं आ रहा"]) == "मेरे घर में पानी पानी नहीं आ रहा"
+
+
+def test_short_runs_are_not_an_overlap():
+    assert stitch_transcripts(["I am at a", "at a bus stop"]) == "I am at a at a bus stop"
+    assert stitch_transcripts(["I am at a", "at a bus stop"], min_overlap_chars=0) == "I am at a bus stop"
+
+
+def test_empty_parts():
+    assert stitch_transcripts(["", "पानी नहीं", ""]) == "पानी नहीं"
+    assert stitch_transcripts([]) == ""
+
+
+def test_split_at_silence_cuts_in_pauses():
+    np = pytest.importorskip("numpy")
+    from audio_preprocessing import split_at_silence
+
+    rate = 1000
+    tone = np.sin(np.arange(8 * rate) / 3.0).astype(np.float32)
+    tone[5 * rate:5 * rate + 300] = 0
+    ranges = split_at_silence(tone, rate, chunk_seconds=6, overlap_seconds=0.5)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(tone)
+    cut = ranges[0][1]
+    assert 5 * rate <= cut <= 5 * rate + 300
+    assert ranges[1][0] == cut - rate // 2
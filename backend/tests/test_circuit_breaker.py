@@ -0,0 +1,134 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_breaker(**kwargs):
+    options = dict(window_seconds=60, min_calls=4, error_rate_threshold=0.5, slow_call_seconds=10,
+                   slow_call_rate_threshold=0.75, open_seconds=30, half_open_max_calls=1)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def call(breaker, ok=True, duration=0.1):
+    assert breaker.allow_request()
+    breaker.record(ok, duration)
+
+
+def trip(breaker):
+    for ok in (True, True, False, False):
+        call(breaker, ok)
+    assert breaker.state() == OPEN
+
+
+def test_stays_closed_below_min_calls_and_threshold(clock):
+    breaker = make_breaker()
+    for ok in (False, False, False):
+        call(breaker, ok)
+    assert breaker.state() == CLOSED
+    breaker = make_breaker()
+    for ok in (True, True, True, False):
+        call(breaker, ok)
+    assert breaker.state() == CLOSED
+
+
+def test_opens_on_error_rate_and_rejects_calls(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    assert not breaker.allow_request()
+    clock[0] += 29
+    assert not breaker.allow_request()
+    stats = breaker.stats()
+    assert (stats["state"], stats["rejected_calls"], stats["times_opened"]) == (OPEN, 2, 1)
+    assert stats["retry_in_seconds"] == 1
+
+
+def test_opens_on_slow_calls(clock):
+    breaker = make_breaker()
+    for duration in (12, 15, 11, 0.2):
+        call(breaker, True, duration)
+    assert breaker.state() == OPEN
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        call(breaker, False)
+    clock[0] += 61
+    call(breaker, False)
+    assert breaker.state() == CLOSED
+    assert breaker.stats()["window_calls"] == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock[0] += 30
+    assert breaker.state() == HALF_OPEN
+    assert breaker.allow_request()
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record(True, 0.1)
+    assert breaker.state() == CLOSED
+    assert breaker.stats()["window_calls"] == 0
+    assert breaker.allow_request()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record(False, 0.1)
+    assert breaker.state() == OPEN
+    assert breaker.stats()["times_opened"] == 2
+    assert not breaker.allow_request()
+    clock[0] += 30
+    assert breaker.state() == HALF_OPEN
+
+
+def test_half_open_needs_every_probe_to_succeed(clock):
+    breaker = make_breaker(half_open_max_calls=2)
+    trip(breaker)
+    clock[0] += 30
+    assert breaker.allow_request() and breaker.allow_request()
+    breaker.record(True, 0.1)
+    assert breaker.state() == HALF_OPEN
+    breaker.record(True, 0.1)
+    assert breaker.state() == CLOSED
+
+
+def test_late_results_while_open_are_ignored(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    breaker.record(True, 0.1)
+    clock[0] += 30
+    assert breaker.state() == HALF_OPEN
+
+
+def test_open_breaker_short_circuits_openrouter(clock, monkeypatch):
+    import ai_services
+    posts = []
+
+    def post(*args, **kwargs):
+        posts.append(args)
+        raise ConnectionError("upstream down")
+
+    monkeypatch.setattr(ai_services.http_client, "post", post)
+    service = ai_services.OpenRouterService()
+    service.breaker = make_breaker()
+    for _ in range(4):
+        assert service._make_request([{"role": "user", "content": "hi"}])["success"] is False
+    assert len(posts) == 4
+
+    result = service._make_request([{"role": "user", "content": "hi"}])
+    assert result["circuit_open"] is True
+    assert len(posts) == 4
@@ -0,0 +1,51 @@
+import pytest
+
+from classifier_rules import ALLOW, WARN, ClassifierRules
+
+
+@pytest.fixture
+def rules():
+    return ClassifierRules(extra_allow_domains=["intranet.example.com", "=jira.example.org"])
+
+
+@pytest.mark.parametrize("url, rule", [
+    ("https://www.google.com/search?q=python", "search_engine"),
+    ("https://gist.github.com/someone/abc", "documentation"),
+    ("https://m.stackoverflow.com/questions/1", "documentation"),
+    ("https://docs.python.org/3/library/re.html", "documentation"),
+    ("https://mail.google.com/mail/u/0/", "work_tool"),
+    ("https://team.atlassian.net/browse/X-1", "work_tool"),
+    ("https://wiki.intranet.example.com/", "custom"),
+    ("https://jira.example.org/", "custom"),
+])
+def test_always_allowed_sites(rules, url, rule):
+    match = rules.evaluate(url)
+    assert (match.verdict, match.rule) == (ALLOW, rule)
+
+
+@pytest.mark.parametrize("url", [
+    "https://maps.google.com/",            # "=google.com" is the host only
+    "https://sub.jira.example.org/",
+    "https://notgithub.com/",
+    "https://www.youtube.com/watch?v=abc",
+    "https://docs/",                       # a bare "docs" host is not a docs site
+])
+def test_everything_else_goes_to_the_llm(rules, url):
+    assert rules.evaluate(url) is None
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=abc&list=RDabc&start_radio=1",
+    "https://music.youtube.com/watch?list=RDAMVMabc",
+])
+def test_music_mix_is_warned(rules, url):
+    match = rules.evaluate(url)
+    assert (match.verdict, match.rule) == (WARN, "music_mix")
+
+
+def test_stats(rules):
+    rules.evaluate("https://github.com/")
+    rules.evaluate("https://example.net/")
+    stats = rules.stats()
+    assert (stats["checked"], stats["matched"], stats["match_rate"]) == (2, 1, 0.5)
+    assert stats["by_rule"] == {"documentation": 1}
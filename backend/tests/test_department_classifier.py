@@ -0,0 +1,41 @@
+from department_classifier import DEFAULT_DEPARTMENT, HINDI_LABELS, classify_department, department_label
+
+
+def test_hindi_and_english_keywords():
+    assert classify_department("हमारे मोहल्ले में नल से पानी नहीं आ रहा")["department"] == "Water Department"
+    assert classify_department("There is a huge pothole on the main road")["department"] == "Road Department"
+
+
+def test_keyword_inside_a_longer_word_does_not_match():
+    # "नल" (tap) inside "ऑनलाइन" (online)
+    result = classify_department("ऑनलाइन शिकायत")
+    assert result["department"] == DEFAULT_DEPARTMENT
+    assert result["matches"] == []
+
+    # "रेल" (rail) inside "बरेली" (Bareilly)
+    result = classify_department("बरेली में सड़क टूटी है")
+    assert result["department"] == "Road Department"
+    assert result["confidence"] == 1.0
+    assert [label["department"] for label in result["labels"]] == ["Road Department"]
+
+    assert classify_department("my laptop is broken")["matches"] == []
+    assert classify_department("पुलिस नहीं आई")["matches"] == ["पुलिस"]
+
+
+def test_inflected_forms_count_as_their_keyword():
+    result = classify_department("सड़कों पर गड्ढे, सड़क बंद")
+    assert result["matches"] == ["गड्ढे", "सड़क"]
+    assert result["labels"][0]["score"] == 2.0
+    assert classify_department("potholes on the roads")["matches"] == ["pothole", "road"]
+
+
+def test_confidence_is_share_of_total_score():
+    result = classify_department("सड़क पर पानी भरा है")
+    assert {label["department"]: label["confidence"] for label in result["labels"]} == {
+        "Road Department": 0.5, "Water Department": 0.5}
+
+
+def test_department_label():
+    assert department_label("बिजली नहीं है", HINDI_LABELS) == "विद्युत विभाग"
+    assert department_label("कुछ और", HINDI_LABELS, default="अन्य") == "अन्य"
+    assert department_label("कुछ और") == DEFAULT_DEPARTMENT
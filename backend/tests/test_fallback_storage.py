@@ -0,0 +1,216 @@
+import json
+
+import pytest
+
+from fallback_storage import FallbackStorage, JournalFallbackStorage, SQLiteFallbackStorage
+
+
+def complaint(complaint_id, timestamp="2024-05-01T10:00:00", **fields):
+    return dict({"id": complaint_id, "timestamp": timestamp, "status": "Pending",
+                 "department": "Water Department"}, **fields)
+
+
+def ids(complaints):
+    return [c["id"] for c in complaints]
+
+
+@pytest.fixture
+def journal_paths(tmp_path):
+    return {"filepath": str(tmp_path / "fallback.json"), "journal_path": str(tmp_path / "fallback.journal")}
+
+
+def test_journal_replays_inserts_and_updates_after_restart(journal_paths):
+    storage = JournalFallbackStorage(compact_every=0, **journal_paths)
+    storage.save_complaint(complaint("C1"))
+    storage.save_complaint(complaint("C2"))
+    storage.update_complaint_status("C1", "Resolved")
+    storage.mark_synced_many(["C2"])
+
+    restarted = JournalFallbackStorage(compact_every=0, **journal_paths)
+    assert restarted.get_complaint_by_id("C1")["status"] == "Resolved"
+    assert ids(restarted.get_pending_sync()) == ["C1"]
+    # The snapshot is never touched until compaction
+    with open(journal_paths["filepath"], encoding="utf-8") as f:
+        assert json.load(f) == []
+
+
+def test_journal_discards_torn_tail(journal_paths):
+    storage = JournalFallbackStorage(compact_every=0, **journal_paths)
+    storage.save_complaint(complaint("C1"))
+    storage.save_complaint(complaint("C2"))
+    with open(journal_paths["journal_path"], "ab") as f:
+        f.write(b'{"op": "insert", "doc": {"id": "C3", "timest')
+
+    restarted = JournalFallbackStorage(compact_every=0, **journal_paths)
+    assert ids(restarted.get_all_complaints()) == ["C1", "C2"]
+
+    # The torn record was cut, so the next append starts on its own line
+    restarted.save_complaint(complaint("C3"))
+    again = JournalFallbackStorage(compact_every=0, **journal_paths)
+    assert ids(again.get_all_complaints()) == ["C1", "C2", "C3"]
+
+
+def test_journal_skips_unreadable_record(journal_paths):
+    storage = JournalFallbackStorage(compact_every=0, **journal_paths)
+    storage.save_complaint(complaint("C1"))
+    with open(journal_paths["journal_path"], "ab") as f:
+        f.write(b"not json\n")
+    storage.save_complaint(complaint("C2"))
+
+    restarted = JournalFallbackStorage(compact_every=0, **journal_paths)
+    assert ids(restarted.get_all_complaints()) == ["C1", "C2"]
+
+
+def test_journal_compacts_into_snapshot(journal_paths):
+    storage = JournalFallbackStorage(compact_every=3, **journal_paths)
+    storage.save_complaint(complaint("C1"))
+    storage.save_complaint(complaint("C2"))
+    storage.update_complaint_status("C1", "Resolved")
+
+    with open(journal_paths["journal_path"], "rb") as f:
+        assert f.read() == b""
+    with open(journal_paths["filepath"], encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert [(c["id"], c["status"]) for c in snapshot] == [("C1", "Resolved"), ("C2", "Pending")]
+
+    # Records after the compaction go to the fresh journal on top of the snapshot
+    storage.save_complaint(complaint("C3"))
+    restarted = JournalFallbackStorage(compact_every=3, **journal_paths)
+    assert ids(restarted.get_all_complaints()) == ["C1", "C2", "C3"]
+    assert restarted.get_pending_count() == 3
+
+
+def test_journal_replay_after_interrupted_compaction_does_not_duplicate(journal_paths):
+    storage = JournalFallbackStorage(compact_every=0, **journal_paths)
+    storage.save_complaint(complaint("C1"))
+    storage.save_complaint(complaint("C2"))
+    # Crash between writing the snapshot and truncating the journal
+    storage._replace_file(fsync=True)
+
+    restarted = JournalFallbackStorage(compact_every=0, **journal_paths)
+    assert ids(restarted.get_all_complaints()) == ["C1", "C2"]
+
+
+@pytest.fixture(params=["json", "journal"])
+def open_storage(request, tmp_path):
+    """Opens another instance on the same files, as a second worker process would"""
+    if request.param == "journal":
+        return lambda: JournalFallbackStorage(str(tmp_path / "fallback.json"), str(tmp_path / "fallback.journal"),
+                                              compact_every=0)
+    return lambda: FallbackStorage(str(tmp_path / "fallback.json"))
+
+
+@pytest.fixture
+def storage(open_storage):
+    return open_storage()
+
+
+def test_pending_index_follows_sync_status(storage):
+    for n in range(5):
+        storage.save_complaint(complaint(f"C{n}"))
+    assert ids(storage.get_pending_sync(limit=2)) == ["C0", "C1"]
+
+    assert storage.mark_synced_many(["C1", "C3", "missing"]) == 2
+    assert storage.mark_synced("C0") is True
+    assert storage.mark_synced("missing") is False
+    assert storage.get_pending_count() == 2
+    assert ids(storage.get_pending_sync()) == ["C2", "C4"]
+
+
+def test_lookup_by_id_uses_the_first_record(storage):
+    storage.save_complaint(complaint("C1", status="Pending"))
+    storage.save_complaint(complaint("C1", status="Duplicate"))
+    assert storage.get_complaint_by_id("C1")["status"] == "Pending"
+    assert storage.get_complaint_by_id("missing") is None
+
+    assert storage.update_complaint_status("C1", "Resolved") is True
+    assert [c["status"] for c in storage.get_all_complaints()] == ["Resolved", "Duplicate"]
+    # Internal metadata stays internal
+    assert not any(k.startswith("_") for k in storage.get_complaint_by_id("C1"))
+
+
+def test_instances_sharing_a_file_see_each_others_writes(storage, open_storage):
+    other = open_storage()
+    storage.save_complaint(complaint("C1"))
+    other.save_complaint(complaint("C2"))
+    storage.mark_synced("C2")
+    assert ids(other.get_all_complaints()) == ["C1", "C2"]
+    assert ids(other.get_pending_sync()) == ["C1"]
+
+
+def _save_many(storage, worker, count):
+    for n in range(count):
+        storage.save_complaint(complaint(f"W{worker}-{n}"))
+
+
+def test_concurrent_processes_do_not_lose_writes(storage):
+    multiprocessing = pytest.importorskip("multiprocessing")
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_save_many, args=(storage, w, 25)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+    assert storage.get_pending_count() == 100
+    assert len(set(ids(storage.get_all_complaints()))) == 100
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def queryable(request, tmp_path):
+    if request.param == "sqlite":
+        storage = SQLiteFallbackStorage(str(tmp_path / "fallback.db"), import_from=None)
+    else:
+        storage = FallbackStorage(str(tmp_path / "fallback.json"))
+    rows = [("C1", "2024-05-01T09:00:00", "Pending", "Water Department", "voice"),
+            ("C2", "2024-05-02T09:00:00", "Resolved", "Water Department", "text"),
+            ("C3", "2024-05-02T09:00:00", "Pending", "Road Department", "voice"),
+            ("C4", "2024-05-03T09:00:00", "Pending", "Water Department", "voice")]
+    for complaint_id, timestamp, status, department, kind in rows:
+        storage.save_complaint(complaint(complaint_id, timestamp, status=status, department=department, type=kind))
+    return storage
+
+
+def test_query_filters_and_orders_newest_first(queryable):
+    assert ids(queryable.query_complaints()) == ["C4", "C3", "C2", "C1"]
+    assert ids(queryable.query_complaints({"status": "Pending", "department": "Water Department"})) == ["C4", "C1"]
+    # Fields without a column of their own (json_extract in SQLite)
+    assert ids(queryable.query_complaints({"type": "text"})) == ["C2"]
+    assert ids(queryable.query_complaints(date_from="2024-05-02", date_to="2024-05-02T23:59:59")) == ["C3", "C2"]
+
+
+def test_query_keyset_pages(queryable):
+    first = queryable.query_complaints(limit=2)
+    assert ids(first) == ["C4", "C3"]
+    after = (first[-1]["timestamp"], first[-1]["id"])
+    # C2 shares C3's timestamp and is only reachable through the id tie-breaker
+    assert ids(queryable.query_complaints(after=after, limit=2)) == ["C2", "C1"]
+    assert ids(queryable.query_complaints(limit=2, offset=3)) == ["C1"]
+    assert "department" not in queryable.query_complaints(exclude_fields=["department"])[0]
+
+
+def test_sqlite_imports_the_json_file_once(tmp_path):
+    json_path = str(tmp_path / "fallback.json")
+    legacy = FallbackStorage(json_path)
+    legacy.save_complaint(complaint("C1"))
+    legacy.save_complaint(complaint("C2"))
+    legacy.mark_synced("C1")
+
+    db_path = str(tmp_path / "fallback.db")
+    storage = SQLiteFallbackStorage(db_path, import_from=json_path)
+    assert ids(storage.get_all_complaints()) == ["C1", "C2"]
+    assert ids(storage.get_pending_sync()) == ["C2"]
+
+    storage.save_complaint(complaint("C3"))
+    reopened = SQLiteFallbackStorage(db_path, import_from=json_path)
+    assert ids(reopened.get_all_complaints()) == ["C1", "C2", "C3"]
+
+
+def test_sqlite_status_updates_keep_columns_in_sync(tmp_path):
+    storage = SQLiteFallbackStorage(str(tmp_path / "fallback.db"), import_from=None)
+    storage.save_complaint(complaint("C1"))
+    assert storage.update_complaint_status("C1", "Resolved") is True
+    assert storage.update_complaint_status("missing", "Resolved") is False
+    assert ids(storage.query_complaints({"status": "Resolved"})) == ["C1"]
+    assert storage.get_complaint_by_id("C1")["status"] == "Resolved"
@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from fallback_storage import FallbackStorage, SQLiteFallbackStorage
+
+
+class FakeCollection:
+    """Records bulk_write calls; documents whose id is in `reject` fail with a write error"""
+
+    def __init__(self, reject=(), down=False):
+        self.reject = set(reject)
+        self.down = down
+        self.docs = {}
+        self.batches = []
+
+    def bulk_write(self, operations, ordered=True):
+        if self.down:
+            raise ServerSelectionTimeoutError("no servers")
+        self.batches.append(len(operations))
+        errors = []
+        for index, op in enumerate(operations):
+            doc = op._doc["$setOnInsert"]
+            if doc["id"] in self.reject:
+                errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+            else:
+                self.docs.setdefault(doc["id"], doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteFallbackStorage(str(tmp_path / "fallback.db"), import_from=None)
+    return FallbackStorage(str(tmp_path / "fallback.json"))
+
+
+def fill(storage, count):
+    for n in range(count):
+        storage.save_complaint({"id": f"C{n}", "timestamp": f"2024-05-01T10:00:{n:02d}", "status": "Pending"})
+
+
+def test_sync_drains_in_batches(storage):
+    fill(storage, 5)
+    collection = FakeCollection()
+    batches = []
+    summary = storage.sync_to_mongodb(collection, batch_size=2, on_batch=batches.append)
+
+    assert summary == {"synced_count": 5, "failed_count": 0, "pending_remaining": 0}
+    assert collection.batches == [2, 2, 1]
+    assert len(batches) == 3
+    doc = collection.docs["C0"]
+    assert not any(k.startswith("_") for k in doc)
+    assert doc["timestamp"] == datetime.datetime(2024, 5, 1, 10, 0, 0)
+
+
+def test_rejected_documents_stay_pending(storage):
+    fill(storage, 3)
+    summary = storage.sync_to_mongodb(FakeCollection(reject={"C1"}), batch_size=10)
+    assert (summary["synced_count"], summary["pending_remaining"]) == (2, 1)
+    assert summary["failed_count"] >= 1
+    assert [c["id"] for c in storage.get_pending_sync()] == ["C1"]
+
+
+def test_connection_error_interrupts_the_sync(storage):
+    fill(storage, 3)
+    summary = storage.sync_to_mongodb(FakeCollection(down=True), batch_size=2)
+    assert summary["synced_count"] == 0
+    assert summary["pending_remaining"] == 3
+    assert "no servers" in summary["error"]
+
+
+def test_already_synced_complaints_are_not_resent(storage):
+    fill(storage, 2)
+    collection = FakeCollection()
+    storage.sync_to_mongodb(collection)
+    storage.sync_to_mongodb(collection)
+    assert collection.batches == [2]
+
+
+def test_worker_fails_back_once_the_database_returns(storage, monkeypatch):
+    import config
+    from sync_worker import FallbackSyncWorker
+
+    collection = FakeCollection()
+    monkeypatch.setattr(config, "complaints_collection", None)
+
+    def connect_mongodb(timeout_ms=5000):
+        if reachable:
+            config.complaints_collection = collection
+        return reachable
+
+    monkeypatch.setattr(config, "connect_mongodb", connect_mongodb)
+    monkeypatch.setattr(config, "is_mongodb_reachable", lambda: True)
+    fill(storage, 3)
+    worker = FallbackSyncWorker(storage=storage, batch_size=2)
+
+    reachable = False
+    assert worker.run_once()["pending_remaining"] == 3
+    assert worker.stats()["state"] == "waiting_for_database"
+
+    reachable = True
+    assert worker.run_once()["synced_count"] == 3
+    stats = worker.stats()
+    assert (stats["reconnects"], stats["batches"], stats["synced_total"], stats["pending"]) == (1, 2, 3, 0)
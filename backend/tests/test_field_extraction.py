@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from ai_services import OpenRouterService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = OpenRouterService()
+    service.prompts = []
+
+    def make_request(messages, max_tokens=1024):
+        service.prompts.append(messages[0]["content"])
+        return {"success": True, "content": json.dumps(service.answer)}
+
+    monkeypatch.setattr(service, "_make_request", make_request)
+    return service
+
+
+def test_rules_resolve_everything_and_skip_the_llm(service):
+    result = service.extract_complaint_fields("मेरा नाम रमेश है, नंबर 9876543210, रामनगर में नल के पास आग लगी")
+    assert result["rule_based"] is True
+    assert service.prompts == []
+    assert result["fields"]["urgency"] == "High"
+    assert result["fields"]["department"] == "Water Department"
+
+
+def test_llm_overrules_the_urgency_hint(service):
+    service.answer = {"name": "Unknown", "phone": None, "description": "Road blocked", "urgency": "Medium"}
+    result = service.extract_complaint_fields("रामनगर में सड़क पर खतरा है")
+
+    assert "Keyword hint: urgency may be High" in service.prompts[0]
+    assert result["fields"]["urgency"] == "Medium"
+    # Resolved rule fields still win over the LLM
+    assert result["fields"]["department"] == "Road Department"
+    assert result["fields"]["location"] == "रामनगर"
+
+
+def test_urgency_hint_fills_a_missing_llm_answer(service):
+    service.answer = {"name": "Unknown", "description": "Road blocked"}
+    result = service.extract_complaint_fields("रामनगर में सड़क पर खतरा है")
+    assert result["fields"]["urgency"] == "High"
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from ai_services import OpenRouterService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = OpenRouterService()
+    service.requests = []
+    service.reply = {"success": True, "content": "PM-Kisan pays farmers Rs 6000 a year"}
+    service.release = threading.Event()
+    service.release.set()
+
+    def make_request(messages, max_tokens=1024):
+        service.requests.append(messages[-1]["content"])
+        service.release.wait(5)
+        return service.reply
+
+    monkeypatch.setattr(service, "_make_request", make_request)
+    return service
+
+
+def test_equivalent_questions_share_one_answer(service):
+    first = service.chat_about_schemes("What is PM-Kisan?")
+    second = service.chat_about_schemes("  what is PM kisan ")
+    assert first == second
+    assert len(service.requests) == 1
+    assert service.cache_stats()["chat"]["hits"] == 1
+
+
+def test_failed_answers_are_not_cached(service):
+    service.reply = {"success": False, "error": "API error: 503"}
+    assert service.chat_about_schemes("What is PM-Kisan?")["success"] is False
+    service.reply = {"success": True, "content": "Answer"}
+    assert service.chat_about_schemes("What is PM-Kisan?")["reply"] == "Answer"
+    assert len(service.requests) == 2
+
+
+def test_concurrent_identical_questions_make_one_call(service):
+    service.release.clear()
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(service.chat_about_schemes("Ayushman Bharat?")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while service.cache_stats()["chat"]["coalesced"] < 3:
+        time.sleep(0.001)
+    service.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(replies) == 4 and all(reply == replies[0] for reply in replies)
+    assert len(service.requests) == 1
+
+
+def test_zero_ttl_disables_the_cache(service):
+    service.caches["chat"].ttl = 0
+    service.chat_about_schemes("What is PM-Kisan?")
+    service.chat_about_schemes("What is PM-Kisan?")
+    assert len(service.requests) == 2
@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+
+flask = pytest.importorskip("flask")
+mongomock = pytest.importorskip("mongomock")
+
+from utils.pagination import encode_cursor
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    import config
+    collection = mongomock.MongoClient().db.pickup_requests
+    created = datetime.datetime(2024, 5, 1, 9, 0)
+    for n in range(7):
+        # Pairs share a createdAt, so pages must break ties on _id
+        at = created + datetime.timedelta(minutes=n // 2)
+        collection.insert_one({"id": f"PICKUP{n}", "status": "Pending" if n % 3 else "Completed",
+                               "createdAt": at, "updatedAt": at, "phoneNormalized": "98765"})
+    monkeypatch.setattr(config, "pickup_collection", collection)
+    return collection
+
+
+@pytest.fixture
+def client(collection):
+    from routes.pickup_routes import pickup_routes
+    app = flask.Flask(__name__)
+    app.register_blueprint(pickup_routes)
+    return app.test_client()
+
+
+def test_cursor_pages_cover_every_pickup_once(client):
+    seen = []
+    url = "/api/pickup/requests?limit=3&cursor="
+    body = client.get("/api/pickup/requests?limit=3").get_json()
+    assert body["pagination"]["total"] == 7
+    while True:
+        seen += [p["id"] for p in body["data"]]
+        assert all("phoneNormalized" not in p for p in body["data"])
+        if not body["pagination"]["has_more"]:
+            break
+        body = client.get(url + body["pagination"]["next_cursor"]).get_json()
+        assert "total" not in body["pagination"]
+    assert seen == [f"PICKUP{n}" for n in range(6, -1, -1)]
+
+
+def test_cursor_pages_respect_the_status_filter(client):
+    first = client.get("/api/pickup/requests?limit=2&status=Pending").get_json()
+    second = client.get(f"/api/pickup/requests?limit=2&status=Pending"
+                        f"&cursor={first['pagination']['next_cursor']}").get_json()
+    assert [p["id"] for p in first["data"] + second["data"]] == ["PICKUP5", "PICKUP4", "PICKUP2", "PICKUP1"]
+    assert second["pagination"]["has_more"] is False
+
+
+def test_legacy_page_numbers_still_work(client):
+    body = client.get("/api/pickup/requests?limit=3&page=3").get_json()
+    assert [p["id"] for p in body["data"]] == ["PICKUP0"]
+    assert (body["pagination"]["page"], body["pagination"]["pages"]) == (3, 3)
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", encode_cursor(datetime.datetime(2024, 5, 1), "PICKUP3")])
+def test_bad_cursor_is_a_400(client, cursor):
+    assert client.get(f"/api/pickup/requests?cursor={cursor}").status_code == 400
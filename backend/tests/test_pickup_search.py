@@ -0,0 +1,81 @@
+import re
+
+import pytest
+
+pytest.importorskip("pymongo")
+import pickup_search
+from pickup_search import (build_search_fields, build_search_query, backfill_search_fields_once, edge_ngrams,
+                           normalize_phone, normalize_pickup_id)
+
+
+def test_phone_normalization():
+    assert normalize_phone("+91 98765-43210") == "9876543210"
+    assert normalize_phone("919876543210") == "9876543210"
+    assert normalize_phone("09876543210") == "9876543210"
+    assert normalize_phone(None) == ""
+
+
+def test_search_fields(monkeypatch):
+    monkeypatch.setattr(pickup_search, "PICKUP_SEARCH_NGRAMS", True)
+    fields = build_search_fields({"id": "pickup-17a", "phone": "+91 98765 43210", "name": "Asha Rao",
+                                  "address": "MG Road"})
+    assert fields["phoneNormalized"] == "9876543210"
+    assert fields["idNormalized"] == "PICKUP17A"
+    assert fields["searchPrefixes"] == edge_ngrams("Asha Rao", "MG Road")
+    assert {"as", "ash", "asha", "ra", "rao", "mg", "ro", "roa", "road"} == set(fields["searchPrefixes"])
+
+
+def test_query_shapes(monkeypatch):
+    monkeypatch.setattr(pickup_search, "PICKUP_SEARCH_NGRAMS", True)
+    assert build_search_query("98765") == {"$or": [{"phoneNormalized": {"$regex": "^98765"}},
+                                                   {"idNormalized": {"$regex": "^PICKUP98765"}},
+                                                   {"searchPrefixes": {"$all": ["98765"]}}]}
+    assert build_search_query("asha ra") == {"searchPrefixes": {"$all": ["asha", "ra"]}}
+    assert build_search_query("a") is None
+
+    monkeypatch.setattr(pickup_search, "PICKUP_SEARCH_NGRAMS", False)
+    assert build_search_query("asha") == {"$text": {"$search": '"asha"'}}
+
+
+def test_user_input_is_never_a_regex():
+    for term in ["(.*)", "PICKUP.*", "+91 (987"]:
+        query = build_search_query(term)
+        for clause in (query or {}).get("$or", [query] if query else []):
+            for spec in clause.values():
+                if isinstance(spec, dict) and "$regex" in spec:
+                    pattern = spec["$regex"]
+                    assert pattern.startswith("^")
+                    assert re.fullmatch(r"\^[0-9A-Z]+", pattern), pattern
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.scans = 0
+
+    def find(self, query, projection=None):
+        self.scans += 1
+        return [dict(doc) for doc in self.docs.values() if "phoneNormalized" not in doc]
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            self.docs[op._filter["_id"]].update(op._doc["$set"])
+        return type("Result", (), {"modified_count": len(operations)})()
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+
+def test_backfill_runs_once_per_database():
+    pickups = FakeCollection([{"_id": 1, "id": "PICKUP1", "phone": "9876543210", "name": "Asha"},
+                              {"_id": 2, "id": "PICKUP2", "phone": "9123456789", "name": "Ravi"}])
+    migrations = FakeCollection()
+
+    assert backfill_search_fields_once(pickups, migrations) == 2
+    assert pickups.docs[1]["phoneNormalized"] == "9876543210"
+    assert backfill_search_fields_once(pickups, migrations) == 0
+    assert pickups.scans == 1
+    assert migrations.docs[pickup_search.SEARCH_BACKFILL_MARKER]["updated"] == 2
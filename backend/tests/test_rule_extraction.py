@@ -0,0 +1,60 @@
+from rule_extraction import complete_fields, extract_name, extract_phone, extract_urgency, pre_extract
+from utils.text_normalize import normalize_text
+
+
+def urgency(text):
+    return extract_urgency(normalize_text(text))
+
+
+def test_phone_formats():
+    assert extract_phone("मेरा नंबर +91 98765-43210 है") == "9876543210"
+    assert extract_phone("call 09876543210") == "9876543210"
+    assert extract_phone("नंबर ९८७६५४३२१० है") == "9876543210"
+    assert extract_phone("complaint no 1234567890123") is None
+
+
+def test_name_patterns():
+    assert extract_name("मेरा नाम रमेश कुमार है और मैं पुणे से हूं") == "रमेश कुमार"
+    assert extract_name("my name is ramesh and I live in Pune") == "Ramesh"
+    assert extract_name("my name is ramesh kumar") == "Ramesh Kumar"
+    assert extract_name("मैं सुनीता बोल रही हूं") == "सुनीता"
+    assert extract_name("my name is and") is None
+
+
+def test_urgency_keywords_match_whole_words():
+    assert urgency("घर में आग लगी है") == "High"
+    # "आग" (fire) inside "आगे" (ahead)
+    assert urgency("सड़क आगे से टूटी है") is None
+    assert urgency("a man was electrocuted by a live wire") == "High"
+    assert urgency("just a minor suggestion") == "Low"
+
+
+def test_polite_requests_are_not_low_urgency():
+    assert urgency("I request you to fix the road") is None
+    assert urgency("आपसे अनुरोध है कि नाली साफ करवाएं") is None
+
+
+def test_pre_extract_resolves_fields_and_reports_the_rest():
+    result = pre_extract("मेरा नाम रमेश है, मेरा नंबर 9876543210 है, सुखसागर नगर पुणे में नल से पानी नहीं आ रहा")
+    assert result["fields"] == {"name": "रमेश", "phone": "9876543210", "location": "सुखसागर नगर, पुणे",
+                                "department": "Water Department"}
+    assert result["unresolved"] == []
+
+
+def test_pre_extract_urgency_is_only_a_hint():
+    result = pre_extract("रामनगर में बिजली के खंभे में करंट है, खतरा है")
+    assert "urgency" not in result["fields"]
+    assert result["hints"] == {"urgency": "High"}
+    assert result["unresolved"] == ["name", "phone"]
+
+
+def test_known_fields_win():
+    result = pre_extract("my name is ramesh", {"name": "Suresh", "phone": None})
+    assert result["fields"]["name"] == "Suresh"
+    assert "phone" in result["unresolved"]
+
+
+def test_complete_fields_fills_defaults():
+    fields = complete_fields({"department": "Road Department", "extra": 1}, "सड़क टूटी है")
+    assert fields == {"name": "Unknown", "phone": None, "location": "Unknown", "department": "Road Department",
+                      "urgency": "Medium", "description": "सड़क टूटी है"}
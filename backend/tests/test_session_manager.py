@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import session_manager
+from session_manager import SessionManager, SQLiteSessionStore, create_store
+
+
+def test_history_is_bounded_and_titles_trimmed():
+    sessions = SessionManager(history_size=2)
+    session = sessions.get("a")
+    for n in range(3):
+        session.record(f"Page {n} " + "x" * 100, "allow")
+    assert [title[:6] for _, title, _ in session.history] == ["Page 1", "Page 2"]
+    assert all(len(title) == session_manager.TITLE_CHARS for _, title, _ in session.history)
+    assert sessions.get("a") is session
+
+
+def test_lru_and_idle_eviction(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(session_manager.time, "monotonic", lambda: now[0])
+    sessions = SessionManager(max_sessions=2, idle_seconds=60)
+    sessions.get("a")
+    sessions.get("b")
+    sessions.get("a")
+    sessions.get("c")
+    # "b" was the least recently used
+    assert len(sessions) == 2 and sessions.stats()["evicted_lru"] == 1
+    sessions.get("b")
+    assert sessions.stats()["created"] == 4
+
+    now[0] += 61
+    assert sessions.stats()["active"] == 0
+    assert sessions.stats()["evicted_idle"] == 2
+
+
+def test_sqlite_store_restores_history_across_managers(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    first = SessionManager(store=store)
+    session = first.get("user-1")
+    session.record("Docs", "allow")
+    first.save(session)
+
+    restored = SessionManager(store=SQLiteSessionStore(str(tmp_path / "sessions.db"))).get("user-1")
+    assert [(title, decision) for _, title, decision in restored.history] == [("Docs", "allow")]
+
+    first.drop("user-1", forget=True)
+    assert not SessionManager(store=store).get("user-1").history
+
+
+def test_store_entries_expire(tmp_path, monkeypatch):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    store.save("old", [["10:00:00", "Page", "warn"]])
+    real_time = time.time()
+    monkeypatch.setattr(session_manager.time, "time", lambda: real_time + 61)
+    assert store.load("old") is None
+
+
+def test_store_failures_fall_back_to_memory():
+    class BrokenStore:
+        def load(self, session_id):
+            raise OSError("store down")
+
+        save = delete = load
+
+    sessions = SessionManager(store=BrokenStore())
+    session = sessions.get("a")
+    sessions.save(session)
+    sessions.drop("a", forget=True)
+    assert sessions.stats()["store_errors"] == 3
+
+
+@pytest.mark.parametrize("url, kind", [("", None), ("sqlite:///{tmp}/s.db", "SQLiteSessionStore"),
+                                       ("memcached://localhost", None)])
+def test_create_store(tmp_path, url, kind):
+    store = create_store(url.format(tmp=tmp_path))
+    assert (type(store).__name__ if store is not None else None) == kind
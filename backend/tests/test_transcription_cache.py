@@ -0,0 +1,87 @@
+import io
+import hashlib
+
+import pytest
+
+import transcription_cache
+from transcription_cache import TranscriptionCache, hash_file, save_and_hash
+
+
+def test_save_and_hash_matches_hash_file(tmp_path):
+    data = b"RIFF" + bytes(range(256)) * 1000
+    path = str(tmp_path / "upload.wav")
+    digest, size = save_and_hash(io.BytesIO(data), path)
+    assert (digest, size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert hash_file(path) == digest
+
+
+def test_entries_are_keyed_by_language_and_model(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache.db"))
+    cache.put("abc", "hi", "whisper-large-v3", "नमस्ते")
+    assert cache.get("abc", "hi", "whisper-large-v3") == "नमस्ते"
+    assert cache.get("abc", "en", "whisper-large-v3") is None
+    assert cache.get("abc", "hi", "whisper-small") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(transcription_cache.time, "time", lambda: now[0])
+    cache = TranscriptionCache(str(tmp_path / "cache.db"), max_entries=2)
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.put(key, "en", "m", key.upper())
+    now[0] += 1
+    cache.get("a", "en", "m")
+    now[0] += 1
+    cache.put("c", "en", "m", "C")
+    assert [cache.get(key, "en", "m") for key in ("a", "b", "c")] == ["A", None, "C"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_old_entries_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(transcription_cache.time, "time", lambda: now[0])
+    cache = TranscriptionCache(str(tmp_path / "cache.db"), max_age_days=1)
+    cache.put("a", "en", "m", "A")
+    now[0] += 86401
+    assert cache.get("a", "en", "m") is None
+
+
+@pytest.fixture
+def whisper(tmp_path, monkeypatch):
+    import ai_services
+    service = ai_services.WhisperService()
+    service.cache = TranscriptionCache(str(tmp_path / "cache.db"))
+    service.api_key = "test"
+    service.uploads = []
+
+    def upload(path, language):
+        service.uploads.append(path)
+        return {"success": True, "transcript": service.answer, "language": language}
+
+    monkeypatch.setattr(service, "_upload", upload)
+    return service
+
+
+def test_resubmitted_audio_skips_whisper(whisper, tmp_path):
+    path = tmp_path / "complaint.wav"
+    path.write_bytes(b"same bytes")
+    whisper.answer = "Water pipe broken"
+    first = whisper.transcribe_audio(str(path), preprocess=False)
+    second = whisper.transcribe_audio(str(path), preprocess=False)
+    assert (first.get("cached"), second["cached"]) == (None, True)
+    assert second["transcript"] == "Water pipe broken"
+    assert len(whisper.uploads) == 1
+
+
+def test_empty_transcripts_and_one_off_audio_are_not_cached(whisper, tmp_path):
+    path = tmp_path / "complaint.wav"
+    path.write_bytes(b"silence")
+    whisper.answer = "  "
+    whisper.transcribe_audio(str(path), preprocess=False)
+    whisper.answer = "Streetlight out"
+    whisper.transcribe_audio(str(path), preprocess=False, use_cache=False)
+    assert whisper.cache.stats()["entries"] == 0
+    assert len(whisper.uploads) == 2
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from utils.ttl_cache import TTLCache
+
+
+def test_expiry_and_lru_eviction():
+    cache = TTLCache(ttl=0.05, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a", "gone") == "gone"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_should_cache_and_errors_are_not_stored():
+    cache = TTLCache(ttl=60)
+    assert cache.get_or_set("k", lambda: {"success": False}, should_cache=lambda r: r["success"]) == \
+        {"success": False}
+    assert cache.get("k") is None
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_set("k", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert cache.get_or_set("k", lambda: 7) == 7
+    assert cache.get("k") == 7
+
+
+def blocked_load(cache, key, value):
+    """Start get_or_set(key) in a thread whose loader waits until released"""
+    started, release, result = threading.Event(), threading.Event(), {}
+
+    def loader():
+        started.set()
+        release.wait(5)
+        return value
+
+    thread = threading.Thread(target=lambda: result.setdefault("value", cache.get_or_set(key, loader)))
+    thread.start()
+    assert started.wait(5)
+    return release, thread, result
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60)
+    release, leader, _ = blocked_load(cache, "k", "loaded")
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_or_set("k", lambda: "second load")))
+               for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    while cache.stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+    assert results == ["loaded"] * 3
+    assert cache.stats()["loads"] == 1
+
+
+@pytest.mark.parametrize("invalidate_key", ["k", None])
+def test_load_racing_an_invalidation_is_not_stored(invalidate_key):
+    cache = TTLCache(ttl=60)
+    release, thread, result = blocked_load(cache, "k", "stale")
+    cache.invalidate(invalidate_key)
+    release.set()
+    thread.join(5)
+
+    # The caller still gets its answer, but the next lookup reloads
+    assert result["value"] == "stale"
+    assert cache.get("k") is None
+    assert cache.get_or_set("k", lambda: "fresh") == "fresh"
+    assert cache.get("k") == "fresh"
+
+
+def test_invalidating_another_key_does_not_discard_a_load():
+    cache = TTLCache(ttl=60)
+    release, thread, _ = blocked_load(cache, "k", "value")
+    cache.invalidate("other")
+    release.set()
+    thread.join(5)
+    assert cache.get("k") == "value"
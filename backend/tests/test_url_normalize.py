@@ -0,0 +1,22 @@
+from utils.url_normalize import normalize_url, url_domain
+
+
+def test_domain_drops_www_mobile_and_port():
+    assert url_domain("https://www.YouTube.com:443/watch") == "youtube.com"
+    assert url_domain("https://m.facebook.com./") == "facebook.com"
+    assert url_domain("not a url") == ""
+
+
+def test_revisits_normalize_to_the_same_key():
+    same = [
+        "https://www.youtube.com/watch?v=abc&t=42s",
+        "http://m.youtube.com/watch/?utm_source=x&v=abc#comments",
+        "https://youtube.com/watch?feature=share&si=123&v=abc",
+    ]
+    assert {normalize_url(url) for url in same} == {"youtube.com/watch?v=abc"}
+
+
+def test_meaningful_query_is_kept_in_order():
+    assert normalize_url("https://example.com/search?q=a+b&page=2") == "example.com/search?page=2&q=a+b"
+    assert normalize_url("https://example.com") == "example.com/"
+    assert normalize_url("https://example.com/?v=1") != normalize_url("https://example.com/?v=2")
@@ -0,0 +1,108 @@
+import io
+import sqlite3
+import time
+
+import pytest
+
+from voice_jobs import COMPLETED, FAILED, QUEUED, RUNNING, QueueFullError, VoiceJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = VoiceJobQueue(db_path=str(tmp_path / "jobs.db"), workers=1, max_depth=3, lease_seconds=60)
+    yield queue
+    queue.stop(timeout=5)
+
+
+def wait_for(queue, job_id, statuses=(COMPLETED, FAILED), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id)['status']}")
+
+
+def test_jobs_complete_or_fail_with_the_handler_result(queue):
+    def handler(payload, set_stage):
+        set_stage("transcribing")
+        if payload["ok"]:
+            return {"success": True, "complaint_id": payload["n"]}, 201
+        return {"success": False, "error": "No speech"}, 422
+
+    queue.start(handler)
+    done = wait_for(queue, queue.submit({"ok": True, "n": 1}))
+    failed = wait_for(queue, queue.submit({"ok": False, "n": 2}))
+    assert (done["status"], done["result"]["complaint_id"]) == (COMPLETED, 1)
+    assert (failed["status"], failed["error"]) == (FAILED, "No speech")
+
+
+def test_worker_survives_a_failed_finish(queue, monkeypatch):
+    finish = queue._finish
+    calls = []
+
+    def flaky_finish(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        finish(*args)
+
+    def handler(payload, set_stage):
+        if payload["n"] == 1:
+            raise RuntimeError("boom")
+        return {"success": True}, 201
+
+    monkeypatch.setattr(queue, "_finish", flaky_finish)
+    queue.start(handler)
+    stuck = queue.submit({"n": 1})
+    assert wait_for(queue, queue.submit({"n": 2}))["status"] == COMPLETED
+    assert queue.stats()["workers_running"] == 1
+    # The unrecorded job is left to lease recovery
+    assert queue.get(stuck)["status"] == RUNNING
+
+
+def test_expired_lease_is_requeued_then_failed(queue, monkeypatch):
+    monkeypatch.setattr("voice_jobs.VOICE_JOB_MAX_ATTEMPTS", 2)
+    job_id = queue.submit({"n": 1})
+    for attempt in (1, 2):
+        assert queue._claim()[0] == job_id
+        queue._conn().execute("UPDATE voice_jobs SET lease_expires_at = 0")
+        queue.recover()
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == (FAILED, 2)
+
+    other = queue.submit({"n": 2})
+    queue._claim()
+    queue._conn().execute("UPDATE voice_jobs SET lease_expires_at = 0")
+    assert queue.recover() == 1
+    assert queue.get(other)["status"] == QUEUED
+
+
+def test_submit_rejects_past_max_depth(queue):
+    first = queue.submit({"n": 0})
+    for n in (1, 2):
+        queue.submit({"n": n})
+    with pytest.raises(QueueFullError):
+        queue.submit({"n": 3})
+    assert queue.get(first)["queue_position"] == 1
+
+
+def test_async_request_is_processed_synchronously_when_jobs_are_disabled(tmp_path, monkeypatch):
+    flask = pytest.importorskip("flask")
+    from routes import voice_routes
+
+    processed = []
+    monkeypatch.setattr(voice_routes, "VOICE_JOBS_ENABLED", False)
+    monkeypatch.setattr(voice_routes, "AUDIO_UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(voice_routes, "process_voice_complaint",
+                        lambda payload: (processed.append(payload) or {"success": True}, 201))
+    monkeypatch.setattr(voice_routes.voice_job_queue, "submit",
+                        lambda payload: pytest.fail("job queued with the workers disabled"))
+
+    app = flask.Flask(__name__)
+    app.register_blueprint(voice_routes.voice_routes)
+    response = app.test_client().post("/api/complaint/voice?async=true",
+                                      data={"audio": (io.BytesIO(b"RIFF"), "complaint.wav")})
+    assert response.status_code == 201
+    assert len(processed) == 1
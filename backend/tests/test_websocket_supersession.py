@@ -0,0 +1,137 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("groq")
+from fastapi.testclient import TestClient
+
+from models import ExtensionState, WebSocketMessage
+from services import ClassifierService
+
+
+class FakeCompletions:
+    """Async stand-in for AsyncGroq's chat.completions; each call waits `delay` seconds"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        answer = json.dumps({"decision": "warn", "confidence": 0.9, "actions": []})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.delenv("SESSION_STORE_URL", raising=False)
+    classifier = ClassifierService()
+    classifier.rules = None
+    classifier.completions = FakeCompletions()
+    classifier.async_client = SimpleNamespace(chat=SimpleNamespace(completions=classifier.completions))
+    return classifier
+
+
+def page(request_id, tab="1", url="https://example.com/watch?v=1"):
+    return ExtensionState(request_id=request_id, tab_id=tab, url=url, title=f"Page {request_id}")
+
+
+async def cancel_after(task, seconds):
+    await asyncio.sleep(seconds)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_cancel_during_debounce_skips_the_llm(classifier):
+    async def scenario():
+        task = asyncio.create_task(classifier.aprocess_state(page("r1"), "s", debounce=0.5))
+        await cancel_after(task, 0.01)
+
+    asyncio.run(scenario())
+    stats = classifier.metrics()["classifier"]
+    assert classifier.completions.calls == 0
+    assert (stats["llm_calls"], stats["llm_cancelled"]) == (0, 0)
+
+
+def test_cancel_during_llm_call_is_counted(classifier):
+    classifier.completions.delay = 5
+
+    async def scenario():
+        task = asyncio.create_task(classifier.aprocess_state(page("r1"), "s"))
+        await cancel_after(task, 0.05)
+
+    asyncio.run(scenario())
+    stats = classifier.metrics()["classifier"]
+    assert (stats["llm_calls"], stats["llm_cancelled"]) == (1, 1)
+    # A cancelled call leaves nothing behind for the next request to reuse
+    assert classifier.verdicts.stats()["size"] == 0
+
+
+def test_cached_verdict_skips_the_debounce(classifier):
+    async def scenario():
+        first = await classifier.aprocess_state(page("r1"), "s")
+        # A cache hit must answer at once, well inside this 5s debounce
+        second = await asyncio.wait_for(classifier.aprocess_state(page("r2"), "s", debounce=5), 1)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert (first.decision, second.decision) == ("warn", "warn")
+    assert second.request_id == "r2"
+    assert classifier.completions.calls == 1
+
+
+@pytest.fixture
+def socket_app(monkeypatch):
+    import main
+    cancelled = []
+
+    async def aprocess_state(state, session_id=None, debounce=0.0):
+        try:
+            if state.request_id == "slow":
+                await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(state.request_id)
+            raise
+        return WebSocketMessage(request_id=state.request_id, actions=[], decision="warn", confidence=0.9)
+
+    monkeypatch.setattr(main.classifier, "aprocess_state", aprocess_state)
+    monkeypatch.setattr(main, "ws_stats", {"connections_total": 0, "active": 0, "messages": 0, "superseded": 0})
+    return main, cancelled
+
+
+def test_newer_state_for_a_tab_supersedes_the_older_one(socket_app):
+    main, cancelled = socket_app
+    with TestClient(main.app) as client, client.websocket_connect("/ws") as ws:
+        ws.send_text(json.dumps({"request_id": "slow", "tab_id": "A", "url": "https://a.example"}))
+        ws.send_text(json.dumps({"request_id": "other-tab", "tab_id": "B", "url": "https://b.example"}))
+        ws.send_text(json.dumps({"request_id": "fast", "tab_id": "A", "url": "https://a.example/2"}))
+        answers = {}
+        for _ in range(3):
+            message = ws.receive_json()
+            answers[message["request_id"]] = message
+        # Cancelled when "fast" arrived, not just when the socket closed
+        assert cancelled == ["slow"]
+
+    assert answers["slow"]["superseded"] is True
+    assert answers["slow"]["actions"] == []
+    assert answers["fast"]["superseded"] is False
+    assert answers["fast"]["decision"] == "warn"
+    assert answers["other-tab"]["superseded"] is False
+    assert main.ws_stats == {"connections_total": 1, "active": 0, "messages": 3, "superseded": 1}
+
+
+def test_finished_answers_are_not_superseded(socket_app):
+    main, cancelled = socket_app
+    with TestClient(main.app) as client, client.websocket_connect("/ws") as ws:
+        ws.send_text(json.dumps({"request_id": "first", "tab_id": "A", "url": "https://a.example"}))
+        assert ws.receive_json()["request_id"] == "first"
+        ws.send_text(json.dumps({"request_id": "second", "tab_id": "A", "url": "https://a.example/2"}))
+        assert ws.receive_json()["request_id"] == "second"
+
+    assert main.ws_stats["superseded"] == 0
+    assert cancelled == []
@@ -0,0 +1,150 @@
+"""
+Transcription Cache for JantaVoice
+Persistent, content-addressed cache of Whisper transcripts keyed by audio hash
+"""
+
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from threading import local
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_CACHE_PATH = os.getenv("TRANSCRIPTION_CACHE_PATH", "./transcription_cache.db")
+TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", "10000"))
+TRANSCRIPTION_CACHE_MAX_AGE_DAYS = float(os.getenv("TRANSCRIPTION_CACHE_MAX_AGE_DAYS", "30"))
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def save_and_hash(stream, path: str) -> Tuple[str, int]:
+    """
+    Stream an upload to disk, hashing it on the way
+
+    Returns:
+        (SHA-256 hex digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as out:
+        while True:
+            chunk = stream.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file already on disk"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """
+    SQLite-backed transcript cache
+
+    Entries are keyed by (audio SHA-256, language, model), so the same bytes
+    are only ever sent to Whisper once per model. Entries older than
+    `max_age_days` or beyond the `max_entries` least recently used are evicted.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            audio_hash TEXT NOT NULL,
+            language TEXT NOT NULL,
+            model TEXT NOT NULL,
+            transcript TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            PRIMARY KEY (audio_hash, language, model)
+        );
+        CREATE INDEX IF NOT EXISTS idx_transcripts_last_used ON transcripts(last_used_at);
+    """
+
+    def __init__(self, db_path: str = TRANSCRIPTION_CACHE_PATH,
+                 max_entries: int = TRANSCRIPTION_CACHE_MAX_ENTRIES,
+                 max_age_days: float = TRANSCRIPTION_CACHE_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self._local = local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread (and per-process) connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def get(self, audio_hash: str, language: str, model: str) -> Optional[str]:
+        """Cached transcript, or None"""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT transcript FROM transcripts WHERE audio_hash = ? AND language = ? AND model = ? "
+            "AND created_at >= ?", (audio_hash, language, model, now - self.max_age_seconds)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE transcripts SET last_used_at = ? WHERE audio_hash = ? AND language = ? AND model = ?",
+                     (now, audio_hash, language, model))
+        self._count("hits")
+        return row[0]
+
+    def put(self, audio_hash: str, language: str, model: str, transcript: str):
+        """Store a transcript and evict expired / least recently used entries"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO transcripts "
+                     "(audio_hash, language, model, transcript, created_at, last_used_at) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", (audio_hash, language, model, transcript, now, now))
+        self._count("stores")
+        self._evict(now)
+
+    def _evict(self, now: float):
+        conn = self._conn()
+        evicted = conn.execute("DELETE FROM transcripts WHERE created_at < ?",
+                               (now - self.max_age_seconds,)).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0] - self.max_entries
+        if excess > 0:
+            evicted += conn.execute(
+                "DELETE FROM transcripts WHERE rowid IN "
+                "(SELECT rowid FROM transcripts ORDER BY last_used_at LIMIT ?)", (excess,)).rowcount
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters (this process) and current size"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["entries"] = self._conn().execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        stats["max_entries"] = self.max_entries
+        return stats
+
+
+# Singleton instance
+transcription_cache = TranscriptionCache()
@@ -0,0 +1,52 @@
+import base64
+import json
+import datetime
+
+# Keyset pagination helpers.
+# A cursor is an opaque, URL-safe token holding the sort value and the
+# tie-breaker key of the last item on the previous page.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort_value, key):
+    """Encode (sort_value, key) into an opaque cursor string"""
+    if isinstance(sort_value, datetime.datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    payload = json.dumps([sort_value, str(key)], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor back into (sort_value, key).
+    Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if isinstance(sort_value, dict) and "$date" in sort_value:
+        sort_value = datetime.datetime.fromisoformat(sort_value["$date"])
+    return sort_value, key
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a requested page size to [1, maximum]"""
+    try:
+        size = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def parse_date(value, end_of_day=False):
+    """Parse 'YYYY-MM-DD' or an ISO datetime; bare dates can snap to the end of the day"""
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if end_of_day and len(value) <= 10:
+        parsed = datetime.datetime.combine(parsed.date(), datetime.time.max)
+    return parsed
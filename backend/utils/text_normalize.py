@@ -0,0 +1,19 @@
+import re
+import unicodedata
+
+# Normalisation for cache keys and keyword matching.
+# Transcripts of the same sentence differ in Unicode form, spacing and
+# punctuation (Whisper is inconsistent about the danda), so those are folded away.
+
+# Danda / double danda, Devanagari abbreviation sign, ASCII and typographic punctuation
+_PUNCTUATION_RE = re.compile(r"[।॥॰.,!?;:'\"“”‘’()\[\]{}<>\-–—…/\\|*_~`]+")
+# Zero-width joiners and the like only affect rendering
+_INVISIBLE_RE = re.compile("[\u200b-\u200f\u2060\ufeff]")
+
+
+def normalize_text(text):
+    """NFC, lower-case, punctuation-free, single-spaced form of text"""
+    text = unicodedata.normalize("NFC", str(text or ""))
+    text = _INVISIBLE_RE.sub("", text)
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return " ".join(text.split()).lower()
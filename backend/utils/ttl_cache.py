@@ -0,0 +1,150 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Small in-process cache with per-entry expiry and LRU eviction.
+# Used for dashboard aggregates and other results that may be a few
+# seconds stale but are expensive to recompute on every request.
+
+_MISSING = object()
+
+
+class _Flight:
+    """A load in progress that other callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl=5.0, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        # Bumped by invalidate(); a load started before an invalidation must not be stored
+        self._generations = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._loads = 0
+        self._coalesced = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing/expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entry if full"""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl):
+        # Call with _lock held
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get_or_set(self, key, loader, ttl=None, should_cache=None):
+        """
+        Return the cached value, computing and storing it with loader() on a miss
+
+        Concurrent misses for the same key are coalesced: one caller runs
+        loader() and the others wait for its result (or its exception).
+        Results for which should_cache(value) is false are shared with the
+        waiting callers but not stored, and so are results of loads that
+        were running when the key was invalidated (they may predate the write
+        that triggered the invalidation).
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._loads += 1
+                generation = self._key_generation(key)
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            flight.value = value
+            if should_cache is None or should_cache(value):
+                self._set_if_current(key, value, ttl, generation)
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._generations.pop(key, None)
+            flight.done.set()
+
+    def _key_generation(self, key):
+        # Call with _lock held
+        return self._generation, self._generations.get(key, 0)
+
+    def _set_if_current(self, key, value, ttl, generation):
+        with self._lock:
+            if self._key_generation(key) == generation:
+                self._store(key, value, ttl)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._generation += 1
+                self._generations.clear()
+            else:
+                self._entries.pop(key, None)
+                if key in self._inflight:
+                    self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "loads": self._loads,
+                "coalesced": self._coalesced,
+                # Loads avoided by cache hits and by waiting on an in-flight load
+                "loads_saved": self._hits + self._coalesced,
+            }
@@ -0,0 +1,30 @@
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# Normalisation of page URLs for the productivity classifier's verdict cache.
+# Revisits of the same page rarely have the same URL string: tracking
+# parameters, fragments, "www."/"m." hosts and parameter order all vary.
+
+# Query parameters that never change what the page is
+_TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "igshid", "si", "feature", "pp", "ref", "ref_src",
+                    "ab_channel", "t", "start", "index", "_ga", "spm"}
+_TRACKING_PREFIXES = ("utm_", "mc_")
+_HOST_PREFIXES = ("www.", "m.", "mobile.")
+
+
+def url_domain(url):
+    """Lower-case host without www./m. and port, e.g. 'youtube.com'"""
+    host = (urlsplit(url).hostname or "").rstrip(".")
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def normalize_url(url):
+    """Host, path and sorted non-tracking query of url, without scheme or fragment"""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in _TRACKING_PARAMS and not key.startswith(_TRACKING_PREFIXES))
+    normalized = url_domain(url) + path
+    return f"{normalized}?{urlencode(query)}" if query else normalized
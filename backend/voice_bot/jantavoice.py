@@ -177,6 +177,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from voice_bot.voice_bot_hindi import speak_hindi, listen_hindi
 from voice_bot.gemini_ai import ask_gemini_followup_or_result, is_structured_json, generate_complaint_id
 from utils.telegram_utils import send_telegram_message
+from department_classifier import department_label, HINDI_LABELS
+from voice_bot.prompts import (GREETINGS, CONVERSATION_STEPS, RETRY_PROMPT, TECHNICAL_ISSUE_PROMPT,
+                               SUMMARY, FINAL_MESSAGE)
 
 
 def send_to_backend(json_data):
@@ -221,67 +224,12 @@ def start_conversation():
     print("🔁 शिकायत दर्ज करने की प्रक्रिया शुरू...\n")
     
     # Human-like introduction
-    greetings = [
-    "नमस्कार! जनतावॉइस में आपका हार्दिक स्वागत है। ",
-    "स्वागत है आपका! जनतावॉइस में। ",
-    "नमस्कार! जनतावॉइस में आपका हार्दिक स्वागत है। आइए"
-]
-    
     import random
-    speak_hindi(random.choice(greetings))
+    speak_hindi(random.choice(GREETINGS))
     time.sleep(1)
     
-    # Conversation flow with predefined steps (including description)
-    conversation_steps = [
-    {
-        "question": "कृपया अपनी मुख्य समस्या या शिकायत बताएं।",
-        "field": "शिकायत",
-        "followup": [
-            "यह वाकई एक गंभीर विषय लग रहा है।",
-            "मैं आपकी बात समझ रही हूँ।",
-            "ठीक है, इसे मैं नोट कर रही हूँ।"
-        ]
-    },
-    {
-        "question": "कृपया इस समस्या के बारे में विस्तार से बताएं — जैसे कब से यह हो रही है और किस तरह की परेशानी हो रही है?",
-        "field": "विवरण",
-        "followup": [
-            "जी हाँ, यह जानकारी बहुत आवश्यक है।",
-            "आपकी बात समझ में आ गई।",
-            "ध्यानपूर्वक नोट कर रही हूँ।"
-        ]
-    },
-    {
-        "question": "यह समस्या कहाँ हो रही है? कृपया पूरा स्थान या पता बताएं।",
-        "field": "स्थान",
-        "followup": [
-            "समझ गई।",
-            "ठीक है, स्थान नोट किया गया है।",
-            "आपका धन्यवाद।"
-        ]
-    },
-    {
-        "question": "आपका नाम क्या है कृपया बताएं?",
-        "field": "शिकायतकर्ता का नाम",
-        "followup": [
-            "बहुत अच्छा, धन्यवाद।",
-            "ठीक है, नाम दर्ज कर लिया गया है।",
-            "जी, नोट कर लिया है।"
-        ]
-    },
-    {
-        "question": "कृपया अपना मोबाइल नंबर बताएं ताकि हम आपसे संपर्क कर सकें।",
-        "field": "मोबाइल नंबर",
-        "followup": [
-            "धन्यवाद, नंबर नोट कर लिया है।",
-            "ठीक है, आपका नंबर सुरक्षित है।",
-            "बहुत धन्यवाद।"
-        ]
-    }
-]
-    
     # Step-by-step conversation
-    for step in conversation_steps:
+    for step in CONVERSATION_STEPS:
         retry_count = 0
         
         while retry_count <= max_retries:
@@ -292,7 +240,7 @@ def start_conversation():
             if not user_input:
                 retry_count += 1
                 if retry_count <= max_retries:
-                    speak_hindi("कृपया दोबारा स्पष्ट रूप से बोलें।")
+                    speak_hindi(RETRY_PROMPT)
                 continue
                 
             # Store the response
@@ -304,36 +252,20 @@ def start_conversation():
             break
         
         if retry_count > max_retries:
-            speak_hindi("खेद है, तकनीकी समस्या हो रही है। कृपया बाद में पुनः प्रयास करें।")
+            speak_hindi(TECHNICAL_ISSUE_PROMPT)
             return None
     
     # Determine department using simple logic (saves API calls)
-    complaint_text = complaint_data["शिकायत"].lower()
-    description_text = complaint_data["विवरण"].lower()
-    combined_text = complaint_text + " " + description_text
-    
-    if any(word in combined_text for word in ["सड़क", "गड्ढा", "road", "street", "pothole"]):
-        complaint_data["विभाग"] = "सड़क विभाग"
-    elif any(word in combined_text for word in ["पानी", "नल", "water", "tap", "pipe"]):
-        complaint_data["विभाग"] = "जल विभाग"
-    elif any(word in combined_text for word in ["बिजली", "light", "electricity", "power"]):
-        complaint_data["विभाग"] = "विद्युत विभाग"
-    elif any(word in combined_text for word in ["कूड़ा", "गंदगी", "garbage", "waste", "cleaning"]):
-        complaint_data["विभाग"] = "स्वच्छता विभाग"
-    elif any(word in combined_text for word in ["अस्पताल", "doctor", "health", "medical"]):
-        complaint_data["विभाग"] = "स्वास्थ्य विभाग"
-    else:
-        complaint_data["विभाग"] = "सामान्य प्रशासन"
+    combined_text = complaint_data["शिकायत"] + " " + complaint_data["विवरण"]
+    complaint_data["विभाग"] = department_label(combined_text, HINDI_LABELS)
     
     # Generate complaint ID
     complaint_data["complaint_id"] = generate_complaint_id()
     
     # Create summary with description
-    summary = f"""आपकी शिकायत दर्ज हो गई है। """
+    summary = SUMMARY
     
-    final_message = """आपकी शिकायत सफलतापूर्वक दर्ज हो गई है। 
-    जल्द ही {complaint_data['विभाग']} से संपर्क किया जाएगा। 
-    धन्यवाद!"""
+    final_message = FINAL_MESSAGE.format(department=complaint_data["विभाग"])
     
     complaint_data["बोलने_लायक_सारांश"] = summary
     complaint_data["अंतिम_घोषणा"] = final_message
@@ -0,0 +1,363 @@
+"""
+Streaming voice intake for JantaVoice
+The browser streams audio over a WebSocket while the caller is speaking.
+Audio is segmented at pauses, each segment is transcribed as soon as it is
+complete, and partial transcripts and fields are pushed back before the
+recording ends. Closing the stream saves the complaint through the same
+pipeline as POST /api/complaint/voice.
+
+Protocol (JSON text messages; audio as binary messages):
+    client  {"type": "start", "name": "...", "phone": "...",
+             "encoding": "pcm_s16le" | "webm" | "ogg", "sample_rate": 48000, "channels": 1}
+    client  <binary audio frames>
+    client  {"type": "stop"}                      (or simply close the socket)
+    server  {"type": "ready", "session_id": "..."}
+    server  {"type": "speech", "speaking": true | false}
+    server  {"type": "partial", "segment": 0, "transcript": "...", "text": "..."}
+    server  {"type": "fields", "fields": {...}}
+    server  {"type": "complaint", "status": 201, ...}   (same body as the HTTP endpoint)
+    server  {"type": "error", "error": "..."}
+
+pcm_s16le is raw little-endian 16-bit PCM (e.g. from an AudioWorklet);
+webm/ogg are MediaRecorder chunks and are decoded through ffmpeg.
+
+Run with:  python voice_bot/jantavoice_stream.py
+"""
+
+import os
+import sys
+import json
+import uuid
+import shutil
+import asyncio
+import logging
+from collections import deque
+
+import numpy as np
+import websockets
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_preprocessing import (AUDIO_TARGET_SAMPLE_RATE, AUDIO_VAD_FRAME_MS, AUDIO_VAD_THRESHOLD_DB,
+                                 AUDIO_VAD_MARGIN_DB, AUDIO_VAD_PADDING_MS, FFMPEG_BINARY,
+                                 encode_audio, resample, ffmpeg_available)
+from ai_services import transcribe_hindi_audio
+from rule_extraction import pre_extract
+from transcription_cache import hash_file
+from routes.voice_routes import process_voice_complaint, AUDIO_UPLOAD_FOLDER
+
+logger = logging.getLogger(__name__)
+
+STREAM_HOST = os.getenv("JANTAVOICE_STREAM_HOST", "0.0.0.0")
+STREAM_PORT = int(os.getenv("JANTAVOICE_STREAM_PORT", "8765"))
+# A pause this long after speech ends the current segment
+STREAM_PAUSE_MS = int(os.getenv("STREAM_PAUSE_MS", "600"))
+# Segments are cut here even without a pause
+STREAM_MAX_SEGMENT_SECONDS = float(os.getenv("STREAM_MAX_SEGMENT_SECONDS", "15"))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+# Segments of one stream being transcribed at the same time
+STREAM_SEGMENT_WORKERS = int(os.getenv("STREAM_SEGMENT_WORKERS", "3"))
+STREAM_START_TIMEOUT = float(os.getenv("STREAM_START_TIMEOUT", "10"))
+STREAM_MAX_MESSAGE_BYTES = int(os.getenv("STREAM_MAX_MESSAGE_BYTES", str(1024 * 1024)))
+
+# Frames of energy history used for the noise floor (about 30 s)
+NOISE_FLOOR_FRAMES = 1000
+
+
+class PCMDecoder:
+    """Interleaved s16le PCM at any rate -> mono float32 at AUDIO_TARGET_SAMPLE_RATE"""
+
+    def __init__(self, on_samples, sample_rate=AUDIO_TARGET_SAMPLE_RATE, channels=1):
+        self.on_samples = on_samples
+        self.sample_rate = int(sample_rate)
+        self.channels = max(1, int(channels))
+        self._leftover = b""
+        # Integer-ratio resampling averages blocks, so carry the incomplete block over
+        self._factor = (self.sample_rate // AUDIO_TARGET_SAMPLE_RATE
+                        if self.sample_rate % AUDIO_TARGET_SAMPLE_RATE == 0 else None)
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    async def start(self):
+        pass
+
+    async def feed(self, data: bytes):
+        data = self._leftover + data
+        usable = len(data) - len(data) % (2 * self.channels)
+        self._leftover = data[usable:]
+        if not usable:
+            return
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768
+        samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self._factor:
+            samples = np.concatenate([self._carry, samples])
+            usable = len(samples) - len(samples) % self._factor
+            self._carry = samples[usable:]
+            samples = samples[:usable]
+        samples = resample(samples, self.sample_rate, AUDIO_TARGET_SAMPLE_RATE).astype(np.float32)
+        if len(samples):
+            await self.on_samples(samples)
+
+    async def close(self):
+        pass
+
+
+class FFmpegDecoder:
+    """Compressed MediaRecorder chunks (webm/ogg) piped through one ffmpeg process"""
+
+    def __init__(self, on_samples):
+        self.on_samples = on_samples
+        self._process = None
+        self._reader = None
+
+    async def start(self):
+        if not ffmpeg_available():
+            raise RuntimeError("ffmpeg is required for compressed streams; send pcm_s16le instead")
+        # Small probe so decoding starts with the first chunk instead of after seconds of input
+        self._process = await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-probesize", "4096", "-analyzeduration", "0", "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(AUDIO_TARGET_SAMPLE_RATE), "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        leftover = b""
+        while True:
+            chunk = await self._process.stdout.read(16384)
+            if not chunk:
+                break
+            chunk = leftover + chunk
+            usable = len(chunk) - len(chunk) % 2
+            leftover = chunk[usable:]
+            await self.on_samples(np.frombuffer(chunk[:usable], dtype="<i2").astype(np.float32) / 32768)
+
+    async def feed(self, data: bytes):
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def close(self):
+        if self._process is None:
+            return
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        await self._reader
+        await self._process.wait()
+
+
+class StreamSession:
+    """One caller's stream: VAD segmentation, per-segment transcription, finalization"""
+
+    def __init__(self, websocket, start):
+        self.websocket = websocket
+        self.session_id = uuid.uuid4().hex
+        self.known_fields = {"name": start.get("name"), "phone": start.get("phone")}
+        self.rate = AUDIO_TARGET_SAMPLE_RATE
+        self.frame = self.rate * AUDIO_VAD_FRAME_MS // 1000
+        self.pause_frames = STREAM_PAUSE_MS // AUDIO_VAD_FRAME_MS
+        self.max_segment_frames = int(STREAM_MAX_SEGMENT_SECONDS * 1000 / AUDIO_VAD_FRAME_MS)
+        self.padding_frames = max(1, AUDIO_VAD_PADDING_MS // AUDIO_VAD_FRAME_MS)
+
+        self.audio = []
+        self.total_samples = 0
+        self._truncated = False
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._energies = deque(maxlen=NOISE_FLOOR_FRAMES)
+        self._segment = []
+        self._segment_has_speech = False
+        self._silent_frames = 0
+        self._speaking = False
+
+        self._next_segment = 0
+        self._tasks = []
+        self._transcripts = {}
+        self._last_fields = None
+        self._workers = asyncio.Semaphore(STREAM_SEGMENT_WORKERS)
+
+        encoding = (start.get("encoding") or "pcm_s16le").lower()
+        if encoding == "pcm_s16le":
+            self.decoder = PCMDecoder(self.add_samples, start.get("sample_rate") or AUDIO_TARGET_SAMPLE_RATE,
+                                      start.get("channels") or 1)
+        elif encoding in ("webm", "ogg"):
+            self.decoder = FFmpegDecoder(self.add_samples)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    async def send(self, message):
+        try:
+            await self.websocket.send(json.dumps(message, ensure_ascii=False, default=str))
+        except websockets.ConnectionClosed:
+            pass  # The complaint is still saved; the caller just doesn't see the result
+
+    async def add_samples(self, samples):
+        """Append decoded audio and cut a segment at every pause after speech"""
+        if self.total_samples >= STREAM_MAX_SECONDS * self.rate:
+            if not self._truncated:
+                self._truncated = True
+                logger.warning(f"Stream {self.session_id} reached {STREAM_MAX_SECONDS:.0f}s; dropping further audio")
+                await self.send({"type": "error",
+                                 "error": f"Recording limit of {STREAM_MAX_SECONDS:.0f} seconds reached; "
+                                          "further audio is ignored"})
+            return
+        self.audio.append(samples)
+        self.total_samples += len(samples)
+
+        buffered = np.concatenate([self._pending, samples])
+        count = len(buffered) // self.frame
+        self._pending = buffered[count * self.frame:]
+        if count == 0:
+            return
+        frames = buffered[:count * self.frame].reshape(count, self.frame)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        self._energies.extend(energy_db.tolist())
+        noise_floor = np.percentile(np.fromiter(self._energies, dtype=np.float64), 10)
+        voiced = energy_db > max(AUDIO_VAD_THRESHOLD_DB, noise_floor + AUDIO_VAD_MARGIN_DB)
+
+        for frame, is_speech in zip(frames, voiced):
+            self._segment.append(frame)
+            if is_speech:
+                self._segment_has_speech = True
+                self._silent_frames = 0
+                if not self._speaking:
+                    self._speaking = True
+                    await self.send({"type": "speech", "speaking": True})
+                continue
+
+            self._silent_frames += 1
+            if self._speaking and self._silent_frames >= self.pause_frames:
+                self._speaking = False
+                await self.send({"type": "speech", "speaking": False})
+            if not self._segment_has_speech:
+                # Only keep a little lead-in silence before the next utterance
+                del self._segment[:-self.padding_frames]
+            elif self._silent_frames >= self.pause_frames:
+                self._cut_segment()
+        if self._segment_has_speech and len(self._segment) >= self.max_segment_frames:
+            self._cut_segment()
+
+    def _cut_segment(self):
+        samples = np.concatenate(self._segment)
+        self._segment = []
+        self._segment_has_speech = False
+        self._silent_frames = 0
+        index = self._next_segment
+        self._next_segment += 1
+        self._tasks.append(asyncio.create_task(self._transcribe_segment(index, samples)))
+
+    def transcript(self):
+        """Transcript of all segments finished so far, up to the first one still pending"""
+        parts = []
+        for index in range(self._next_segment):
+            if index not in self._transcripts:
+                break
+            parts.append(self._transcripts[index])
+        return " ".join(p for p in parts if p)
+
+    async def _transcribe_segment(self, index, samples):
+        async with self._workers:
+            path, _ = await asyncio.to_thread(encode_audio, samples, self.rate)
+            try:
+                # Segments are already trimmed 16 kHz mono and never resubmitted
+                result = await asyncio.to_thread(transcribe_hindi_audio, path, preprocess=False, use_cache=False)
+            finally:
+                os.remove(path)
+
+        if not result.get("success"):
+            self._transcripts[index] = ""
+            logger.warning(f"Stream {self.session_id} segment {index} failed: {result.get('error')}")
+            await self.send({"type": "partial", "segment": index, "error": result.get("error")})
+            return
+
+        self._transcripts[index] = result.get("transcript", "").strip()
+        text = self.transcript()
+        await self.send({"type": "partial", "segment": index,
+                         "transcript": self._transcripts[index], "text": text})
+        # Rule-based fields are instant; the LLM runs once, at finalization
+        pre = pre_extract(text, self.known_fields) if text else {"fields": {}, "hints": {}}
+        fields = {**pre["hints"], **pre["fields"]}
+        if fields and fields != self._last_fields:
+            self._last_fields = fields
+            await self.send({"type": "fields", "fields": fields})
+
+    async def finalize(self):
+        """Flush the last segment, wait for all transcripts and save the complaint"""
+        await self.decoder.close()
+        if self._segment_has_speech:
+            self._cut_segment()
+        await asyncio.gather(*self._tasks)
+
+        transcript = self.transcript()
+        if not transcript:
+            await self.send({"type": "error", "error": "No speech detected"})
+            return None
+
+        # Keep the recording like uploads do, for playback in the admin panel
+        temp_path, fmt = await asyncio.to_thread(encode_audio, np.concatenate(self.audio), self.rate)
+        audio_filename = f"{self.session_id}.{fmt}"
+        audio_path = os.path.join(AUDIO_UPLOAD_FOLDER, audio_filename)
+        await asyncio.to_thread(shutil.move, temp_path, audio_path)
+
+        payload = {
+            "audio_path": audio_path,
+            "audio_filename": audio_filename,
+            "audio_sha256": await asyncio.to_thread(hash_file, audio_path),
+            "name": self.known_fields["name"],
+            "phone": self.known_fields["phone"],
+            "transcript": transcript
+        }
+        body, status = await asyncio.to_thread(process_voice_complaint, payload)
+        logger.info(f"Stream {self.session_id} finalized: {self._next_segment} segments, "
+                    f"{self.total_samples / self.rate:.1f}s, status {status}")
+        await self.send(dict(body, type="complaint", status=status))
+        return body
+
+
+async def handle_stream(websocket, path=None):
+    """WebSocket handler (websockets passes `path` only in older versions)"""
+    try:
+        start = json.loads(await asyncio.wait_for(websocket.recv(), timeout=STREAM_START_TIMEOUT))
+        if not isinstance(start, dict) or start.get("type") != "start":
+            raise ValueError("First message must be {\"type\": \"start\", ...}")
+        session = StreamSession(websocket, start)
+        await session.decoder.start()
+    except (asyncio.TimeoutError, ValueError, RuntimeError) as e:
+        await websocket.send(json.dumps({"type": "error", "error": str(e) or "Timed out waiting for start"}))
+        return
+    except websockets.ConnectionClosed:
+        return
+
+    logger.info(f"Stream {session.session_id} started")
+    await session.send({"type": "ready", "session_id": session.session_id})
+    try:
+        async for message in websocket:
+            if isinstance(message, bytes):
+                try:
+                    await session.decoder.feed(message)
+                except (BrokenPipeError, ConnectionResetError):
+                    await session.send({"type": "error", "error": "Audio decoder stopped, finalizing"})
+                    break
+                continue
+            try:
+                control = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(control, dict) and control.get("type") == "stop":
+                break
+    except websockets.ConnectionClosed:
+        logger.info(f"Stream {session.session_id} closed by client")
+
+    try:
+        await session.finalize()
+    except Exception as e:
+        logger.exception(f"Stream {session.session_id} finalization failed: {e}")
+        await session.send({"type": "error", "error": str(e)})
+
+
+async def serve():
+    async with websockets.serve(handle_stream, STREAM_HOST, STREAM_PORT, max_size=STREAM_MAX_MESSAGE_BYTES):
+        logger.info(f"Streaming voice intake on ws://{STREAM_HOST}:{STREAM_PORT}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())
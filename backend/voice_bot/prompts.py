@@ -0,0 +1,85 @@
+"""
+Fixed voice bot prompts
+Everything the voice bot says that does not depend on the caller lives here,
+so the TTS cache can synthesize it ahead of time (python voice_bot/tts_cache.py prewarm)
+"""
+
+from department_classifier import HINDI_LABELS
+
+GREETINGS = [
+    "नमस्कार! जनतावॉइस में आपका हार्दिक स्वागत है। ",
+    "स्वागत है आपका! जनतावॉइस में। ",
+    "नमस्कार! जनतावॉइस में आपका हार्दिक स्वागत है। आइए"
+]
+
+# Conversation flow with predefined steps (including description)
+CONVERSATION_STEPS = [
+    {
+        "question": "कृपया अपनी मुख्य समस्या या शिकायत बताएं।",
+        "field": "शिकायत",
+        "followup": [
+            "यह वाकई एक गंभीर विषय लग रहा है।",
+            "मैं आपकी बात समझ रही हूँ।",
+            "ठीक है, इसे मैं नोट कर रही हूँ।"
+        ]
+    },
+    {
+        "question": "कृपया इस समस्या के बारे में विस्तार से बताएं — जैसे कब से यह हो रही है और किस तरह की परेशानी हो रही है?",
+        "field": "विवरण",
+        "followup": [
+            "जी हाँ, यह जानकारी बहुत आवश्यक है।",
+            "आपकी बात समझ में आ गई।",
+            "ध्यानपूर्वक नोट कर रही हूँ।"
+        ]
+    },
+    {
+        "question": "यह समस्या कहाँ हो रही है? कृपया पूरा स्थान या पता बताएं।",
+        "field": "स्थान",
+        "followup": [
+            "समझ गई।",
+            "ठीक है, स्थान नोट किया गया है।",
+            "आपका धन्यवाद।"
+        ]
+    },
+    {
+        "question": "आपका नाम क्या है कृपया बताएं?",
+        "field": "शिकायतकर्ता का नाम",
+        "followup": [
+            "बहुत अच्छा, धन्यवाद।",
+            "ठीक है, नाम दर्ज कर लिया गया है।",
+            "जी, नोट कर लिया है।"
+        ]
+    },
+    {
+        "question": "कृपया अपना मोबाइल नंबर बताएं ताकि हम आपसे संपर्क कर सकें।",
+        "field": "मोबाइल नंबर",
+        "followup": [
+            "धन्यवाद, नंबर नोट कर लिया है।",
+            "ठीक है, आपका नंबर सुरक्षित है।",
+            "बहुत धन्यवाद।"
+        ]
+    }
+]
+
+RETRY_PROMPT = "कृपया दोबारा स्पष्ट रूप से बोलें।"
+TECHNICAL_ISSUE_PROMPT = "खेद है, तकनीकी समस्या हो रही है। कृपया बाद में पुनः प्रयास करें।"
+NO_INPUT_PROMPT = "आपने कुछ नहीं कहा, कृपया फिर से प्रयास करें।"
+RECOGNITION_ERROR_PROMPT = "खेद है, समस्या हुई। कृपया पुनः प्रयास करें।"
+
+SUMMARY = "आपकी शिकायत दर्ज हो गई है। "
+
+# Formatted with the department's Hindi name
+FINAL_MESSAGE = """आपकी शिकायत सफलतापूर्वक दर्ज हो गई है।
+    जल्द ही {department} से संपर्क किया जाएगा।
+    धन्यवाद!"""
+
+
+def all_prompts():
+    """Every fixed prompt, for pre-warming the TTS cache"""
+    prompts = list(GREETINGS)
+    for step in CONVERSATION_STEPS:
+        prompts.append(step["question"])
+        prompts.extend(step["followup"])
+    prompts.extend([RETRY_PROMPT, TECHNICAL_ISSUE_PROMPT, NO_INPUT_PROMPT, RECOGNITION_ERROR_PROMPT, SUMMARY])
+    prompts.extend(FINAL_MESSAGE.format(department=label) for label in HINDI_LABELS.values())
+    return prompts
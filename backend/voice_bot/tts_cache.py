@@ -0,0 +1,246 @@
+"""
+TTS Cache for the JantaVoice voice bot
+Content-addressed, size-capped cache of gTTS audio with a JSON manifest.
+
+Files are named by a SHA-256 of (language, voice, sentence), so the same
+sentence maps to the same file across restarts. Least recently used entries
+are evicted above TTS_CACHE_MAX_BYTES, except pinned (pre-warmed) prompts.
+
+    python voice_bot/tts_cache.py prewarm         # synthesize every fixed prompt
+    python voice_bot/tts_cache.py stats
+    python voice_bot/tts_cache.py purge-legacy    # delete old cache_<hash()>.mp3 files
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import atexit
+import hashlib
+import argparse
+import tempfile
+import threading
+import unicodedata
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                          "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+TTS_LANGUAGE = os.getenv("TTS_LANGUAGE", "hi")
+# gTTS top-level domain, which selects the accent
+TTS_VOICE = os.getenv("TTS_VOICE", "com")
+# Hits only touch last_used_at in memory; it is written out this often (and at exit)
+TTS_CACHE_FLUSH_SECONDS = float(os.getenv("TTS_CACHE_FLUSH_SECONDS", "30"))
+
+MANIFEST_NAME = "manifest.json"
+SENTENCE_END = '।'
+
+
+def split_sentences(text):
+    """Sentences as speak_hindi plays (and caches) them"""
+    return [seg.strip() + SENTENCE_END for seg in text.split(SENTENCE_END) if seg.strip()]
+
+
+def cache_key(sentence, lang=TTS_LANGUAGE, voice=TTS_VOICE):
+    """Stable digest of what is synthesized (unlike hash(), which changes per process)"""
+    sentence = " ".join(unicodedata.normalize("NFC", sentence).split())
+    return hashlib.sha256(f"{lang}\0{voice}\0{sentence}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Sentence -> mp3 file, synthesized with gTTS on a miss"""
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES,
+                 lang=TTS_LANGUAGE, voice=TTS_VOICE, flush_seconds=TTS_CACHE_FLUSH_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lang = lang
+        self.voice = voice
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        # Serializes manifest writes, which happen outside _lock
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer = None
+        self._snapshots = 0
+        self._written = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self._entries = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        # Drop entries whose file is gone (e.g. deleted by hand)
+        return {key: entry for key, entry in entries.items()
+                if os.path.exists(os.path.join(self.cache_dir, entry["file"]))}
+
+    def _snapshot(self):
+        """Manifest contents to write; call with _lock held"""
+        self._dirty = False
+        self._snapshots += 1
+        return self._snapshots, json.dumps(self._entries, ensure_ascii=False, indent=1)
+
+    def _write_manifest(self, snapshot):
+        seq, data = snapshot
+        with self._write_lock:
+            # A later snapshot already reached disk
+            if seq <= self._written:
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self._manifest_path)
+            self._written = seq
+
+    def _mark_dirty(self):
+        """Schedule a manifest write for in-memory changes; call with _lock held"""
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_seconds, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write out last_used_at / pin changes made by cache hits"""
+        with self._lock:
+            self._flush_timer = None
+            if not self._dirty:
+                return
+            snapshot = self._snapshot()
+        self._write_manifest(snapshot)
+
+    def _synthesize(self, sentence, path):
+        from gtts import gTTS
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".mp3.tmp")
+        os.close(fd)
+        try:
+            gTTS(text=sentence, lang=self.lang, tld=self.voice).save(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def get(self, sentence, pin=False):
+        """Path of the audio for sentence, synthesizing it on a miss"""
+        key = cache_key(sentence, self.lang, self.voice)
+        filename = f"{key}.mp3"
+        path = os.path.join(self.cache_dir, filename)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and os.path.exists(path):
+                entry["last_used_at"] = now
+                entry["pinned"] = entry.get("pinned", False) or pin
+                self._stats["hits"] += 1
+                self._mark_dirty()
+                return path
+            self._stats["misses"] += 1
+
+        # Network call outside the lock; a concurrent miss just synthesizes twice
+        self._synthesize(sentence, path)
+        with self._lock:
+            self._entries[key] = {
+                "text": sentence,
+                "lang": self.lang,
+                "voice": self.voice,
+                "file": filename,
+                "size": os.path.getsize(path),
+                "created_at": now,
+                "last_used_at": now,
+                "pinned": pin
+            }
+            self._evict()
+            snapshot = self._snapshot()
+        self._write_manifest(snapshot)
+        return path
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        candidates = sorted((entry["last_used_at"], key) for key, entry in self._entries.items()
+                            if not entry.get("pinned"))
+        for _, key in candidates:
+            if total <= self.max_bytes:
+                break
+            entry = self._entries.pop(key)
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+            total -= entry["size"]
+            self._stats["evictions"] += 1
+
+    def prewarm(self, texts):
+        """Synthesize and pin every sentence of texts; returns (sentences, newly synthesized)"""
+        sentences = list(dict.fromkeys(s for text in texts for s in split_sentences(text)))
+        misses_before = self._stats["misses"]
+        for sentence in sentences:
+            self.get(sentence, pin=True)
+        return len(sentences), self._stats["misses"] - misses_before
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["pinned"] = sum(1 for entry in self._entries.values() if entry.get("pinned"))
+            stats["bytes"] = sum(entry["size"] for entry in self._entries.values())
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """Shared cache instance (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+            atexit.register(_cache.flush)
+        return _cache
+
+
+def purge_legacy(directories):
+    """Delete cache_<hash()>.mp3 files left by the old per-process naming"""
+    removed = 0
+    for directory in {os.path.realpath(d) for d in directories}:
+        for path in glob.glob(os.path.join(directory, "cache_*.mp3")):
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def main():
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from voice_bot.prompts import all_prompts
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="JantaVoice TTS cache")
+    parser.add_argument("command", choices=["prewarm", "stats", "purge-legacy"])
+    parser.add_argument("--dirs", nargs="+", default=[os.path.join(backend_dir, "audios"),
+                                                      os.path.join(backend_dir, "voice_bot"), os.getcwd()],
+                        help="directories to purge legacy cache files from")
+    args = parser.parse_args()
+
+    if args.command == "purge-legacy":
+        print(f"Removed {purge_legacy(args.dirs)} legacy cache files")
+        return
+    cache = get_tts_cache()
+    if args.command == "prewarm":
+        started = time.perf_counter()
+        sentences, synthesized = cache.prewarm(all_prompts())
+        print(f"Pre-warmed {sentences} sentences ({synthesized} synthesized, "
+              f"{sentences - synthesized} already cached) in {time.perf_counter() - started:.1f}s")
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import speech_recognition as sr
-from gtts import gTTS
 import pygame
 import time
-import os
 import random
 
+from voice_bot.tts_cache import get_tts_cache, split_sentences
+from voice_bot.prompts import NO_INPUT_PROMPT, RECOGNITION_ERROR_PROMPT
+
 # Initialize pygame mixer once
 pygame.mixer.init()
 
@@ -12,13 +13,8 @@ pygame.mixer.init()
 def speak_hindi(text):
     try:
         # Cache small segments to avoid repeated TTS generation
-        segments = [seg.strip() for seg in text.split('।') if seg.strip()]
-        for seg in segments:
-            sentence = seg + '।'
-            filename = f"cache_{hash(sentence)}.mp3"
-            if not os.path.exists(filename):
-                tts = gTTS(text=sentence, lang='hi')
-                tts.save(filename)
+        for sentence in split_sentences(text):
+            filename = get_tts_cache().get(sentence)
             pygame.mixer.music.load(filename)
             pygame.mixer.music.play()
             while pygame.mixer.music.get_busy():
@@ -36,7 +32,7 @@ def listen_hindi(timeout=5, phrase_time_limit=7):
         try:
             audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
         except sr.WaitTimeoutError:
-            speak_hindi("आपने कुछ नहीं कहा, कृपया फिर से प्रयास करें।")
+            speak_hindi(NO_INPUT_PROMPT)
             return None
 
     try:
@@ -44,7 +40,7 @@ def listen_hindi(timeout=5, phrase_time_limit=7):
         print(f"आपने कहा: {text}")
         return text
     except (sr.UnknownValueError, sr.RequestError) as e:
-        speak_hindi("खेद है, समस्या हुई। कृपया पुनः प्रयास करें।")
+        speak_hindi(RECOGNITION_ERROR_PROMPT)
         return None
 
 
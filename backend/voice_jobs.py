@@ -0,0 +1,282 @@
+"""
+Voice Complaint Job Queue for JantaVoice
+Persistent (SQLite) queue and bounded worker pool for async voice processing
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from threading import local
+from typing import Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Whether this process runs the worker pool; without it async requests are answered synchronously
+VOICE_JOBS_ENABLED = os.getenv("VOICE_JOBS_ENABLED", "true").lower() == "true"
+VOICE_JOBS_DB_PATH = os.getenv("VOICE_JOBS_DB_PATH", "./voice_jobs.db")
+# Concurrent transcription/extraction jobs per process
+VOICE_JOB_WORKERS = int(os.getenv("VOICE_JOB_WORKERS", "2"))
+# Queued + running jobs allowed before new uploads are rejected
+VOICE_JOB_MAX_DEPTH = int(os.getenv("VOICE_JOB_MAX_DEPTH", "50"))
+# A running job whose worker died is requeued after this many seconds
+VOICE_JOB_LEASE_SECONDS = int(os.getenv("VOICE_JOB_LEASE_SECONDS", "300"))
+VOICE_JOB_MAX_ATTEMPTS = int(os.getenv("VOICE_JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs are kept this long so clients can still poll them
+VOICE_JOB_RETENTION_SECONDS = int(os.getenv("VOICE_JOB_RETENTION_SECONDS", str(24 * 3600)))
+# How often idle workers look for jobs submitted by other processes
+VOICE_JOB_POLL_SECONDS = float(os.getenv("VOICE_JOB_POLL_SECONDS", "1"))
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Handler contract: handler(payload, set_stage) -> (response_body, http_status)
+JobHandler = Callable[[Dict[str, Any], Callable[[str], None]], Tuple[Dict[str, Any], int]]
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at VOICE_JOB_MAX_DEPTH"""
+
+
+class VoiceJobQueue:
+    """
+    Persistent job queue with a bounded pool of worker threads
+
+    Jobs live in SQLite (WAL), so they survive restarts and can be shared by
+    several worker processes: claiming a job is a single write transaction,
+    and a job whose lease expires (its worker died) goes back to the queue.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS voice_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            lease_expires_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_voice_jobs_status ON voice_jobs(status, created_at);
+    """
+
+    def __init__(self, db_path: str = VOICE_JOBS_DB_PATH, workers: int = VOICE_JOB_WORKERS,
+                 max_depth: int = VOICE_JOB_MAX_DEPTH, lease_seconds: int = VOICE_JOB_LEASE_SECONDS):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_depth = max_depth
+        self.lease_seconds = lease_seconds
+        self._local = local()
+        self._wakeup = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._handler: Optional[JobHandler] = None
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread (and per-process) connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (BEGIN IMMEDIATE takes the write lock up front)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def depth(self) -> int:
+        """Number of queued and running jobs"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM voice_jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """
+        Persist a job and wake a worker
+
+        Raises:
+            QueueFullError: if max_depth jobs are already queued or running
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            depth = conn.execute("SELECT COUNT(*) FROM voice_jobs WHERE status IN (?, ?)",
+                                 (QUEUED, RUNNING)).fetchone()[0]
+            if depth >= self.max_depth:
+                raise QueueFullError(f"Voice job queue is full ({depth} jobs)")
+            conn.execute(
+                "INSERT INTO voice_jobs (id, status, stage, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, QUEUED, json.dumps(payload, ensure_ascii=False), now, now))
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status for API responses"""
+        row = self._conn().execute(
+            "SELECT id, status, stage, result, error, attempts, created_at, updated_at "
+            "FROM voice_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job_id, status, stage, result, error, attempts, created_at, updated_at = row
+        job = {
+            "id": job_id,
+            "status": status,
+            "stage": stage,
+            "attempts": attempts,
+            "created_at": datetime.utcfromtimestamp(created_at).isoformat(),
+            "updated_at": datetime.utcfromtimestamp(updated_at).isoformat(),
+            "result": json.loads(result) if result else None,
+            "error": error,
+        }
+        if status == QUEUED:
+            job["queue_position"] = self._conn().execute(
+                "SELECT COUNT(*) FROM voice_jobs WHERE status = ? AND created_at <= ?",
+                (QUEUED, created_at)).fetchone()[0]
+        return job
+
+    def _claim(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Atomically take the oldest queued job"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT id, payload FROM voice_jobs WHERE status = ? "
+                               "ORDER BY created_at LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE voice_jobs SET status = ?, stage = ?, attempts = attempts + 1, "
+                         "updated_at = ?, lease_expires_at = ? WHERE id = ?",
+                         (RUNNING, "starting", now, now + self.lease_seconds, row[0]))
+        return row[0], json.loads(row[1])
+
+    def _set_stage(self, job_id: str, stage: str):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE voice_jobs SET stage = ?, updated_at = ?, lease_expires_at = ? "
+                         "WHERE id = ? AND status = ?",
+                         (stage, now, now + self.lease_seconds, job_id, RUNNING))
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        with self._transaction() as conn:
+            conn.execute("UPDATE voice_jobs SET status = ?, stage = ?, result = ?, error = ?, "
+                         "updated_at = ?, lease_expires_at = NULL WHERE id = ?",
+                         (status, status, json.dumps(result, ensure_ascii=False, default=str) if result else None,
+                          error, time.time(), job_id))
+
+    def recover(self) -> int:
+        """Requeue jobs whose worker died; fail those out of attempts; prune old jobs"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE voice_jobs SET status = ?, stage = ?, error = ?, updated_at = ?, "
+                         "lease_expires_at = NULL WHERE status = ? AND lease_expires_at < ? AND attempts >= ?",
+                         (FAILED, FAILED, "Worker stopped before the job finished", now,
+                          RUNNING, now, VOICE_JOB_MAX_ATTEMPTS))
+            requeued = conn.execute("UPDATE voice_jobs SET status = ?, stage = ?, updated_at = ?, "
+                                    "lease_expires_at = NULL WHERE status = ? AND lease_expires_at < ?",
+                                    (QUEUED, QUEUED, now, RUNNING, now)).rowcount
+            conn.execute("DELETE FROM voice_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                         (COMPLETED, FAILED, now - VOICE_JOB_RETENTION_SECONDS))
+        if requeued:
+            logger.warning(f"Requeued {requeued} voice jobs with expired leases")
+        return requeued
+
+    def _run(self, job_id: str, payload: Dict[str, Any]):
+        try:
+            body, status_code = self._handler(payload, lambda stage: self._set_stage(job_id, stage))
+        except Exception as e:
+            logger.exception(f"Voice job {job_id} crashed: {e}")
+            status, body, error = FAILED, None, str(e)
+        else:
+            if status_code < 400:
+                status, error = COMPLETED, None
+            else:
+                status, error = FAILED, body.get("error") or f"HTTP {status_code}"
+
+        try:
+            self._finish(job_id, status, body, error)
+        except Exception as e:
+            # Keep the worker alive; the job stays running until recover() sees its lease expire
+            logger.exception(f"Could not record voice job {job_id} as {status}: {e}")
+            return
+        if status == COMPLETED:
+            logger.info(f"Voice job {job_id} completed")
+        else:
+            logger.warning(f"Voice job {job_id} failed: {error}")
+
+    def _loop(self):
+        last_recovery = 0.0
+        while not self._stop_event.is_set():
+            try:
+                if time.monotonic() - last_recovery > self.lease_seconds / 2:
+                    self.recover()
+                    last_recovery = time.monotonic()
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"Voice job queue error: {e}")
+                claimed = None
+            if claimed is None:
+                with self._wakeup:
+                    self._wakeup.wait(VOICE_JOB_POLL_SECONDS)
+                continue
+            self._run(*claimed)
+
+    def start(self, handler: JobHandler):
+        """Start the worker pool (no-op if already running)"""
+        self._handler = handler
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop_event.clear()
+        self.recover()
+        self._threads = [threading.Thread(target=self._loop, name=f"voice-job-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Voice job workers started ({self.workers} workers, max depth {self.max_depth})")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker pool after the current jobs finish"""
+        self._stop_event.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue counters for dashboards"""
+        counts = dict(self._conn().execute(
+            "SELECT status, COUNT(*) FROM voice_jobs GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            "workers_running": sum(1 for t in self._threads if t.is_alive()),
+            "max_depth": self.max_depth,
+            "queued": counts.get(QUEUED, 0),
+            "running": counts.get(RUNNING, 0),
+            "completed": counts.get(COMPLETED, 0),
+            "failed": counts.get(FAILED, 0),
+        }
+
+
+# Singleton instance
+voice_job_queue = VoiceJobQueue()